@@ -0,0 +1,80 @@
+"""
+Admin API routes for on-demand profiling and index residency
+"""
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.services.index_residency import index_residency
+from app.services.profiler import ProfilerBusyError, capture_allocations, profile_process
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency that only admits requests carrying the configured admin token"""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admin API is disabled"
+        )
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
+
+
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0)
+):
+    """
+    Sample all worker threads for N seconds and return collapsed stacks
+    
+    The output can be fed to flamegraph.pl or loaded into speedscope.
+    """
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    try:
+        return await run_in_threadpool(profile_process, seconds, interval_ms / 1000.0)
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.post("/allocations", dependencies=[Depends(require_admin)])
+async def allocations(
+    seconds: float = Query(10.0, gt=0),
+    limit: int = Query(25, ge=1, le=500),
+    frames: int = Query(1, ge=1, le=50)
+):
+    """Capture the top allocation sites (tracemalloc) that grew over N seconds"""
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    try:
+        top = await run_in_threadpool(capture_allocations, seconds, limit, frames)
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    return {
+        "seconds": seconds,
+        "allocations": top
+    }
+
+
+@router.get("/indexes", dependencies=[Depends(require_admin)])
+def index_residency_stats(knowledgebase_id: Optional[str] = None):
+    """
+    Knowledge base indexes held in Chroma's segment cache, as seen by this process
+    
+    Sizes are estimates; evicted indexes are listed with resident false and
+    are reloaded by their next query.
+    """
+    return index_residency.stats(knowledgebase_id)
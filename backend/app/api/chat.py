@@ -1,74 +1,147 @@
 """
 Chat API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import json
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
-from app.models.chat import ChatMessage
-from app.models.workflow import Workflow
+from typing import List, Optional, Tuple
+from app.core.database import get_db, get_async_db
+from app.models.chat import ChatMessage, ChatSession
 from app.schemas.chat import ChatMessageCreate, ChatMessageResponse
+from app.services.chat_writer import chat_writer
 from app.services.workflow_executor import WorkflowExecutor
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 
 @router.post("", response_model=ChatMessageResponse, status_code=status.HTTP_201_CREATED)
-def send_message(message_data: ChatMessageCreate, db: Session = Depends(get_db)):
+async def send_message(message_data: ChatMessageCreate, db: AsyncSession = Depends(get_async_db)):
     """Send a chat message through a workflow"""
-    # Save user message
-    user_message = ChatMessage(
-        workflow_id=message_data.workflow_id,
-        session_id=message_data.session_id,
-        role="user",
-        message=message_data.message
-    )
-    db.add(user_message)
-    db.flush()
+    received_at = datetime.now(timezone.utc)
     
     # Get workflow
-    workflow = db.query(Workflow).filter(Workflow.id == message_data.workflow_id).first()
+    executor = WorkflowExecutor()
+    workflow, plan, error = await executor.load_plan(db, message_data.workflow_id)
     if not workflow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
     
+    # Return the connection to the pool while the workflow runs
+    await db.close()
+    
     # Execute workflow
-    executor = WorkflowExecutor()
-    result = executor.execute_workflow(workflow, message_data.message, db)
+    if plan is None:
+        result = {"success": False, "error": error}
+    else:
+        result = await run_in_threadpool(
+            executor.execute_plan, plan, message_data.message, session_id=message_data.session_id
+        )
     
-    # Save assistant response
-    assistant_message = ChatMessage(
-        workflow_id=message_data.workflow_id,
-        session_id=message_data.session_id,
-        role="assistant",
-        message=result.get("response", "") if result.get("success") else f"Error: {result.get('error', 'Unknown error')}",
-        metadata=result.get("metadata")
-    )
-    db.add(assistant_message)
-    db.commit()
-    db.refresh(assistant_message)
+    # Hand user message and assistant response to the write-behind writer;
+    # the response does not wait for the commit
+    user_message, assistant_message = await run_in_threadpool(chat_writer.submit, [
+        {
+            "workflow_id": message_data.workflow_id,
+            "session_id": message_data.session_id,
+            "role": "user",
+            "message": message_data.message,
+            "created_at": received_at
+        },
+        {
+            "workflow_id": message_data.workflow_id,
+            "session_id": message_data.session_id,
+            "role": "assistant",
+            "message": result.get("response", "") if result.get("success") else f"Error: {result.get('error', 'Unknown error')}",
+            "message_metadata": result.get("metadata")
+        }
+    ])
     
-    return assistant_message
+    return ChatMessageResponse.model_validate(assistant_message)
+
+
+def _encode_cursor(created_at: datetime, message_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), message_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
 @router.get("/sessions/{session_id}", response_model=List[ChatMessageResponse])
-def get_chat_history(session_id: str, db: Session = Depends(get_db)):
-    """Get chat history for a session"""
-    messages = db.query(ChatMessage).filter(
-        ChatMessage.session_id == session_id
-    ).order_by(ChatMessage.created_at.asc()).all()
+def get_chat_history(
+    session_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Get chat history for a session
+    
+    Returns the most recent `limit` messages in chronological order. When older
+    messages exist, the X-Next-Cursor header holds a cursor for the page before
+    this one; pass it back as `cursor`.
+    """
+    # Read pending messages first: one written in between is then found in the table
+    pending = chat_writer.pending_messages(session_id)
+    
+    query = db.query(ChatMessage).filter(ChatMessage.session_id == session_id)
+    if cursor:
+        created_at, message_id = _decode_cursor(cursor)
+        query = query.filter(tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(created_at, message_id))
+        pending = [row for row in pending if (row["created_at"], row["id"]) < (created_at, message_id)]
+    
+    # Newest first so the keyset index is walked backwards from the cursor
+    stored = query.order_by(
+        ChatMessage.created_at.desc(), ChatMessage.id.desc()
+    ).limit(limit + 1).all()
+    
+    # Include messages this process accepted but has not written yet, then page
+    keyed = [(message.created_at, message.id, message) for message in stored]
+    written = {message.id for message in stored}
+    keyed.extend(
+        (row["created_at"], row["id"], ChatMessageResponse.model_validate(row))
+        for row in pending
+        if row["id"] not in written
+    )
+    keyed.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    
+    if len(keyed) > limit:
+        keyed = keyed[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(keyed[-1][0], keyed[-1][1])
     
+    messages = [message for _, _, message in reversed(keyed)]
     return messages
 
 
 @router.get("/workflows/{workflow_id}/sessions", response_model=List[str])
 def list_sessions(workflow_id: int, db: Session = Depends(get_db)):
-    """List all chat sessions for a workflow"""
-    sessions = db.query(ChatMessage.session_id).filter(
-        ChatMessage.workflow_id == workflow_id
-    ).distinct().all()
+    """List all chat sessions for a workflow, most recently active first"""
+    # Read pending sessions first: one written in between is then found in the table
+    activity = chat_writer.pending_sessions(workflow_id)
     
-    return [session[0] for session in sessions]
-
+    sessions = db.query(ChatSession.session_id, ChatSession.last_activity_at).filter(
+        ChatSession.workflow_id == workflow_id
+    ).all()
+    
+    # Include sessions whose messages this process accepted but has not written yet
+    for session_id, last_activity_at in sessions:
+        pending_at = activity.get(session_id)
+        activity[session_id] = last_activity_at if pending_at is None else max(pending_at, last_activity_at)
+    
+    return sorted(activity, key=lambda session_id: activity[session_id], reverse=True)
@@ -1,18 +1,25 @@
 """
 Document API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
 import uuid
-from datetime import datetime
-from app.core.database import get_db
+from datetime import datetime, timezone
+from app.core.database import get_db, get_async_db
 from app.core.config import settings
 from app.models.document import Document
-from app.schemas.document import DocumentResponse
-from app.services.text_extractor import TextExtractor
-from app.services.embedding_service import EmbeddingService
+from app.schemas.document import DocumentResponse, ImportJobResponse
+from app.services.bulk_import import (
+    BulkImportService, collect_directory, create_import_job, discard_files, get_import_job, unpack_archive
+)
+from app.services.ingestion import DocumentIngestionService
+from app.services.knowledgebase_registry import content_version_bump
+from app.services.retrieval_filters import parse_tags
 from app.services.vector_store import VectorStoreService
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
@@ -25,9 +32,15 @@ os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 async def upload_document(
     file: UploadFile = File(...),
     knowledgebase_id: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    tags: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload and process a document"""
+    """Upload and process a document, optionally with comma-separated tags for retrieval filters"""
+    try:
+        tag_list = parse_tags(tags)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     # Validate file size
     file_content = await file.read()
     file_size = len(file_content)
@@ -54,63 +67,106 @@ async def upload_document(
         file_size=file_size,
         file_type=file.content_type or "application/octet-stream",
         knowledgebase_id=knowledgebase_id,
-        processed="pending"
+        processed="pending",
+        tags=tag_list or None,
+        # Set here rather than by the server default, since chunks record it before the row is reloaded
+        created_at=datetime.now(timezone.utc)
     )
     db.add(document)
-    db.flush()
+    # Commit the pending row and return the connection while embeddings are generated
+    await db.commit()
+    await db.close()
+    
+    # Process document (in production, use background tasks)
+    await run_in_threadpool(DocumentIngestionService().process, document, "openai")
+    
+    db.add(document)
+    await db.execute(content_version_bump(knowledgebase_id or "default"))
+    await db.commit()
+    await db.refresh(document)
     
-    # Process document asynchronously (in production, use background tasks)
+    return document
+
+
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_documents(
+    background_tasks: BackgroundTasks,
+    file: Optional[UploadFile] = File(None),
+    directory: Optional[str] = Form(None),
+    knowledgebase_id: Optional[str] = Form(None),
+    tags: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Import every file of a zip/tar archive or of a directory under IMPORT_ROOT, tagging each document"""
+    if (file is None) == (directory is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either an archive file or a directory"
+        )
     try:
-        # Extract text
-        text_extractor = TextExtractor()
-        text_content = text_extractor.extract_text(file_path, document.file_type)
-        
-        # Split text into chunks (simple chunking by paragraphs)
-        chunks = [chunk.strip() for chunk in text_content.split("\n\n") if chunk.strip()]
-        
-        if chunks:
-            # Generate embeddings
-            embedding_service = EmbeddingService()
-            embedding_provider = "openai"  # Can be configured
-            embeddings = embedding_service.generate_embeddings(
-                chunks,
-                provider=embedding_provider
-            )
-            
-            # Store in vector database
-            vector_store = VectorStoreService()
-            collection_name = knowledgebase_id or "default"
-            metadatas = [
-                {
-                    "document_id": document.id,
-                    "filename": file.filename,
-                    "chunk_index": i
-                }
-                for i in range(len(chunks))
-            ]
-            
-            vector_store.add_documents(
-                collection_name=collection_name,
-                knowledgebase_id=knowledgebase_id or "default",
-                texts=chunks,
-                embeddings=embeddings,
-                metadatas=metadatas
-            )
-            
-            document.processed = "completed"
-            document.metadata_json = f'{{"chunks": {len(chunks)}, "embedding_provider": "{embedding_provider}"}}'
+        tag_list = parse_tags(tags)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Stage files under the upload directory before responding, so invalid
+    # archives and paths are rejected up front
+    try:
+        if file is not None:
+            files = await run_in_threadpool(unpack_archive, file.file)
         else:
-            document.processed = "failed"
-            document.metadata_json = '{"error": "No text content extracted"}'
+            files = await run_in_threadpool(collect_directory, directory)
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
-    except Exception as e:
-        document.processed = "failed"
-        document.metadata_json = f'{{"error": "{str(e)}"}}'
+    if not files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No files found to import"
+        )
     
-    db.commit()
-    db.refresh(document)
+    # Create every document row in one multi-row INSERT
+    try:
+        result = await db.execute(
+            insert(Document).returning(Document.id, Document.created_at, sort_by_parameter_order=True),
+            [
+                {
+                    "filename": staged.filename,
+                    "file_path": staged.file_path,
+                    "file_size": staged.file_size,
+                    "file_type": staged.file_type,
+                    "knowledgebase_id": knowledgebase_id,
+                    "processed": "processing",
+                    "tags": tag_list or None
+                }
+                for staged in files
+            ]
+        )
+        for staged, row in zip(files, result):
+            staged.document_id = row.id
+            staged.uploaded_at = row.created_at
+        await db.commit()
+    except Exception:
+        discard_files(files)
+        raise
+    await db.close()
     
-    return document
+    job = create_import_job(knowledgebase_id, len(files), tag_list)
+    background_tasks.add_task(BulkImportService().run, job, files, "openai")
+    return job
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+def get_import_status(job_id: str):
+    """Get progress of a bulk import"""
+    job = get_import_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return job
 
 
 @router.get("", response_model=List[DocumentResponse])
@@ -159,7 +215,15 @@ def delete_document(document_id: int, db: Session = Depends(get_db)):
         except Exception as e:
             print(f"Error deleting file: {str(e)}")
     
+    # Remove the document's chunks so retrievals stop returning them
+    knowledgebase_id = document.knowledgebase_id or "default"
+    try:
+        VectorStoreService().delete_documents(knowledgebase_id, knowledgebase_id, where={"document_id": document.id})
+    except Exception as e:
+        print(f"Error deleting document chunks: {str(e)}")
+    
     db.delete(document)
+    db.execute(content_version_bump(knowledgebase_id))
     db.commit()
     
     return None
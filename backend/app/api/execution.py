@@ -1,37 +1,54 @@
 """
 Workflow execution API routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.workflow import Workflow
-from app.schemas.execution import WorkflowExecute, ExecutionResponse
+import json
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.schemas.execution import (
+    WorkflowExecute, ExecutionResponse,
+    WorkflowBatchExecute, BatchItemResult
+)
 from app.services.workflow_executor import WorkflowExecutor
 
 router = APIRouter(prefix="/api/workflows", tags=["execution"])
 
 
 @router.post("/{workflow_id}/execute", response_model=ExecutionResponse)
-def execute_workflow(
+async def execute_workflow(
     workflow_id: int,
     execution_data: WorkflowExecute,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Execute a workflow with a query"""
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+    executor = WorkflowExecutor()
+    workflow, plan, error = await executor.load_plan(db, workflow_id)
     if not workflow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
     
-    executor = WorkflowExecutor()
-    result = executor.execute_workflow(workflow, execution_data.query, db)
+    # Return the connection to the pool before the provider calls
+    await db.close()
+    
+    if plan is None:
+        return ExecutionResponse(success=False, response="", error=error)
+    
+    result = await run_in_threadpool(
+        executor.execute_plan, plan, execution_data.query, session_id=execution_data.session_id
+    )
     
     if not result["success"]:
         return ExecutionResponse(
             success=False,
             response="",
+            metadata=result.get("metadata"),
             error=result["error"]
         )
     
@@ -41,3 +58,109 @@ def execute_workflow(
         metadata=result.get("metadata")
     )
 
+
+def _parse_jsonl_queries(content: bytes) -> List[str]:
+    """Parse JSONL where each line is a query string or an object with a "query" field"""
+    queries = []
+    for line_number, line in enumerate(content.decode("utf-8").splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid JSON on line {line_number}"
+            )
+        query = item.get("query") if isinstance(item, dict) else item
+        if not isinstance(query, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing query on line {line_number}"
+            )
+        queries.append(query)
+    return queries
+
+
+@router.post("/{workflow_id}/execute:batch")
+async def execute_workflow_batch(
+    workflow_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Execute a workflow over many queries, streaming NDJSON results
+    
+    Accepts a JSON body ({"queries": [...], "concurrency": n}), a raw JSONL body
+    (application/x-ndjson), or a multipart upload with a JSONL "file" field.
+    """
+    content_type = request.headers.get("content-type", "")
+    concurrency = None
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Multipart batch requests require a JSONL file field named 'file'"
+            )
+        queries = _parse_jsonl_queries(await upload.read())
+        if form.get("concurrency"):
+            try:
+                concurrency = int(form.get("concurrency"))
+            except ValueError:
+                concurrency = 0
+            if concurrency < 1:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="concurrency must be an integer of at least 1"
+                )
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        queries = _parse_jsonl_queries(await request.body())
+    else:
+        try:
+            batch_data = WorkflowBatchExecute.model_validate(await request.json())
+        except (ValidationError, json.JSONDecodeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            )
+        queries = batch_data.queries
+        concurrency = batch_data.concurrency
+    
+    if not queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No queries provided"
+        )
+    if len(queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds maximum of {settings.BATCH_MAX_QUERIES} queries"
+        )
+    
+    # Compile once; the stream below never touches the database session
+    executor = WorkflowExecutor()
+    workflow, plan, error = await executor.load_plan(db, workflow_id)
+    if not workflow:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workflow not found"
+        )
+    
+    # Dependency teardown runs after the stream ends; release the connection now
+    await db.close()
+    
+    if plan is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+    
+    def stream():
+        for item in executor.execute_batch(plan, queries, concurrency):
+            yield BatchItemResult(**item).model_dump_json() + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
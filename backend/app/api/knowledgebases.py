@@ -0,0 +1,111 @@
+"""
+Knowledge base API routes
+"""
+import os
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from app.core.database import get_db
+from app.models.document import Document
+from app.schemas.knowledgebase import KnowledgeBaseImportResponse, ReindexRequest, ReindexJobResponse
+from app.services.knowledgebase_transfer import KnowledgeBaseTransferService
+from app.services.reindex import ReindexService, create_reindex_job, get_reindex_job
+
+router = APIRouter(prefix="/api/knowledgebases", tags=["knowledgebases"])
+
+
+@router.get("/{knowledgebase_id}/export")
+def export_knowledgebase(
+    knowledgebase_id: str,
+    collection_name: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Download a knowledge base's chunks, embeddings and documents as Parquet files in a zip archive"""
+    service = KnowledgeBaseTransferService()
+    collection_name = collection_name or knowledgebase_id
+
+    has_documents = db.query(Document.id).filter(Document.knowledgebase_id == knowledgebase_id).first()
+    if not has_documents and service.vector_store.is_empty(collection_name, knowledgebase_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Knowledge base not found"
+        )
+
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        service.export(db, knowledgebase_id, collection_name, path)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"{knowledgebase_id}.zip",
+        background=BackgroundTask(os.remove, path)
+    )
+
+
+@router.post("/{knowledgebase_id}/import", response_model=KnowledgeBaseImportResponse, status_code=status.HTTP_201_CREATED)
+def import_knowledgebase(
+    knowledgebase_id: str,
+    file: UploadFile = File(...),
+    collection_name: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """Restore an exported knowledge base without re-embedding (the target must be empty)"""
+    service = KnowledgeBaseTransferService()
+    collection_name = collection_name or knowledgebase_id
+
+    has_documents = db.query(Document.id).filter(Document.knowledgebase_id == knowledgebase_id).first()
+    if has_documents or not service.vector_store.is_empty(collection_name, knowledgebase_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Knowledge base already has documents"
+        )
+
+    try:
+        counts = service.import_archive(db, knowledgebase_id, collection_name, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return KnowledgeBaseImportResponse(
+        knowledgebase_id=knowledgebase_id,
+        collection_name=collection_name,
+        **counts
+    )
+
+
+@router.post("/{knowledgebase_id}/reindex", response_model=ReindexJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def reindex_knowledgebase(
+    knowledgebase_id: str,
+    reindex_data: ReindexRequest,
+    background_tasks: BackgroundTasks
+):
+    """Re-chunk and re-embed a knowledge base from stored text, then swap it over with no downtime"""
+    collection_name = reindex_data.collection_name or knowledgebase_id
+    job = create_reindex_job(knowledgebase_id, collection_name)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Knowledge base is already being re-indexed"
+        )
+
+    background_tasks.add_task(ReindexService().run, job, reindex_data.model_dump(exclude={"collection_name"}))
+    return job
+
+
+@router.get("/{knowledgebase_id}/reindex/{job_id}", response_model=ReindexJobResponse)
+def get_reindex_status(knowledgebase_id: str, job_id: str):
+    """Get progress of a re-index"""
+    job = get_reindex_job(job_id)
+    if not job or job.knowledgebase_id != knowledgebase_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Re-index job not found"
+        )
+    return job
@@ -2,12 +2,13 @@
 Workflow API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from app.core.database import get_db
-from app.models.workflow import Workflow, WorkflowComponent, ComponentConnection
+from app.models.workflow import Workflow, WorkflowComponent, ComponentConnection, WORKFLOW_GRAPH_OPTIONS
 from app.schemas.workflow import (
-    WorkflowCreate, WorkflowUpdate, WorkflowResponse,
+    WorkflowCreate, WorkflowUpdate, WorkflowResponse, WorkflowSummary,
     ComponentCreate, ComponentResponse,
     ConnectionCreate, ConnectionResponse
 )
@@ -16,6 +17,54 @@ from app.services.workflow_executor import WorkflowExecutor
 router = APIRouter(prefix="/api/workflows", tags=["workflows"])
 
 
+def _insert_components(db: Session, workflow_id: int, components: List[ComponentCreate]) -> Dict[str, int]:
+    """
+    Insert components in one multi-row INSERT
+    
+    Returns:
+        Mapping of React Flow node ID to new component ID
+    """
+    if not components:
+        return {}
+    
+    rows = db.execute(
+        insert(WorkflowComponent).returning(WorkflowComponent.id, WorkflowComponent.node_id),
+        [
+            {
+                "workflow_id": workflow_id,
+                "component_type": comp_data.component_type,
+                "node_id": comp_data.node_id,
+                "position_x": comp_data.position_x,
+                "position_y": comp_data.position_y,
+                "config": comp_data.config
+            }
+            for comp_data in components
+        ]
+    ).all()
+    return {row.node_id: row.id for row in rows}
+
+
+def _connection_key(source_id: int, target_id: int, conn_data) -> Tuple[int, int, Optional[str], Optional[str]]:
+    return (source_id, target_id, conn_data.source_handle, conn_data.target_handle)
+
+
+def _insert_connections(db: Session, workflow_id: int, keys: List[Tuple[int, int, Optional[str], Optional[str]]]) -> None:
+    """Insert connections, given as (source ID, target ID, source handle, target handle), in one statement"""
+    if not keys:
+        return
+    
+    db.execute(insert(ComponentConnection), [
+        {
+            "workflow_id": workflow_id,
+            "source_component_id": source_id,
+            "target_component_id": target_id,
+            "source_handle": source_handle,
+            "target_handle": target_handle
+        }
+        for source_id, target_id, source_handle, target_handle in keys
+    ])
+
+
 @router.post("", response_model=WorkflowResponse, status_code=status.HTTP_201_CREATED)
 def create_workflow(workflow_data: WorkflowCreate, db: Session = Depends(get_db)):
     """Create a new workflow"""
@@ -28,42 +77,23 @@ def create_workflow(workflow_data: WorkflowCreate, db: Session = Depends(get_db)
     db.flush()
     
     # Create components
-    component_map = {}
-    for comp_data in workflow_data.components:
-        component = WorkflowComponent(
-            workflow_id=workflow.id,
-            component_type=comp_data.component_type,
-            node_id=comp_data.node_id,
-            position_x=comp_data.position_x,
-            position_y=comp_data.position_y,
-            config=comp_data.config
-        )
-        db.add(component)
-        db.flush()
-        component_map[comp_data.node_id] = component
-    
-    # Create connections - map node IDs to component IDs
-    node_to_component = {comp.node_id: comp.id for comp in component_map.values()}
+    node_to_component = _insert_components(db, workflow.id, workflow_data.components)
     
+    # Create connections - map node IDs (from React Flow) to component IDs
+    connection_keys = []
     for conn_data in workflow_data.connections:
-        # Find components by node_id (from React Flow)
-        source_comp = component_map.get(conn_data.source_component_id)
-        target_comp = component_map.get(conn_data.target_component_id)
+        source_id = node_to_component.get(conn_data.source_component_id)
+        target_id = node_to_component.get(conn_data.target_component_id)
         
-        if not source_comp or not target_comp:
+        if not source_id or not target_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid node IDs in connection: {conn_data.source_component_id} -> {conn_data.target_component_id}"
             )
         
-        connection = ComponentConnection(
-            workflow_id=workflow.id,
-            source_component_id=source_comp.id,
-            target_component_id=target_comp.id,
-            source_handle=conn_data.source_handle,
-            target_handle=conn_data.target_handle
-        )
-        db.add(connection)
+        connection_keys.append(_connection_key(source_id, target_id, conn_data))
+    
+    _insert_connections(db, workflow.id, connection_keys)
     
     db.commit()
     db.refresh(workflow)
@@ -74,14 +104,19 @@ def create_workflow(workflow_data: WorkflowCreate, db: Session = Depends(get_db)
 @router.get("", response_model=List[WorkflowResponse])
 def list_workflows(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """List all workflows"""
-    workflows = db.query(Workflow).offset(skip).limit(limit).all()
-    return workflows
+    return db.query(Workflow).options(*WORKFLOW_GRAPH_OPTIONS).order_by(Workflow.id).offset(skip).limit(limit).all()
+
+
+@router.get("/summaries", response_model=List[WorkflowSummary])
+def list_workflow_summaries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """List workflows without their components and connections, reading only the workflow rows"""
+    return db.query(Workflow).order_by(Workflow.id).offset(skip).limit(limit).all()
 
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
     """Get workflow by ID"""
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+    workflow = db.query(Workflow).options(*WORKFLOW_GRAPH_OPTIONS).filter(Workflow.id == workflow_id).first()
     if not workflow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,6 +125,97 @@ def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
     return workflow
 
 
+def _update_graph(
+    db: Session,
+    workflow_id: int,
+    components: List[ComponentCreate],
+    connections: List[ConnectionCreate]
+) -> bool:
+    """
+    Apply a saved graph as a diff against the stored one, keyed by React Flow node ID
+    
+    Only added, removed and changed rows are written. Position changes are
+    written but do not count as structural, so compiled plans stay valid.
+    
+    Returns:
+        True if components, their types/configs or connections changed
+    """
+    existing = {
+        component.node_id: component
+        for component in db.query(WorkflowComponent).filter(WorkflowComponent.workflow_id == workflow_id)
+    }
+    existing_connections = db.query(ComponentConnection).filter(
+        ComponentConnection.workflow_id == workflow_id
+    ).all()
+    incoming = {comp_data.node_id: comp_data for comp_data in components}
+    
+    removed_ids = [component.id for node_id, component in existing.items() if node_id not in incoming]
+    added = [comp_data for node_id, comp_data in incoming.items() if node_id not in existing]
+    structural = bool(removed_ids or added)
+    
+    updates = []
+    for node_id, comp_data in incoming.items():
+        component = existing.get(node_id)
+        if component is None:
+            continue
+        if component.component_type != comp_data.component_type or component.config != comp_data.config:
+            structural = True
+            updates.append({
+                "id": component.id,
+                "component_type": comp_data.component_type,
+                "position_x": comp_data.position_x,
+                "position_y": comp_data.position_y,
+                "config": comp_data.config
+            })
+        elif (component.position_x, component.position_y) != (comp_data.position_x, comp_data.position_y):
+            updates.append({
+                "id": component.id,
+                "position_x": comp_data.position_x,
+                "position_y": comp_data.position_y
+            })
+    
+    node_to_component = {node_id: component.id for node_id, component in existing.items() if node_id in incoming}
+    node_to_component.update(_insert_components(db, workflow_id, added))
+    
+    desired = []
+    for conn_data in connections:
+        # Find components by node_id (from React Flow)
+        source_id = node_to_component.get(conn_data.source_component_id)
+        target_id = node_to_component.get(conn_data.target_component_id)
+        
+        if not source_id or not target_id:
+            continue  # Skip invalid connections
+        
+        desired.append(_connection_key(source_id, target_id, conn_data))
+    
+    current = {
+        (conn.source_component_id, conn.target_component_id, conn.source_handle, conn.target_handle): conn.id
+        for conn in existing_connections
+    }
+    desired_keys = set(desired)
+    stale_connection_ids = [conn_id for key, conn_id in current.items() if key not in desired_keys]
+    new_connections = [key for key in dict.fromkeys(desired) if key not in current]
+    if stale_connection_ids or new_connections:
+        structural = True
+    
+    if stale_connection_ids:
+        db.execute(
+            delete(ComponentConnection).where(ComponentConnection.id.in_(stale_connection_ids)),
+            execution_options={"synchronize_session": False}
+        )
+    if removed_ids:
+        db.execute(
+            delete(WorkflowComponent).where(WorkflowComponent.id.in_(removed_ids)),
+            execution_options={"synchronize_session": False}
+        )
+    if updates:
+        # ORM bulk UPDATE by primary key (executemany, grouped by column set)
+        db.execute(update(WorkflowComponent), updates)
+    _insert_connections(db, workflow_id, new_connections)
+    
+    return structural
+
+
 @router.put("/{workflow_id}", response_model=WorkflowResponse)
 def update_workflow(
     workflow_id: int,
@@ -111,45 +237,8 @@ def update_workflow(
     
     # Update components and connections if provided
     if workflow_data.components is not None:
-        # Delete existing components
-        db.query(WorkflowComponent).filter(WorkflowComponent.workflow_id == workflow_id).delete()
-        db.query(ComponentConnection).filter(ComponentConnection.workflow_id == workflow_id).delete()
-        
-        # Create new components
-        component_map = {}
-        for comp_data in workflow_data.components:
-            component = WorkflowComponent(
-                workflow_id=workflow.id,
-                component_type=comp_data.component_type,
-                node_id=comp_data.node_id,
-                position_x=comp_data.position_x,
-                position_y=comp_data.position_y,
-                config=comp_data.config
-            )
-            db.add(component)
-            db.flush()
-            component_map[comp_data.node_id] = component
-        
-        # Create new connections - map node IDs to component IDs
-        if workflow_data.connections:
-            node_to_component = {comp.node_id: comp.id for comp in component_map.values()}
-            
-            for conn_data in workflow_data.connections:
-                # Find components by node_id (from React Flow)
-                source_comp = component_map.get(conn_data.source_component_id)
-                target_comp = component_map.get(conn_data.target_component_id)
-                
-                if not source_comp or not target_comp:
-                    continue  # Skip invalid connections
-                
-                connection = ComponentConnection(
-                    workflow_id=workflow.id,
-                    source_component_id=source_comp.id,
-                    target_component_id=target_comp.id,
-                    source_handle=conn_data.source_handle,
-                    target_handle=conn_data.target_handle
-                )
-                db.add(connection)
+        if _update_graph(db, workflow.id, workflow_data.components, workflow_data.connections or []):
+            workflow.graph_version = Workflow.graph_version + 1
     
     db.commit()
     db.refresh(workflow)
@@ -176,7 +265,7 @@ def delete_workflow(workflow_id: int, db: Session = Depends(get_db)):
 @router.post("/{workflow_id}/validate", status_code=status.HTTP_200_OK)
 def validate_workflow(workflow_id: int, db: Session = Depends(get_db)):
     """Validate workflow structure"""
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+    workflow = db.query(Workflow).options(*WORKFLOW_GRAPH_OPTIONS).filter(Workflow.id == workflow_id).first()
     if not workflow:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
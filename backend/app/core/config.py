@@ -15,11 +15,23 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
     
+    # Database connection pool, per worker process; split evenly between the
+    # sync and async engines, so a worker opens at most DB_POOL_SIZE + DB_MAX_OVERFLOW
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    
     # API Keys
     OPENAI_API_KEY: str
     GEMINI_API_KEY: Optional[str] = None
     SERPAPI_API_KEY: Optional[str] = None
     
+    # Provider endpoints (override to use proxies or the benchmark fakes)
+    OPENAI_BASE_URL: Optional[str] = None
+    GEMINI_API_ENDPOINT: Optional[str] = None  # Switches the Gemini SDK to its REST transport
+    SERPAPI_BASE_URL: str = "https://serpapi.com"
+    
     # Application
     BACKEND_URL: str = "http://localhost:8000"
     FRONTEND_URL: str = "http://localhost:3000"
@@ -28,8 +40,96 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
     
+    # Document ingestion pipeline
+    INGESTION_EMBED_BATCH_SIZE: int = 64  # Chunks per embedding request and vector store write
+    INGESTION_QUEUE_SIZE: int = 4  # Items buffered between stages; bounds memory per document
+    INGESTION_TEXT_BLOCK_SIZE: int = 64 * 1024  # Characters read at a time from plain-text files
+    
+    # Bulk document import
+    IMPORT_ROOT: Optional[str] = None  # Server directory that imports may read from; disabled when unset
+    IMPORT_MAX_FILES: int = 10000
+    IMPORT_MAX_TOTAL_SIZE: int = 1024 * 1024 * 1024  # 1GB of unpacked files per import
+    IMPORT_WORKERS: int = 4  # Files extracted and chunked in parallel
+    IMPORT_EMBED_WORKERS: int = 2  # Concurrent embedding requests per import
+    IMPORT_EMBED_BATCH_SIZE: int = 256  # Chunks per embedding request, pooled across files
+    IMPORT_WRITE_BATCH_SIZE: int = 2048  # Chunks per vector store write
+    IMPORT_JOB_HISTORY: int = 100  # Finished jobs whose progress stays queryable
+    
+    # LLM provider resilience
+    LLM_REQUEST_TIMEOUT: float = 60.0  # Per-attempt timeout in seconds
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5  # Seconds, doubled per attempt with full jitter
+    LLM_RETRY_MAX_DELAY: float = 20.0
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive failures before a circuit opens
+    LLM_CIRCUIT_RESET_TIMEOUT: float = 30.0  # Seconds before a half-open probe is allowed
+    LLM_HEDGE_PERCENTILE: float = 0.95  # Latency percentile used as the hedge deadline
+    LLM_HEDGE_DEFAULT_DELAY: float = 10.0  # Hedge deadline until enough latency samples exist
+    LLM_HEDGE_MIN_DELAY: float = 1.0
+    LLM_HEDGE_MAX_WORKERS: int = 32
+    
+    # Client-side rate limiting (per provider/model, adapted from x-ratelimit-* headers)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_WAIT: float = 120.0  # Seconds a request may queue before failing
+    OPENAI_REQUESTS_PER_MINUTE: int = 3500
+    OPENAI_TOKENS_PER_MINUTE: int = 90000
+    GEMINI_REQUESTS_PER_MINUTE: int = 60
+    GEMINI_TOKENS_PER_MINUTE: int = 120000
+    
+    # Workflow execution
+    PLAN_CACHE_SIZE: int = 256  # Compiled plans kept per process, keyed by (workflow ID, graph version)
+    RETRIEVAL_CACHE_SIZE: int = 10000  # Knowledgebase results kept per process, keyed by KB content version
+    
+    # Conversation memory
+    MEMORY_TOKEN_BUDGET: int = 1500  # Prompt tokens for the summary plus recent turns
+    MEMORY_MAX_MESSAGES: int = 50  # Most recent unsummarized messages loaded per turn
+    MEMORY_SUMMARY_MAX_TOKENS: int = 300
+    MEMORY_CACHE_SIZE: int = 1024  # Sessions whose summary is cached in process
+    
+    # Chat message write-behind
+    CHAT_WRITE_FLUSH_INTERVAL: float = 0.25  # Max seconds an accepted message waits to be written
+    CHAT_WRITE_BATCH_SIZE: int = 500  # Messages per multi-row INSERT
+    CHAT_WRITE_MAX_PENDING: int = 10000  # Submitting blocks beyond this many unwritten messages
+    CHAT_WRITE_MAX_ATTEMPTS: int = 3  # Failed flushes of a batch before it is split to find unwritable messages
+    CHAT_ID_BLOCK_SIZE: int = 100  # Message IDs reserved from the sequence per round trip
+    
+    # Batch execution
+    BATCH_MAX_QUERIES: int = 10000
+    BATCH_DEFAULT_CONCURRENCY: int = 8
+    BATCH_MAX_CONCURRENCY: int = 32
+    BATCH_WINDOW_SIZE: int = 512  # Queries compiled into one batched retrieval pass
+    BATCH_EMBEDDING_SIZE: int = 256  # Queries per embedding/vector search call
+    
+    # Tracing (OpenTelemetry)
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "workflow-backend"
+    TRACING_EXPORTER: str = "otlp"  # otlp, file or console
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 1.0  # Fraction of new traces sampled; children follow the parent
+    
+    # Admin / profiling
+    ADMIN_API_TOKEN: Optional[str] = None  # Admin routes are disabled when unset
+    PROFILER_MAX_SECONDS: float = 60.0
+    
     # ChromaDB
-    CHROMA_DB_PATH: str = "chroma_db"
+    CHROMA_MODE: str = "embedded"  # embedded (single worker) or http (shared Chroma server)
+    CHROMA_DB_PATH: str = "chroma_db"  # Embedded mode storage directory
+    CHROMA_HOST: str = "localhost"
+    CHROMA_PORT: int = 8000
+    CHROMA_SSL: bool = False
+    CHROMA_AUTH_TOKEN: Optional[str] = None  # Sent as a bearer token when the server requires auth
+    CHROMA_HTTP_POOL_SIZE: int = 32  # Keep-alive connections to the Chroma server per process
+    CHROMA_MEMORY_LIMIT_BYTES: int = 0  # LRU budget for loaded indexes (0 = keep all; match the server's in http mode)
+    
+    # Knowledge base re-indexing
+    KB_REGISTRY_TTL: float = 5.0  # Seconds before other processes see a swap (0 = every lookup)
+    KB_SWAP_GRACE_SECONDS: float = 60.0  # Delay before a replaced collection is deleted (keep above KB_REGISTRY_TTL)
+    REINDEX_DOCUMENT_BATCH_SIZE: int = 100  # Documents loaded per query while re-indexing
+    
+    # Knowledge base storage layout
+    KB_STORAGE_LAYOUT: str = "dedicated"  # dedicated (collection per KB) or shared (new KBs start as partitions)
+    KB_SHARED_COLLECTION: str = "shared_kbs"  # Prefix of the shared collections, one per distance
+    KB_PROMOTION_THRESHOLD: int = 5000  # Chunks at which a partition moves to its own collection (0 = never)
     
     # CORS
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:3001"]
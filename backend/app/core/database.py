@@ -1,19 +1,72 @@
 """
 Database connection and session management
 """
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT
 
 # Database URL
 DATABASE_URL = f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-# Create engine
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
-# Create session factory
+class _CheckoutTimer:
+    """Pool mixin that reports how long checkouts wait for a connection"""
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    """QueuePool with checkout wait metrics"""
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout wait metrics"""
+
+
+POOL_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+}
+
+# The per-worker connection budget is shared by both engines; the sync engine
+# gets the larger half of an odd count
+SYNC_POOL_SIZE = max(1, (settings.DB_POOL_SIZE + 1) // 2)
+ASYNC_POOL_SIZE = max(1, settings.DB_POOL_SIZE // 2)
+SYNC_MAX_OVERFLOW = (settings.DB_MAX_OVERFLOW + 1) // 2
+ASYNC_MAX_OVERFLOW = settings.DB_MAX_OVERFLOW // 2
+
+# Create engines (sync for CRUD routes and create_all, async for routes that call providers)
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=SYNC_POOL_SIZE,
+    max_overflow=SYNC_MAX_OVERFLOW,
+    **POOL_OPTIONS
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=ASYNC_POOL_SIZE,
+    max_overflow=ASYNC_MAX_OVERFLOW,
+    **POOL_OPTIONS
+)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit, since async sessions cannot lazily refresh them
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -27,3 +80,14 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """
+    Dependency for getting an async database session
+    
+    Routes that call LLM or embedding providers should close the session (or
+    commit) before the call, so the pooled connection is returned while the
+    provider is working instead of being held for the whole request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics
+
+Metrics are aggregated in-process by prometheus_client. When running several
+uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty, writable
+directory before the workers start; each worker then writes its samples to
+memory-mapped files there and /metrics merges them across workers.
+"""
+import os
+from typing import Tuple
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+# Buckets from 5ms to 2 minutes cover DB work through slow LLM completions
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0
+)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+WORKFLOW_EXECUTION_DURATION = Histogram(
+    "workflow_execution_duration_seconds",
+    "End-to-end workflow execution latency",
+    ["workflow_id", "status"],
+    buckets=LATENCY_BUCKETS
+)
+COMPONENT_EXECUTION_DURATION = Histogram(
+    "workflow_component_duration_seconds",
+    "Workflow component execution latency",
+    ["component_type"],
+    buckets=LATENCY_BUCKETS
+)
+PROVIDER_REQUEST_DURATION = Histogram(
+    "provider_request_duration_seconds",
+    "Latency of successful provider requests",
+    ["provider", "model"],
+    buckets=LATENCY_BUCKETS
+)
+PROVIDER_REQUEST_ERRORS = Counter(
+    "provider_request_errors_total",
+    "Failed provider requests",
+    ["provider", "model", "reason"]
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by outcome; hit ratio is hit / (hit + miss)",
+    ["cache", "result"]
+)
+INGESTION_QUEUE_DEPTH = Gauge(
+    "ingestion_queue_depth",
+    "Items waiting between document ingestion stages",
+    ["stage"],
+    multiprocess_mode="livesum"
+)
+CHAT_WRITE_PENDING = Gauge(
+    "chat_write_pending_messages",
+    "Chat messages accepted but not yet committed by the write-behind writer",
+    multiprocess_mode="livesum"
+)
+CHAT_WRITE_DROPPED = Counter(
+    "chat_write_dropped_messages_total",
+    "Chat messages the write-behind writer gave up on, because they cannot be written or at shutdown"
+)
+CHAT_WRITE_FLUSH_DURATION = Histogram(
+    "chat_write_flush_duration_seconds",
+    "Latency of write-behind chat message flushes",
+    buckets=LATENCY_BUCKETS
+)
+VECTOR_INDEX_RESIDENT_BYTES = Gauge(
+    "vector_index_resident_bytes",
+    "Estimated bytes of knowledge base indexes held in Chroma's segment cache",
+    multiprocess_mode="liveall"
+)
+VECTOR_INDEX_LOADS = Counter(
+    "vector_index_loads_total",
+    "Knowledge base indexes loaded into Chroma's segment cache, including reloads"
+)
+VECTOR_INDEX_EVICTIONS = Counter(
+    "vector_index_evictions_total",
+    "Knowledge base indexes evicted from Chroma's segment cache"
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format
+
+    Returns:
+        Tuple of (payload, content_type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,73 @@
+"""
+OpenTelemetry tracing setup
+
+Spans are created through the OpenTelemetry API everywhere in the app. Until
+configure_tracing() installs an SDK tracer provider they are no-ops, so
+instrumented code costs next to nothing when tracing is disabled.
+"""
+from fastapi import FastAPI
+from opentelemetry import trace
+from app.core.config import settings
+
+# Shared tracer for manual spans in routes and services
+tracer = trace.get_tracer("intelligent-workflow-builder")
+
+
+def _build_exporter():
+    """Create the span exporter selected by TRACING_EXPORTER"""
+    exporter_name = settings.TRACING_EXPORTER.lower()
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if exporter_name == "file":
+        # One JSON span per line so the file can be replayed or grepped
+        return ConsoleSpanExporter(
+            out=open(settings.TRACING_FILE_PATH, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+
+    if exporter_name == "console":
+        return ConsoleSpanExporter()
+
+    raise ValueError(f"Unsupported tracing exporter: {settings.TRACING_EXPORTER}")
+
+
+def configure_tracing(app: FastAPI, *engines) -> None:
+    """
+    Install the tracer provider and auto-instrument FastAPI and SQLAlchemy
+
+    Args:
+        app: FastAPI application
+        engines: SQLAlchemy engines whose queries should be traced (async
+            engines are instrumented through their sync_engine)
+    """
+    if not settings.TRACING_ENABLED:
+        return
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(_build_exporter()))
+    trace.set_tracer_provider(provider)
+
+    FastAPIInstrumentor.instrument_app(
+        app,
+        tracer_provider=provider,
+        excluded_urls="health,metrics"
+    )
+    SQLAlchemyInstrumentor().instrument(
+        engines=[getattr(engine, "sync_engine", engine) for engine in engines],
+        tracer_provider=provider
+    )
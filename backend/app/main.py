@@ -1,11 +1,16 @@
 """
 Main FastAPI application
 """
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import workflows, documents, execution, chat
+from app.core.database import engine, async_engine, Base
+from app.core.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, render_metrics
+from app.core.tracing import configure_tracing
+from app.api import workflows, documents, execution, chat, admin, knowledgebases
+from app.services.chat_writer import chat_writer
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -17,6 +22,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Configure tracing (no-op unless TRACING_ENABLED)
+configure_tracing(app, engine, async_engine)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -24,13 +32,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record request count and latency per route template"""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template (e.g. /api/workflows/{workflow_id}) to bound cardinality
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_DURATION.labels(method=request.method, route=route_path).observe(
+            time.perf_counter() - start
+        )
+        HTTP_REQUESTS.labels(method=request.method, route=route_path, status=str(status_code)).inc()
+
+
 # Include routers
 app.include_router(workflows.router)
 app.include_router(documents.router)
+app.include_router(knowledgebases.router)
 app.include_router(execution.router)
 app.include_router(chat.router)
+app.include_router(admin.router)
+
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    """Write pending chat messages and close pooled database connections"""
+    await run_in_threadpool(chat_writer.close)
+    await async_engine.dispose()
+    engine.dispose()
 
 
 @app.get("/")
@@ -48,3 +88,10 @@ def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -1,6 +1,10 @@
 from app.models.workflow import Workflow, WorkflowComponent, ComponentConnection
 from app.models.document import Document
-from app.models.chat import ChatMessage
+from app.models.chat import ChatMessage, ChatSession
+from app.models.knowledgebase import KnowledgeBase, KnowledgeBaseVersion
 
-__all__ = ["Workflow", "WorkflowComponent", "ComponentConnection", "Document", "ChatMessage"]
+__all__ = [
+    "Workflow", "WorkflowComponent", "ComponentConnection", "Document",
+    "ChatMessage", "ChatSession", "KnowledgeBase", "KnowledgeBaseVersion"
+]
 
@@ -1,7 +1,7 @@
 """
 Chat database models
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -15,6 +15,35 @@ class ChatMessage(Base):
     session_id = Column(String(100), nullable=False, index=True)
     role = Column(String(20), nullable=False)  # user, assistant, system
     message = Column(Text, nullable=False)
-    metadata = Column(JSON, nullable=True)  # Store execution metadata
+    # "metadata" is reserved on declarative models, so the attribute is renamed
+    message_metadata = Column("metadata", JSON, nullable=True)  # Store execution metadata (timings, tokens)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_chat_messages_workflow_session_created", "workflow_id", "session_id", "created_at"),
+        # Keyset pagination of a session's history: (created_at, id) is unique and ordered
+        Index("ix_chat_messages_session_created_id", "session_id", "created_at", "id"),
+    )
+
+
+class ChatSession(Base):
+    """Per-session summary, maintained when messages are written"""
+    __tablename__ = "chat_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
+    session_id = Column(String(100), nullable=False)
+    message_count = Column(Integer, nullable=False, default=0)
+    # Rolling conversation summary covering messages up to (summarized_through_at, summarized_through_id)
+    summary = Column(Text, nullable=True)
+    summarized_through_at = Column(DateTime(timezone=True), nullable=True)
+    summarized_through_id = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("workflow_id", "session_id", name="uq_chat_sessions_workflow_session"),
+        # Covers session listing, so it is answered from the index alone
+        Index("ix_chat_sessions_workflow_activity", "workflow_id", "last_activity_at", "session_id"),
+    )
 
@@ -1,7 +1,8 @@
 """
 Document database models
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary, JSON
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -22,4 +23,7 @@ class Document(Base):
     
     # Metadata
     metadata_json = Column(Text, nullable=True)  # Store document metadata as JSON string
+    tags = Column(JSON, nullable=True)  # Tags given at upload, copied onto chunk metadata for filtering
+    # zlib-compressed extracted text, so re-indexing skips extraction; loaded only on access
+    extracted_text = deferred(Column(LargeBinary, nullable=True))
 
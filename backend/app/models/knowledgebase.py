@@ -0,0 +1,31 @@
+"""
+Knowledge base database models
+"""
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class KnowledgeBase(Base):
+    """Which vector store collection serves a knowledge base, and how it was indexed"""
+    __tablename__ = "knowledgebases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    knowledgebase_id = Column(String(100), nullable=False, index=True)  # Reference to knowledgebase component
+    # Collection name derived from (collection_name, knowledgebase_id), as used by callers
+    base_collection = Column(String(255), nullable=False, unique=True)
+    # Physical collection queries are routed to; replaced atomically by a re-index
+    active_collection = Column(String(255), nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    config = Column(JSON, nullable=True)  # chunk_size, embedding_provider, embedding_model
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class KnowledgeBaseVersion(Base):
+    """Content version of a knowledge base, bumped on every upload, delete, import and re-index"""
+    __tablename__ = "knowledgebase_versions"
+
+    knowledgebase_id = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -2,7 +2,7 @@
 Workflow database models
 """
 from sqlalchemy import Column, Integer, String, JSON, ForeignKey, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -14,6 +14,8 @@ class Workflow(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
+    # Bumped whenever components, their configs or connections change; positions don't count
+    graph_version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -56,3 +58,10 @@ class ComponentConnection(Base):
     source_component = relationship("WorkflowComponent", foreign_keys=[source_component_id], back_populates="source_connections")
     target_component = relationship("WorkflowComponent", foreign_keys=[target_component_id], back_populates="target_connections")
 
+
+# Loader options for reads that serialize or execute the full graph: components
+# and connections arrive in one batched SELECT each instead of per workflow
+WORKFLOW_GRAPH_OPTIONS = (
+    selectinload(Workflow.components),
+    selectinload(Workflow.connections),
+)
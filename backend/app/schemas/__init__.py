@@ -1,18 +1,24 @@
 from app.schemas.workflow import (
-    WorkflowCreate, WorkflowUpdate, WorkflowResponse,
+    WorkflowCreate, WorkflowUpdate, WorkflowResponse, WorkflowSummary,
     ComponentCreate, ComponentResponse,
     ConnectionCreate, ConnectionResponse
 )
-from app.schemas.document import DocumentUpload, DocumentResponse
+from app.schemas.document import DocumentUpload, DocumentResponse, ImportJobResponse
 from app.schemas.chat import ChatMessageCreate, ChatMessageResponse
-from app.schemas.execution import WorkflowExecute, ExecutionResponse
+from app.schemas.knowledgebase import KnowledgeBaseImportResponse, ReindexRequest, ReindexJobResponse
+from app.schemas.execution import (
+    WorkflowExecute, ExecutionResponse,
+    WorkflowBatchExecute, BatchItemResult
+)
 
 __all__ = [
-    "WorkflowCreate", "WorkflowUpdate", "WorkflowResponse",
+    "WorkflowCreate", "WorkflowUpdate", "WorkflowResponse", "WorkflowSummary",
     "ComponentCreate", "ComponentResponse",
     "ConnectionCreate", "ConnectionResponse",
-    "DocumentUpload", "DocumentResponse",
+    "DocumentUpload", "DocumentResponse", "ImportJobResponse",
     "ChatMessageCreate", "ChatMessageResponse",
-    "WorkflowExecute", "ExecutionResponse"
+    "KnowledgeBaseImportResponse", "ReindexRequest", "ReindexJobResponse",
+    "WorkflowExecute", "ExecutionResponse",
+    "WorkflowBatchExecute", "BatchItemResult"
 ]
 
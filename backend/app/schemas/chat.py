@@ -1,7 +1,7 @@
 """
 Chat Pydantic schemas
 """
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 
@@ -21,7 +21,8 @@ class ChatMessageResponse(BaseModel):
     session_id: str
     role: str
     message: str
-    metadata: Optional[Dict[str, Any]]
+    # ORM objects expose the column as message_metadata; serialized responses use metadata
+    metadata: Optional[Dict[str, Any]] = Field(None, validation_alias=AliasChoices("message_metadata", "metadata"))
     created_at: datetime
     
     class Config:
@@ -2,7 +2,7 @@
 Document Pydantic schemas
 """
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -23,7 +23,26 @@ class DocumentResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
     metadata_json: Optional[str]
+    tags: Optional[List[str]] = None
     
     class Config:
         from_attributes = True
 
+
+
+class ImportJobResponse(BaseModel):
+    """Schema for bulk import progress"""
+    id: str
+    knowledgebase_id: Optional[str]
+    tags: List[str] = []
+    status: str
+    total_files: int
+    completed_files: int
+    failed_files: int
+    chunks_stored: int
+    errors: List[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
@@ -2,7 +2,7 @@
 Execution Pydantic schemas
 """
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class WorkflowExecute(BaseModel):
@@ -19,3 +19,19 @@ class ExecutionResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+
+
+class WorkflowBatchExecute(BaseModel):
+    """Schema for executing a workflow over many queries"""
+    queries: List[str] = Field(..., min_length=1, description="User queries to process")
+    concurrency: Optional[int] = Field(None, ge=1, description="Maximum concurrent LLM executions")
+
+
+class BatchItemResult(BaseModel):
+    """Schema for one line of a batch execution NDJSON stream"""
+    index: int
+    query: str
+    success: bool
+    response: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -0,0 +1,40 @@
+"""
+Knowledge base Pydantic schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class KnowledgeBaseImportResponse(BaseModel):
+    """Schema for knowledge base import result"""
+    knowledgebase_id: str
+    collection_name: str
+    documents: int
+    chunks: int
+
+
+class ReindexRequest(BaseModel):
+    """Schema for starting a re-index; omitted settings keep their current values"""
+    collection_name: Optional[str] = None
+    chunk_size: Optional[int] = Field(None, ge=100, description="Maximum chunk length in characters")
+    embedding_provider: Optional[str] = None
+    embedding_model: Optional[str] = None
+
+
+class ReindexJobResponse(BaseModel):
+    """Schema for re-index progress"""
+    id: str
+    knowledgebase_id: str
+    collection_name: str
+    status: str
+    total_documents: int
+    processed_documents: int
+    chunks_stored: int
+    version: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
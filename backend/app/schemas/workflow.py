@@ -66,11 +66,24 @@ class WorkflowUpdate(BaseModel):
     connections: Optional[List[ConnectionCreate]] = None
 
 
+class WorkflowSummary(BaseModel):
+    """Schema for workflow listings without the component graph"""
+    id: int
+    name: str
+    description: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
 class WorkflowResponse(BaseModel):
     """Schema for workflow response"""
     id: int
     name: str
     description: Optional[str]
+    graph_version: int
     created_at: datetime
     updated_at: Optional[datetime]
     components: List[ComponentResponse] = []
@@ -0,0 +1,559 @@
+"""
+Bulk document import: many files through one shared ingestion pipeline
+
+Files are extracted and chunked by IMPORT_WORKERS threads. Their chunks are
+pooled into embedding requests of IMPORT_EMBED_BATCH_SIZE regardless of the
+file they came from, embedded by IMPORT_EMBED_WORKERS threads, and written to
+the vector store IMPORT_WRITE_BATCH_SIZE chunks at a time. A failed file does
+not stop the import; its chunks are removed and its document marked failed.
+
+Job progress is kept in process memory, so it is only visible from the
+worker that accepted the import.
+"""
+import json
+import mimetypes
+import os
+import queue
+import tarfile
+import threading
+import uuid
+import zipfile
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy import update
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion import (
+    END, PipelineCancelled, StageQueue, TextChunker, TextCompressor, start_stage
+)
+from app.services.knowledgebase_registry import content_version_bump
+from app.services.retrieval_filters import chunk_metadata
+from app.services.text_extractor import TextExtractor
+from app.services.vector_store import VectorStoreService
+
+COPY_BLOCK_SIZE = 1024 * 1024
+# Per-file errors listed on a job; the failed file count is always complete
+MAX_REPORTED_ERRORS = 50
+
+
+@dataclass
+class ImportFile:
+    """A file staged under UPLOAD_DIR for import"""
+    filename: str
+    file_path: str
+    file_type: str
+    file_size: int = 0
+    document_id: Optional[int] = None
+    uploaded_at: Optional[datetime] = None
+
+
+@dataclass
+class ImportJob:
+    """Aggregate progress of one bulk import"""
+    id: str
+    knowledgebase_id: Optional[str]
+    total_files: int
+    tags: List[str] = field(default_factory=list)  # Applied to every imported document
+    status: str = "pending"  # pending, running, completed, failed
+    completed_files: int = 0
+    failed_files: int = 0
+    chunks_stored: int = 0
+    errors: List[str] = field(default_factory=list)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+
+_jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def create_import_job(
+    knowledgebase_id: Optional[str],
+    total_files: int,
+    tags: Optional[List[str]] = None
+) -> ImportJob:
+    """Register a new import job, forgetting the oldest finished ones beyond IMPORT_JOB_HISTORY"""
+    job = ImportJob(
+        id=uuid.uuid4().hex, knowledgebase_id=knowledgebase_id, total_files=total_files, tags=tags or []
+    )
+    with _jobs_lock:
+        _jobs[job.id] = job
+        finished = [job_id for job_id, existing in _jobs.items() if existing.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - settings.IMPORT_JOB_HISTORY)]:
+            del _jobs[job_id]
+    return job
+
+
+def get_import_job(job_id: str) -> Optional[ImportJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def _skipped(name: str) -> bool:
+    """Hidden files and archiver metadata are not imported"""
+    return any(part.startswith(".") or part == "__MACOSX" for part in name.replace("\\", "/").split("/"))
+
+
+class _StagedFiles:
+    """Copies import files under UPLOAD_DIR while enforcing the import limits"""
+
+    def __init__(self):
+        self.files: List[ImportFile] = []
+        self.total_size = 0
+
+    def add(self, name: str, source: BinaryIO) -> None:
+        if len(self.files) >= settings.IMPORT_MAX_FILES:
+            raise ValueError(f"Import exceeds the maximum of {settings.IMPORT_MAX_FILES} files")
+
+        name = name.replace("\\", "/").strip("/")
+        filename = name if len(name) <= 255 else os.path.basename(name)[-255:]
+        # Archive paths only name the document; staged copies get generated names
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}{os.path.splitext(name)[1]}")
+        staged = ImportFile(
+            filename=filename,
+            file_path=file_path,
+            file_type=mimetypes.guess_type(name)[0] or "application/octet-stream"
+        )
+        self.files.append(staged)
+
+        with open(file_path, "wb") as target:
+            while True:
+                block = source.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                staged.file_size += len(block)
+                if staged.file_size > settings.MAX_UPLOAD_SIZE:
+                    raise ValueError(
+                        f"{filename} exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE} bytes"
+                    )
+                if self.total_size + staged.file_size > settings.IMPORT_MAX_TOTAL_SIZE:
+                    raise ValueError(f"Import exceeds maximum total size of {settings.IMPORT_MAX_TOTAL_SIZE} bytes")
+                target.write(block)
+        self.total_size += staged.file_size
+
+
+def discard_files(files: Iterable[ImportFile]) -> None:
+    """Delete staged copies of files that will not be imported"""
+    for staged in files:
+        try:
+            os.remove(staged.file_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error deleting file: {str(e)}")
+
+
+def unpack_archive(fileobj: BinaryIO) -> List[ImportFile]:
+    """
+    Stage the regular files of a zip or tar (optionally compressed) archive
+
+    Member paths are never used as filesystem paths, so archives cannot write
+    outside UPLOAD_DIR; links and special files are ignored.
+
+    Args:
+        fileobj: Seekable archive file
+
+    Returns:
+        Staged files in archive order
+
+    Raises:
+        ValueError: If the archive is invalid or exceeds the import limits
+    """
+    staged = _StagedFiles()
+    try:
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or _skipped(info.filename):
+                        continue
+                    with archive.open(info) as source:
+                        staged.add(info.filename, source)
+        else:
+            fileobj.seek(0)
+            try:
+                archive = tarfile.open(fileobj=fileobj, mode="r:*")
+            except tarfile.TarError:
+                raise ValueError("Unsupported archive format, expected zip or tar")
+            with archive:
+                for member in archive:
+                    if not member.isfile() or _skipped(member.name):
+                        continue
+                    with archive.extractfile(member) as source:
+                        staged.add(member.name, source)
+    except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, RuntimeError) as e:
+        discard_files(staged.files)
+        raise ValueError(f"Invalid archive: {str(e)}")
+    except BaseException:
+        discard_files(staged.files)
+        raise
+    return staged.files
+
+
+def collect_directory(directory: str) -> List[ImportFile]:
+    """
+    Stage the regular files below a directory under IMPORT_ROOT
+
+    Args:
+        directory: Path relative to IMPORT_ROOT
+
+    Returns:
+        Staged files in path order
+
+    Raises:
+        PermissionError: If directory import is disabled or the path leaves IMPORT_ROOT
+        ValueError: If the directory does not exist or exceeds the import limits
+    """
+    if not settings.IMPORT_ROOT:
+        raise PermissionError("Directory import is disabled")
+
+    root = os.path.realpath(settings.IMPORT_ROOT)
+    path = os.path.realpath(os.path.join(root, directory))
+    if os.path.commonpath([root, path]) != root:
+        raise PermissionError("Directory is outside the import root")
+    if not os.path.isdir(path):
+        raise ValueError(f"Directory not found: {directory}")
+
+    staged = _StagedFiles()
+    try:
+        for current, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                relative = os.path.relpath(os.path.join(current, name), path)
+                source_path = os.path.realpath(os.path.join(current, name))
+                # Symlinks may point anywhere; only follow those that stay under the root
+                if _skipped(relative) or os.path.commonpath([root, source_path]) != root:
+                    continue
+                if not os.path.isfile(source_path):
+                    continue
+                with open(source_path, "rb") as source:
+                    staged.add(relative, source)
+    except BaseException:
+        discard_files(staged.files)
+        raise
+    return staged.files
+
+
+class _FileProgress:
+    """Per-file chunk accounting that rolls up into the job counters"""
+
+    def __init__(self, job: ImportJob, files: List[ImportFile]):
+        self.job = job
+        self.files = files
+        self.expected: List[Optional[int]] = [None] * len(files)
+        self.stored: List[int] = [0] * len(files)
+        self.errors: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def extracted(self, index: int, count: int) -> None:
+        with self._lock:
+            if not count:
+                self._fail(index, "No text content extracted")
+                return
+            self.expected[index] = count
+            self._settle(index)
+
+    def add_stored(self, counts: Dict[int, int]) -> None:
+        with self._lock:
+            for index, count in counts.items():
+                self.stored[index] += count
+                self.job.chunks_stored += count
+                self._settle(index)
+
+    def fail(self, indices: Iterable[int], error: Exception) -> None:
+        with self._lock:
+            for index in indices:
+                self._fail(index, str(error))
+
+    def is_failed(self, index: int) -> bool:
+        return index in self.errors
+
+    def is_complete(self, index: int) -> bool:
+        return index not in self.errors and self.expected[index] == self.stored[index]
+
+    def _fail(self, index: int, message: str) -> None:
+        if index in self.errors or self.is_complete(index):
+            return
+        self.errors[index] = message
+        self.job.failed_files += 1
+        if len(self.job.errors) < MAX_REPORTED_ERRORS:
+            self.job.errors.append(f"{self.files[index].filename}: {message}")
+
+    def _settle(self, index: int) -> None:
+        if self.is_complete(index):
+            self.job.completed_files += 1
+
+
+class BulkImportService:
+    """Service for ingesting many documents with shared batching"""
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_store: Optional[VectorStoreService] = None
+    ):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_store = vector_store or VectorStoreService()
+
+    def run(
+        self,
+        job: ImportJob,
+        files: List[ImportFile],
+        embedding_provider: str = "openai",
+        embedding_model: Optional[str] = None
+    ) -> None:
+        """
+        Ingest staged files whose Document rows exist, then record each outcome
+
+        Args:
+            job: Job to report progress on
+            files: Staged files with document_id set
+            embedding_provider: Embedding provider (openai or gemini)
+            embedding_model: Embedding model (optional, uses provider default)
+        """
+        job.status = "running"
+        knowledgebase_id = job.knowledgebase_id or "default"
+        index_config = self.vector_store.index_config(knowledgebase_id, knowledgebase_id)
+        embedding_provider = index_config.get("embedding_provider", embedding_provider)
+        embedding_model = index_config.get("embedding_model", embedding_model)
+        chunk_size = index_config.get("chunk_size")
+        progress = _FileProgress(job, files)
+        cancelled = threading.Event()
+        failures: List[BaseException] = []
+        extract_workers = max(1, min(settings.IMPORT_WORKERS, len(files)))
+        embed_workers = max(1, settings.IMPORT_EMBED_WORKERS)
+
+        pending_files: queue.SimpleQueue = queue.SimpleQueue()
+        for index in range(len(files)):
+            pending_files.put(index)
+        chunks = StageQueue("import_extract", cancelled, settings.INGESTION_QUEUE_SIZE * extract_workers)
+        batches = StageQueue("import_batch", cancelled, settings.INGESTION_QUEUE_SIZE * embed_workers)
+        embedded = StageQueue("import_embed", cancelled, settings.INGESTION_QUEUE_SIZE * embed_workers)
+
+        def extract() -> None:
+            while True:
+                try:
+                    index = pending_files.get_nowait()
+                except queue.Empty:
+                    break
+                staged = files[index]
+                compressor = TextCompressor()
+                chunker = TextChunker(chunk_size)
+                count = 0
+                try:
+                    for page in TextExtractor.iter_pages(staged.file_path, staged.file_type):
+                        compressor.add(page)
+                        texts = chunker.add(page)
+                        if texts:
+                            chunks.put((index, count, texts))
+                            count += len(texts)
+                    texts = chunker.finish()
+                    if texts:
+                        chunks.put((index, count, texts))
+                        count += len(texts)
+                except PipelineCancelled:
+                    raise
+                except Exception as e:
+                    progress.fail([index], e)
+                    continue
+                if count:
+                    self._store_text(staged.document_id, compressor.finish())
+                progress.extracted(index, count)
+            chunks.put(END)
+
+        def batch() -> None:
+            # Pool chunks from all files into full-size embedding requests
+            records = []
+            remaining = extract_workers
+            while remaining:
+                item = chunks.get()
+                if item is END:
+                    remaining -= 1
+                    continue
+                index, start, texts = item
+                if progress.is_failed(index):
+                    continue
+                for offset, text in enumerate(texts):
+                    records.append((index, start + offset, text))
+                    if len(records) == settings.IMPORT_EMBED_BATCH_SIZE:
+                        batches.put(records)
+                        records = []
+            if records:
+                batches.put(records)
+            for _ in range(embed_workers):
+                batches.put(END)
+
+        def generate(records: List[tuple]) -> np.ndarray:
+            return self.embedding_service.generate_embeddings(
+                [text for _, _, text in records],
+                provider=embedding_provider,
+                model=embedding_model,
+                queue_key=job.id
+            )
+
+        def embed() -> None:
+            while True:
+                records = batches.get()
+                if records is END:
+                    break
+                try:
+                    embedded.put((records, generate(records)))
+                    continue
+                except PipelineCancelled:
+                    raise
+                except Exception as e:
+                    error = e
+
+                by_file: Dict[int, List[tuple]] = {}
+                for record in records:
+                    by_file.setdefault(record[0], []).append(record)
+                if len(by_file) == 1:
+                    progress.fail(by_file, error)
+                    continue
+                # Retry file by file so one bad input does not fail the files pooled with it
+                for index, file_records in by_file.items():
+                    try:
+                        embeddings = generate(file_records)
+                    except Exception as e:
+                        progress.fail([index], e)
+                        continue
+                    embedded.put((file_records, embeddings))
+            embedded.put(END)
+
+        threads = [start_stage(f"import-extract-{i}", extract, cancelled, failures) for i in range(extract_workers)]
+        threads.append(start_stage("import-batch", batch, cancelled, failures))
+        threads.extend(start_stage(f"import-embed-{i}", embed, cancelled, failures) for i in range(embed_workers))
+
+        write_records: List[tuple] = []
+        write_embeddings: List[np.ndarray] = []
+
+        def write() -> None:
+            if not write_records:
+                return
+            try:
+                self.vector_store.add_documents(
+                    collection_name=knowledgebase_id,
+                    knowledgebase_id=knowledgebase_id,
+                    texts=[text for _, _, text in write_records],
+                    embeddings=np.concatenate(write_embeddings),
+                    metadatas=[
+                        {
+                            **chunk_metadata(
+                                files[index].document_id, files[index].filename, files[index].uploaded_at, job.tags
+                            ),
+                            "chunk_index": chunk_index
+                        }
+                        for index, chunk_index, _ in write_records
+                    ]
+                )
+            except Exception as e:
+                progress.fail({index for index, _, _ in write_records}, e)
+            else:
+                progress.add_stored(Counter(index for index, _, _ in write_records))
+            write_records.clear()
+            write_embeddings.clear()
+
+        try:
+            remaining = embed_workers
+            while remaining:
+                item = embedded.get()
+                if item is END:
+                    remaining -= 1
+                    continue
+                records, embeddings = item
+                write_records.extend(records)
+                write_embeddings.append(embeddings)
+                if len(write_records) >= settings.IMPORT_WRITE_BATCH_SIZE:
+                    write()
+            write()
+        except BaseException as e:
+            cancelled.set()
+            if not isinstance(e, PipelineCancelled):
+                failures.insert(0, e)
+        finally:
+            for thread in threads:
+                thread.join()
+            for stage_queue in (chunks, batches, embedded):
+                stage_queue.discard()
+
+        if failures:
+            progress.fail(
+                [index for index in range(len(files)) if not progress.is_complete(index)],
+                failures[0]
+            )
+
+        self._remove_failed_chunks(knowledgebase_id, progress)
+        self._record_outcomes(job, files, progress, embedding_provider)
+        job.status = "failed" if failures else "completed"
+        job.finished_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _store_text(document_id: int, extracted_text: bytes) -> None:
+        """Persist a file's compressed text as soon as it is extracted, keeping memory bounded"""
+        try:
+            with SessionLocal() as db:
+                db.execute(update(Document).where(Document.id == document_id).values(extracted_text=extracted_text))
+                db.commit()
+        except Exception as e:
+            print(f"Error storing extracted text of document {document_id}: {str(e)}")
+
+    def _remove_failed_chunks(self, knowledgebase_id: str, progress: _FileProgress) -> None:
+        """Delete chunks already written for files that later failed"""
+        document_ids = [
+            progress.files[index].document_id
+            for index in progress.errors
+            if progress.stored[index]
+        ]
+        if not document_ids:
+            return
+        try:
+            self.vector_store.delete_documents(
+                collection_name=knowledgebase_id,
+                knowledgebase_id=knowledgebase_id,
+                where={"document_id": {"$in": document_ids}}
+            )
+            progress.job.chunks_stored -= sum(progress.stored[index] for index in progress.errors)
+        except Exception as e:
+            print(f"Error removing chunks of failed imports: {str(e)}")
+
+    def _record_outcomes(
+        self,
+        job: ImportJob,
+        files: List[ImportFile],
+        progress: _FileProgress,
+        embedding_provider: str
+    ) -> None:
+        """Set processed/metadata_json on every imported document in one statement"""
+        rows = []
+        for index, staged in enumerate(files):
+            if progress.is_failed(index):
+                rows.append({
+                    "id": staged.document_id,
+                    "processed": "failed",
+                    "metadata_json": json.dumps({"error": progress.errors[index], "import_job": job.id})
+                })
+            else:
+                rows.append({
+                    "id": staged.document_id,
+                    "processed": "completed",
+                    "metadata_json": json.dumps({
+                        "chunks": progress.expected[index],
+                        "embedding_provider": embedding_provider,
+                        "import_job": job.id
+                    })
+                })
+
+        try:
+            with SessionLocal() as db:
+                db.execute(update(Document), rows)
+                db.execute(content_version_bump(job.knowledgebase_id or "default"))
+                db.commit()
+        except Exception as e:
+            print(f"Error recording outcome of import {job.id}: {str(e)}")
+            job.errors.append(f"Recording document status failed: {str(e)}")
@@ -0,0 +1,252 @@
+"""
+Write-behind persistence for chat messages
+
+Requests hand their messages to a background writer and respond without
+waiting for a commit. The writer groups messages from many requests into
+multi-row INSERTs (plus one chat_sessions upsert per flush) and writes at
+least every CHAT_WRITE_FLUSH_INTERVAL seconds. IDs are reserved from the
+chat_messages sequence in blocks and created_at is set when the message is
+accepted, so responses carry their final values.
+
+Pending messages are only visible to this process; pending_messages() lets
+readers in the same process (conversation memory, history) see them before
+they are committed.
+
+A batch that keeps failing is split in halves until the messages that fail
+on their own (e.g. a foreign key violation or a NUL byte) are isolated;
+those are logged and dropped so they cannot hold up the queue.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import func, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import CHAT_WRITE_DROPPED, CHAT_WRITE_FLUSH_DURATION, CHAT_WRITE_PENDING
+from app.models.chat import ChatMessage, ChatSession
+
+ID_SEQUENCE = "chat_messages_id_seq"
+# Delay before retrying a failed flush; messages stay queued meanwhile
+RETRY_DELAY = 1.0
+# Errors caused by the rows being written rather than by the database
+# (psycopg2 rejects strings containing NUL bytes with a ValueError)
+ROW_ERRORS = (IntegrityError, DataError, ValueError)
+
+
+class ChatMessageWriter:
+    """Background writer that batches chat message inserts"""
+
+    def __init__(self):
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._condition = threading.Condition()
+        self._ids: Deque[int] = deque()
+        self._id_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Messages taken off the queue by the flush in progress
+        self._in_flight: List[Dict[str, Any]] = []
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="chat-message-writer", daemon=True)
+            self._thread.start()
+
+    def _allocate_ids(self, count: int) -> List[int]:
+        """Take IDs from the reserved block, reserving another block when it runs out"""
+        with self._id_lock:
+            while len(self._ids) < count:
+                with SessionLocal() as db:
+                    self._ids.extend(db.execute(
+                        text("SELECT nextval(:sequence) FROM generate_series(1, :count)"),
+                        {"sequence": ID_SEQUENCE, "count": max(count, settings.CHAT_ID_BLOCK_SIZE)}
+                    ).scalars().all())
+            return [self._ids.popleft() for _ in range(count)]
+
+    def submit(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Accept messages for writing
+
+        Blocks only when CHAT_WRITE_MAX_PENDING messages are already waiting,
+        or briefly when a new block of IDs has to be reserved.
+
+        Args:
+            messages: Message rows (workflow_id, session_id, role, message,
+                optional message_metadata and created_at), in order
+
+        Returns:
+            The rows with id and created_at assigned
+        """
+        ids = self._allocate_ids(len(messages))
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"message_metadata": None, "created_at": now, **message, "id": message_id}
+            for message, message_id in zip(messages, ids)
+        ]
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Chat message writer is closed")
+            self._start()
+            while len(self._pending) >= settings.CHAT_WRITE_MAX_PENDING:
+                self._condition.wait()
+            self._pending.extend(rows)
+            CHAT_WRITE_PENDING.inc(len(rows))
+            self._condition.notify_all()
+        return rows
+
+    def pending_messages(self, session_id: str, workflow_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Accepted but uncommitted messages of a session, oldest first
+
+        Args:
+            session_id: Chat session ID
+            workflow_id: Optional workflow ID to restrict to
+        """
+        with self._condition:
+            return [
+                row for row in (*self._in_flight, *self._pending)
+                if row["session_id"] == session_id and workflow_id in (None, row["workflow_id"])
+            ]
+
+    def pending_sessions(self, workflow_id: int) -> Dict[str, datetime]:
+        """
+        Sessions of a workflow with accepted but uncommitted messages
+
+        Returns:
+            Latest pending created_at per session ID
+        """
+        with self._condition:
+            sessions: Dict[str, datetime] = {}
+            for row in (*self._in_flight, *self._pending):
+                if row["workflow_id"] == workflow_id:
+                    latest = sessions.get(row["session_id"])
+                    if latest is None or row["created_at"] > latest:
+                        sessions[row["session_id"]] = row["created_at"]
+            return sessions
+
+    def _run(self) -> None:
+        # Consecutive failed flushes of the batch at the head of the queue
+        failures = 0
+        while True:
+            with self._condition:
+                # Wait for a first message, then up to the flush interval for a fuller batch
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                deadline = time.monotonic() + settings.CHAT_WRITE_FLUSH_INTERVAL
+                while not self._closed and len(self._pending) < settings.CHAT_WRITE_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                if not self._pending:
+                    return
+
+                batch_size = min(len(self._pending), settings.CHAT_WRITE_BATCH_SIZE)
+                self._in_flight = [self._pending.popleft() for _ in range(batch_size)]
+
+            if failures < settings.CHAT_WRITE_MAX_ATTEMPTS:
+                try:
+                    self._flush(self._in_flight)
+                    unwritten = []
+                except Exception as e:
+                    print(f"Error writing chat messages, retrying: {str(e)}")
+                    unwritten = self._in_flight
+            else:
+                unwritten = self._flush_isolating(self._in_flight)
+
+            with self._condition:
+                CHAT_WRITE_PENDING.dec(len(self._in_flight) - len(unwritten))
+                self._in_flight = []
+                if unwritten and self._closed:
+                    dropped = len(unwritten) + len(self._pending)
+                    print(f"Error writing chat messages at shutdown, {dropped} dropped")
+                    CHAT_WRITE_PENDING.dec(dropped)
+                    CHAT_WRITE_DROPPED.inc(dropped)
+                    self._pending.clear()
+                    return
+                self._pending.extendleft(reversed(unwritten))
+                self._condition.notify_all()
+
+            if unwritten:
+                failures += 1
+                time.sleep(RETRY_DELAY)
+            else:
+                failures = 0
+
+    def _flush_isolating(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Write a batch that keeps failing by splitting it, dropping messages that fail on their own
+
+        Args:
+            rows: Message rows, in order
+
+        Returns:
+            Rows left unwritten because of an error not caused by the rows, in order
+        """
+        parts = [rows]
+        while parts:
+            part = parts.pop()
+            try:
+                self._flush(part)
+            except ROW_ERRORS as e:
+                if len(part) == 1:
+                    print(f"Dropping chat message {part[0]['id']} of session {part[0]['session_id']}: {str(e)}")
+                    CHAT_WRITE_DROPPED.inc()
+                    continue
+                # First half on top, so rows are still written in order
+                middle = len(part) // 2
+                parts.append(part[middle:])
+                parts.append(part[:middle])
+            except Exception as e:
+                print(f"Error writing chat messages, retrying: {str(e)}")
+                return [row for unwritten in (part, *reversed(parts)) for row in unwritten]
+        return []
+
+    def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        """Write one batch of messages and their session summaries in a single transaction"""
+        sessions: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            if row["workflow_id"] is None:
+                continue
+            key = (row["workflow_id"], row["session_id"])
+            summary = sessions.setdefault(key, {
+                "workflow_id": row["workflow_id"],
+                "session_id": row["session_id"],
+                "message_count": 0,
+                "last_activity_at": row["created_at"]
+            })
+            summary["message_count"] += 1
+            summary["last_activity_at"] = max(summary["last_activity_at"], row["created_at"])
+
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            db.execute(insert(ChatMessage), rows)
+            if sessions:
+                statement = pg_insert(ChatSession).values(list(sessions.values()))
+                db.execute(statement.on_conflict_do_update(
+                    index_elements=[ChatSession.workflow_id, ChatSession.session_id],
+                    set_={
+                        "message_count": ChatSession.message_count + statement.excluded.message_count,
+                        "last_activity_at": func.greatest(
+                            ChatSession.last_activity_at, statement.excluded.last_activity_at
+                        )
+                    }
+                ))
+            db.commit()
+        CHAT_WRITE_FLUSH_DURATION.observe(time.perf_counter() - start)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write everything still pending and stop the writer thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+chat_writer = ChatMessageWriter()
@@ -0,0 +1,283 @@
+"""
+Conversation memory: recent chat turns plus a rolling summary per session
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Query, Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.tracing import tracer
+from app.models.chat import ChatMessage, ChatSession
+from app.services.chat_writer import chat_writer
+from app.services.instrumentation import record_cache
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import estimate_tokens
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the new messages into the existing summary. Keep facts, names, preferences, "
+    "decisions and open questions; drop pleasantries. Reply with the updated summary only."
+)
+
+
+class Turn(NamedTuple):
+    """A chat message as seen by conversation memory"""
+    id: int
+    role: str
+    message: str
+    created_at: datetime
+
+
+@dataclass(frozen=True)
+class SummaryState:
+    """
+    Rolling summary of a session and the last message it covers
+
+    Messages are ordered by (created_at, id): IDs are reserved in blocks per
+    process by the write-behind writer, so they alone are not chronological.
+    """
+    summary: Optional[str] = None
+    summarized_through_at: Optional[datetime] = None
+    summarized_through_id: int = 0
+
+    def covers(self, created_at: datetime, message_id: int) -> bool:
+        if self.summarized_through_at is None:
+            return False
+        return (created_at, message_id) <= (self.summarized_through_at, self.summarized_through_id)
+
+
+# Summary state by (workflow ID, session ID); the database row stays authoritative
+_summary_cache: "OrderedDict[Tuple[int, str], SummaryState]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+
+def _cache_get(key: Tuple[int, str]) -> Optional[SummaryState]:
+    with _summary_cache_lock:
+        state = _summary_cache.get(key)
+        if state is not None:
+            _summary_cache.move_to_end(key)
+        return state
+
+
+def _cache_put(key: Tuple[int, str], state: Optional[SummaryState]) -> None:
+    with _summary_cache_lock:
+        if state is None:
+            _summary_cache.pop(key, None)
+            return
+        _summary_cache[key] = state
+        _summary_cache.move_to_end(key)
+        while len(_summary_cache) > settings.MEMORY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+
+
+class ConversationMemory:
+    """Service that fits a session's history into a prompt token budget"""
+
+    def __init__(self, llm_service: Optional[LLMService] = None):
+        self.llm_service = llm_service or LLMService()
+
+    def load(
+        self,
+        workflow_id: int,
+        session_id: str,
+        token_budget: Optional[int] = None,
+        max_messages: Optional[int] = None,
+        summary_provider: str = "openai",
+        summary_model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Load conversation memory for the next turn
+
+        Only messages newer than the rolling summary are read. When more than
+        max_messages are, the older ones are folded into the summary first,
+        so no turn is skipped. When the rest no longer fit the budget, the
+        oldest are folded into the summary so that the recent turns use at
+        most half of it; the summary is therefore rewritten once every few
+        turns rather than on every message.
+
+        Args:
+            workflow_id: Workflow ID
+            session_id: Chat session ID
+            token_budget: Tokens for summary plus history (defaults to MEMORY_TOKEN_BUDGET)
+            max_messages: Recent messages to load (defaults to MEMORY_MAX_MESSAGES)
+            summary_provider: LLM provider used for summarization
+            summary_model: LLM model used for summarization (optional)
+
+        Returns:
+            Dictionary with history (list of {role, content}, oldest first) and summary
+        """
+        budget = token_budget or settings.MEMORY_TOKEN_BUDGET
+        limit = max_messages or settings.MEMORY_MAX_MESSAGES
+        key = (workflow_id, session_id)
+
+        with SessionLocal() as db:
+            state = _cache_get(key)
+            record_cache("memory_summary", state is not None)
+            if state is None:
+                row = db.query(
+                    ChatSession.summary, ChatSession.summarized_through_at, ChatSession.summarized_through_id
+                ).filter(
+                    ChatSession.workflow_id == workflow_id,
+                    ChatSession.session_id == session_id
+                ).first()
+                state = SummaryState(*row) if row else SummaryState()
+                _cache_put(key, state)
+
+            # One more than the limit tells whether older turns are waiting to be folded
+            messages = [Turn(*message) for message in self._unsummarized(db, key, state).order_by(
+                ChatMessage.created_at.desc(), ChatMessage.id.desc()
+            ).limit(limit + 1)]
+
+        # Add turns this process accepted but the write-behind writer has not written yet
+        pending = [
+            Turn(row["id"], row["role"], row["message"], row["created_at"])
+            for row in chat_writer.pending_messages(session_id, workflow_id)
+        ]
+        messages = self._merge(messages, pending, state)
+
+        if len(messages) > limit:
+            oldest_kept = messages[-limit]
+            state = self._fold_backlog(
+                key, state, pending, (oldest_kept.created_at, oldest_kept.id), limit, summary_provider, summary_model
+            )
+            messages = messages[-limit:]
+
+        available = max(0, budget - (estimate_tokens(state.summary) if state.summary else 0))
+        tokens = [estimate_tokens(message.message) for message in messages]
+
+        if sum(tokens) > available:
+            kept, kept_tokens = 0, 0
+            for count in reversed(tokens):
+                if kept_tokens + count > available // 2:
+                    break
+                kept += 1
+                kept_tokens += count
+
+            folded = messages[:len(messages) - kept]
+            messages = messages[len(messages) - kept:]
+            state = self._fold(key, state, folded, summary_provider, summary_model)
+
+        return {
+            "history": [{"role": message.role, "content": message.message} for message in messages],
+            "summary": state.summary
+        }
+
+    @staticmethod
+    def _unsummarized(db: Session, key: Tuple[int, str], state: SummaryState) -> Query:
+        """Query of a session's stored messages newer than its summary"""
+        workflow_id, session_id = key
+        query = db.query(ChatMessage.id, ChatMessage.role, ChatMessage.message, ChatMessage.created_at).filter(
+            ChatMessage.session_id == session_id,
+            ChatMessage.workflow_id == workflow_id
+        )
+        if state.summarized_through_at is not None:
+            query = query.filter(
+                tuple_(ChatMessage.created_at, ChatMessage.id)
+                > tuple_(state.summarized_through_at, state.summarized_through_id)
+            )
+        return query
+
+    @staticmethod
+    def _merge(stored: List[Turn], pending: List[Turn], state: SummaryState) -> List[Turn]:
+        """Stored and pending messages not covered by the summary, oldest first"""
+        loaded = {message.id for message in stored}
+        messages = stored + [
+            message for message in pending
+            if message.id not in loaded and not state.covers(message.created_at, message.id)
+        ]
+        messages.sort(key=lambda message: (message.created_at, message.id))
+        return messages
+
+    def _fold_backlog(
+        self,
+        key: Tuple[int, str],
+        state: SummaryState,
+        pending: List[Turn],
+        before: Tuple[datetime, int],
+        page_size: int,
+        provider: str,
+        model: Optional[str]
+    ) -> SummaryState:
+        """
+        Fold every unsummarized message older than `before` into the summary
+
+        Messages are folded oldest first, page_size at a time so each
+        summarization prompt stays bounded. Stops early if summarization
+        fails; the messages are then folded on a later turn.
+        """
+        pending = [message for message in pending if (message.created_at, message.id) < before]
+        while True:
+            with SessionLocal() as db:
+                stored = [Turn(*message) for message in self._unsummarized(db, key, state).filter(
+                    tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(*before)
+                ).order_by(
+                    ChatMessage.created_at, ChatMessage.id
+                ).limit(page_size)]
+            page = self._merge(stored, pending, state)[:page_size]
+            if not page:
+                return state
+
+            folded = self._fold(key, state, page, provider, model)
+            if folded is state:
+                return state
+            state = folded
+
+    def _fold(
+        self,
+        key: Tuple[int, str],
+        state: SummaryState,
+        messages: List[Turn],
+        provider: str,
+        model: Optional[str]
+    ) -> SummaryState:
+        """
+        Merge messages into the rolling summary and persist it
+
+        If summarization fails, the old summary is kept and the messages are
+        simply dropped from this turn's prompt.
+        """
+        transcript = "\n".join(f"{message.role}: {message.message}" for message in messages)
+        with tracer.start_as_current_span("memory.summarize") as span:
+            span.set_attribute("memory.folded_messages", len(messages))
+            try:
+                summary = self.llm_service.generate_response(
+                    query=f"Existing summary:\n{state.summary or '(none)'}\n\nNew messages:\n{transcript}",
+                    provider=provider,
+                    system_prompt=SUMMARY_SYSTEM_PROMPT,
+                    model=model,
+                    temperature=0.2,
+                    max_tokens=settings.MEMORY_SUMMARY_MAX_TOKENS
+                )
+            except Exception as e:
+                print(f"Conversation summarization failed: {str(e)}")
+                return state
+
+        new_state = SummaryState(summary, messages[-1].created_at, messages[-1].id)
+        workflow_id, session_id = key
+        values = {
+            "summary": summary,
+            "summarized_through_at": new_state.summarized_through_at,
+            "summarized_through_id": new_state.summarized_through_id
+        }
+        with SessionLocal() as db:
+            # The session row may not exist yet while its messages wait in the
+            # write-behind queue; the writer's upsert adds their count later
+            statement = pg_insert(ChatSession).values(
+                workflow_id=workflow_id, session_id=session_id, message_count=0, **values
+            )
+            # Only advance from the state this summary was built on; another
+            # worker may have summarized the same messages concurrently
+            result = db.execute(statement.on_conflict_do_update(
+                index_elements=[ChatSession.workflow_id, ChatSession.session_id],
+                set_=values,
+                where=ChatSession.summarized_through_id == state.summarized_through_id
+            ))
+            db.commit()
+
+        _cache_put(key, new_state if result.rowcount else None)
+        return new_state
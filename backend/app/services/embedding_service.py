@@ -1,10 +1,42 @@
 """
 Embedding generation service
+
+Embeddings are returned as contiguous float32 NumPy matrices, one row per
+input text. OpenAI vectors are requested base64-encoded and decoded straight
+into the matrix, so no per-element Python floats are created on the way in.
 """
-from typing import List, Optional
+import base64
+from typing import Any, Dict, List, Optional
+import numpy as np
 import openai
 from google.generativeai import configure, embed_content
 from app.core.config import settings
+from app.services.provider_resilience import call_with_retries
+from app.services.rate_limiter import get_rate_limiter, estimate_tokens
+from app.services.instrumentation import record_tokens
+from app.core.tracing import tracer
+
+# Wire format of base64-encoded OpenAI embeddings: little-endian float32
+BASE64_EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def decode_base64_embeddings(data: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Decode base64 embedding items into one (n, dim) float32 matrix
+
+    Args:
+        data: The "data" items of an embeddings response, in any order
+
+    Returns:
+        Matrix whose row i is the embedding with index i
+    """
+    matrix = None
+    for item in data:
+        vector = np.frombuffer(base64.b64decode(item["embedding"]), dtype=BASE64_EMBEDDING_DTYPE)
+        if matrix is None:
+            matrix = np.empty((len(data), vector.size), dtype=np.float32)
+        matrix[item["index"]] = vector
+    return matrix if matrix is not None else np.empty((0, 0), dtype=np.float32)
 
 
 class EmbeddingService:
@@ -12,58 +44,128 @@ class EmbeddingService:
     
     def __init__(self):
         openai.api_key = settings.OPENAI_API_KEY
-        if settings.GEMINI_API_KEY:
+        openai.max_retries = 0
+        if settings.OPENAI_BASE_URL:
+            openai.base_url = settings.OPENAI_BASE_URL
+        if settings.GEMINI_API_KEY and settings.GEMINI_API_ENDPOINT:
+            configure(
+                api_key=settings.GEMINI_API_KEY,
+                transport="rest",
+                client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT}
+            )
+        elif settings.GEMINI_API_KEY:
             configure(api_key=settings.GEMINI_API_KEY)
     
-    def generate_openai_embeddings(self, texts: List[str], model: str = "text-embedding-ada-002") -> List[List[float]]:
+    def generate_openai_embeddings(
+        self,
+        texts: List[str],
+        model: str = "text-embedding-ada-002",
+        queue_key: Optional[str] = None
+    ) -> np.ndarray:
         """
         Generate embeddings using OpenAI
         
+        The response body is read directly instead of through the SDK models,
+        which would expand every vector into a list of Python floats.
+        
         Args:
             texts: List of text strings to embed
             model: OpenAI embedding model name
+            queue_key: Fairness key for the rate limiter queue
             
         Returns:
-            List of embedding vectors
+            float32 matrix with one embedding per row
         """
         try:
-            response = openai.embeddings.create(
+            limiter = get_rate_limiter("openai", model)
+            estimated_tokens = sum(estimate_tokens(text) for text in texts)
+            
+            def send():
+                try:
+                    raw_response = openai.embeddings.with_raw_response.create(
+                        model=model,
+                        input=texts,
+                        encoding_format="base64",
+                        timeout=settings.LLM_REQUEST_TIMEOUT
+                    )
+                except Exception as e:
+                    limiter.observe_error(e)
+                    raise
+                
+                limiter.update_from_headers(raw_response.headers)
+                body = raw_response.http_response.json()
+                usage = body.get("usage")
+                limiter.settle(estimated_tokens, usage.get("total_tokens") if usage else None)
+                if usage:
+                    record_tokens(prompt_tokens=usage.get("prompt_tokens", 0))
+                return body
+            
+            response = call_with_retries(
+                send,
+                provider="openai",
                 model=model,
-                input=texts
+                acquire=lambda: limiter.acquire(estimated_tokens, queue_key)
             )
-            return [item.embedding for item in response.data]
+            return decode_base64_embeddings(response["data"])
         except Exception as e:
             raise Exception(f"Error generating OpenAI embeddings: {str(e)}")
     
-    def generate_gemini_embeddings(self, texts: List[str], model: str = "models/embedding-001") -> List[List[float]]:
+    def generate_gemini_embeddings(
+        self,
+        texts: List[str],
+        model: str = "models/embedding-001",
+        queue_key: Optional[str] = None
+    ) -> np.ndarray:
         """
         Generate embeddings using Google Gemini
         
         Args:
             texts: List of text strings to embed
             model: Gemini embedding model name
+            queue_key: Fairness key for the rate limiter queue
             
         Returns:
-            List of embedding vectors
+            float32 matrix with one embedding per row
         """
         try:
             if not settings.GEMINI_API_KEY:
                 raise ValueError("Gemini API key not configured")
             
-            embeddings = []
-            for text in texts:
-                result = embed_content(
+            limiter = get_rate_limiter("gemini", model)
+            embeddings = None
+            for i, text in enumerate(texts):
+                def send(text=text):
+                    try:
+                        return embed_content(
+                            model=model,
+                            content=text,
+                            task_type="retrieval_document"
+                        )
+                    except Exception as e:
+                        limiter.observe_error(e)
+                        raise
+                
+                result = call_with_retries(
+                    send,
+                    provider="gemini",
                     model=model,
-                    content=text,
-                    task_type="retrieval_document"
+                    acquire=lambda: limiter.acquire(estimate_tokens(text), queue_key)
                 )
-                embeddings.append(result["embedding"])
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), len(result["embedding"])), dtype=np.float32)
+                embeddings[i] = result["embedding"]
             
-            return embeddings
+            return embeddings if embeddings is not None else np.empty((0, 0), dtype=np.float32)
         except Exception as e:
             raise Exception(f"Error generating Gemini embeddings: {str(e)}")
     
-    def generate_embeddings(self, texts: List[str], provider: str = "openai", model: Optional[str] = None) -> List[List[float]]:
+    def generate_embeddings(
+        self,
+        texts: List[str],
+        provider: str = "openai",
+        model: Optional[str] = None,
+        queue_key: Optional[str] = None
+    ) -> np.ndarray:
         """
         Generate embeddings using specified provider
         
@@ -71,16 +173,25 @@ class EmbeddingService:
             texts: List of text strings to embed
             provider: Embedding provider (openai or gemini)
             model: Model name (optional, uses default if not provided)
+            queue_key: Fairness key for the rate limiter queue
             
         Returns:
-            List of embedding vectors
+            float32 matrix of shape (len(texts), dimensions)
         """
         if provider.lower() == "openai":
             model = model or "text-embedding-ada-002"
-            return self.generate_openai_embeddings(texts, model)
+            generate = self.generate_openai_embeddings
         elif provider.lower() == "gemini":
             model = model or "models/embedding-001"
-            return self.generate_gemini_embeddings(texts, model)
+            generate = self.generate_gemini_embeddings
         else:
             raise ValueError(f"Unsupported embedding provider: {provider}")
+        
+        with tracer.start_as_current_span("embedding.generate") as span:
+            span.set_attribute("embedding.provider", provider.lower())
+            span.set_attribute("embedding.model", model)
+            span.set_attribute("embedding.input_count", len(texts))
+            embeddings = generate(texts, model, queue_key)
+            span.set_attribute("embedding.dimensions", embeddings.shape[1])
+            return embeddings
 
@@ -0,0 +1,170 @@
+"""
+Residency ledger of loaded knowledge base indexes
+
+With CHROMA_MEMORY_LIMIT_BYTES set, Chroma (in this process in embedded
+mode, on the server in http mode) holds vector indexes in an LRU cache of
+that many bytes: a collection's HNSW index is loaded on first use, the
+least recently used indexes are unloaded once the budget is exceeded, and
+an unloaded index is reloaded from disk by the next query that needs it.
+
+Chroma does not report which indexes it holds, so the ledger mirrors its
+cache from the accesses this process makes, sizing each index as
+vectors x (dimensions x 4 + HNSW_LINK_BYTES). In http mode with several
+workers each keeps its own view of the server's cache.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import VECTOR_INDEX_EVICTIONS, VECTOR_INDEX_LOADS, VECTOR_INDEX_RESIDENT_BYTES
+
+# HNSW graph links (M=16, two layers' worth of int32 neighbour IDs) plus labels
+HNSW_LINK_BYTES = 2 * 16 * 4 + 16
+
+
+@dataclass
+class IndexEntry:
+    """Ledger entry of one collection's vector index"""
+    collection: str
+    knowledgebase_id: str
+    vectors: int = 0
+    dimensions: int = 0
+    loads: int = 0
+    hits: int = 0
+    last_used: Optional[datetime] = None
+
+    @property
+    def estimated_bytes(self) -> int:
+        return self.vectors * (self.dimensions * 4 + HNSW_LINK_BYTES)
+
+
+class IndexResidencyLedger:
+    """LRU ledger of vector indexes, mirroring Chroma's segment cache"""
+
+    def __init__(self, memory_limit_bytes: int = 0):
+        """
+        Args:
+            memory_limit_bytes: Budget before the least recently used indexes
+                are evicted (0 keeps everything resident)
+        """
+        self.memory_limit_bytes = memory_limit_bytes
+        self._resident: "OrderedDict[str, IndexEntry]" = OrderedDict()
+        self._evicted: Dict[str, IndexEntry] = {}
+        self._resident_bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def record_access(
+        self,
+        collection: str,
+        knowledgebase_id: str,
+        dimensions: int,
+        count_vectors: Callable[[], int],
+        added: int = 0
+    ) -> None:
+        """
+        Record a query of or write to a collection's index
+
+        Args:
+            collection: Physical collection name
+            knowledgebase_id: Knowledgebase component ID
+            dimensions: Embedding dimensions used by the access
+            count_vectors: Returns the collection's vector count, called
+                before the write only when the index has to be loaded
+            added: Vectors the access adds
+        """
+        # Count outside the lock: in http mode it is a round trip to the server
+        with self._lock:
+            resident = collection in self._resident
+        vectors = None if resident else count_vectors()
+
+        with self._lock:
+            entry = self._resident.get(collection)
+            if entry is not None:
+                entry.hits += 1
+                self._resident_bytes -= entry.estimated_bytes
+                self._resident.move_to_end(collection)
+            else:
+                entry = self._evicted.pop(collection, None) or IndexEntry(collection, knowledgebase_id)
+                # Evicted by another thread since the check above
+                entry.vectors = vectors if vectors is not None else count_vectors()
+                entry.loads += 1
+                self._resident[collection] = entry
+                VECTOR_INDEX_LOADS.inc()
+
+            entry.vectors += added
+            entry.dimensions = dimensions or entry.dimensions
+            entry.last_used = datetime.now(timezone.utc)
+            self._resident_bytes += entry.estimated_bytes
+
+            # Never evict the index just used, even if it alone exceeds the budget
+            while self.memory_limit_bytes and self._resident_bytes > self.memory_limit_bytes \
+                    and len(self._resident) > 1:
+                _, cold = self._resident.popitem(last=False)
+                self._resident_bytes -= cold.estimated_bytes
+                self._evicted[cold.collection] = cold
+                self._evictions += 1
+                VECTOR_INDEX_EVICTIONS.inc()
+            VECTOR_INDEX_RESIDENT_BYTES.set(self._resident_bytes)
+
+    def forget(self, collection: str) -> None:
+        """Drop a deleted collection from the ledger"""
+        with self._lock:
+            entry = self._resident.pop(collection, None)
+            if entry is not None:
+                self._resident_bytes -= entry.estimated_bytes
+                VECTOR_INDEX_RESIDENT_BYTES.set(self._resident_bytes)
+            self._evicted.pop(collection, None)
+
+    def stats(self, knowledgebase_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resident-set statistics per knowledge base
+
+        Args:
+            knowledgebase_id: Optional knowledgebase to restrict to
+
+        Returns:
+            Dictionary with the budget, totals and per-knowledgebase collections
+        """
+        knowledgebases: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for resident, entries in ((True, self._resident.values()), (False, self._evicted.values())):
+                for entry in entries:
+                    if knowledgebase_id is not None and entry.knowledgebase_id != knowledgebase_id:
+                        continue
+                    summary = knowledgebases.setdefault(entry.knowledgebase_id, {
+                        "knowledgebase_id": entry.knowledgebase_id,
+                        "resident_bytes": 0,
+                        "collections": []
+                    })
+                    if resident:
+                        summary["resident_bytes"] += entry.estimated_bytes
+                    summary["collections"].append({
+                        "collection": entry.collection,
+                        "resident": resident,
+                        "vectors": entry.vectors,
+                        "dimensions": entry.dimensions,
+                        "estimated_bytes": entry.estimated_bytes,
+                        "loads": entry.loads,
+                        "hits": entry.hits,
+                        "last_used": entry.last_used
+                    })
+            totals = {
+                "memory_limit_bytes": self.memory_limit_bytes,
+                "resident_bytes": self._resident_bytes,
+                "resident_collections": len(self._resident),
+                "evicted_collections": len(self._evicted),
+                "evictions": self._evictions
+            }
+
+        return {
+            **totals,
+            "knowledgebases": sorted(
+                knowledgebases.values(), key=lambda summary: summary["resident_bytes"], reverse=True
+            )
+        }
+
+
+index_residency = IndexResidencyLedger(settings.CHROMA_MEMORY_LIMIT_BYTES)
@@ -0,0 +1,363 @@
+"""
+Document ingestion service: extract, chunk, embed and store
+"""
+import contextvars
+import json
+import queue
+import threading
+import zlib
+from typing import Any, Callable, List, Optional
+from app.core.config import settings
+from app.core.metrics import INGESTION_QUEUE_DEPTH
+from app.models.document import Document
+from app.services.text_extractor import TextExtractor
+from app.services.embedding_service import EmbeddingService
+from app.services.retrieval_filters import chunk_metadata
+from app.services.vector_store import VectorStoreService
+
+# Marks the end of a stage's output
+END = object()
+# Seconds between cancellation checks while blocked on a queue
+POLL_INTERVAL = 0.1
+# Joins extracted pieces in stored text; a blank line is always a chunk boundary
+PIECE_SEPARATOR = "\n\n"
+
+
+class TextCompressor:
+    """Incrementally compresses extracted text for Document.extracted_text"""
+
+    def __init__(self):
+        self._compressor = zlib.compressobj()
+        self._parts: List[bytes] = []
+        self._empty = True
+
+    def add(self, piece: str) -> None:
+        text = piece if self._empty else PIECE_SEPARATOR + piece
+        self._parts.append(self._compressor.compress(text.encode("utf-8")))
+        self._empty = False
+
+    def finish(self) -> bytes:
+        self._parts.append(self._compressor.flush())
+        return b"".join(self._parts)
+
+
+class TextChunker:
+    """
+    Incremental DocumentIngestionService.chunk_text
+
+    Pieces added in order give the same chunks as chunk_text on the pieces
+    joined by PIECE_SEPARATOR, i.e. on the stored text, so a chunk packed
+    from the end of one page and the start of the next is only emitted once
+    it is full.
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = chunk_size
+        self._current = ""
+
+    def add(self, piece: str) -> List[str]:
+        """
+        Chunk the next piece of text
+
+        Returns:
+            Chunks completed by the piece; the last, partial one is held back
+        """
+        paragraphs = [chunk.strip() for chunk in piece.split(PIECE_SEPARATOR) if chunk.strip()]
+        if not self.chunk_size:
+            return paragraphs
+
+        chunk_size = self.chunk_size
+        chunks: List[str] = []
+        for paragraph in paragraphs:
+            if self._current and len(self._current) + len(PIECE_SEPARATOR) + len(paragraph) <= chunk_size:
+                self._current += PIECE_SEPARATOR + paragraph
+                continue
+            if self._current:
+                chunks.append(self._current)
+            while len(paragraph) > chunk_size:
+                cut = max(paragraph.rfind(" ", 0, chunk_size + 1), paragraph.rfind("\n", 0, chunk_size + 1))
+                if cut <= 0:
+                    cut = chunk_size
+                chunks.append(paragraph[:cut].rstrip())
+                paragraph = paragraph[cut:].lstrip()
+            self._current = paragraph
+        return chunks
+
+    def finish(self) -> List[str]:
+        """Chunk held back from the last piece"""
+        chunks = [self._current] if self._current else []
+        self._current = ""
+        return chunks
+
+
+def decompress_text(data: bytes) -> str:
+    """Text stored by TextCompressor"""
+    return zlib.decompress(data).decode("utf-8")
+
+
+class PipelineCancelled(Exception):
+    """Raised in a stage blocked on a queue after another stage failed"""
+
+
+class StageQueue:
+    """Bounded hand-off between two ingestion stages"""
+
+    def __init__(self, stage: str, cancelled: threading.Event, maxsize: Optional[int] = None):
+        """
+        Args:
+            stage: Name of the producing stage (the INGESTION_QUEUE_DEPTH label)
+            cancelled: Set when the pipeline is abandoned
+            maxsize: Capacity (defaults to INGESTION_QUEUE_SIZE)
+        """
+        self._queue: queue.Queue = queue.Queue(maxsize or settings.INGESTION_QUEUE_SIZE)
+        self._cancelled = cancelled
+        self._depth = INGESTION_QUEUE_DEPTH.labels(stage=stage)
+
+    def put(self, item: Any) -> None:
+        """Add an item, blocking while the queue is full"""
+        counted = item is not END
+        if counted:
+            self._depth.inc()
+        while True:
+            if self._cancelled.is_set():
+                if counted:
+                    self._depth.dec()
+                raise PipelineCancelled()
+            try:
+                self._queue.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def get(self) -> Any:
+        """Take the next item, blocking while the queue is empty"""
+        while True:
+            if self._cancelled.is_set():
+                raise PipelineCancelled()
+            try:
+                item = self._queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if item is not END:
+                self._depth.dec()
+            return item
+
+    def discard(self) -> None:
+        """Drop items left behind by a cancelled pipeline"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not END:
+                self._depth.dec()
+
+
+def start_stage(
+    name: str,
+    target: Callable[[], None],
+    cancelled: threading.Event,
+    failures: List[BaseException]
+) -> threading.Thread:
+    """Run a pipeline stage in a thread that cancels the pipeline if it fails"""
+    # Each thread runs in a copy of the caller's context so spans and
+    # rate limiter keys attach to the request that started the ingestion
+    context = contextvars.copy_context()
+
+    def run() -> None:
+        try:
+            context.run(target)
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            failures.append(e)
+            cancelled.set()
+
+    thread = threading.Thread(target=run, name=f"ingestion-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+class DocumentIngestionService:
+    """Service for turning uploaded documents into searchable chunks"""
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_store: Optional[VectorStoreService] = None
+    ):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_store = vector_store or VectorStoreService()
+
+    @staticmethod
+    def chunk_text(text: str, chunk_size: Optional[int] = None) -> List[str]:
+        """
+        Split text into chunks by paragraph
+
+        Args:
+            text: Extracted document text
+            chunk_size: Optional maximum chunk length in characters; consecutive
+                paragraphs are packed up to it and longer ones are split at
+                whitespace. Without it every paragraph is a chunk.
+
+        Returns:
+            List of non-empty chunks
+        """
+        chunker = TextChunker(chunk_size)
+        return chunker.add(text) + chunker.finish()
+
+    def ingest(
+        self,
+        document: Document,
+        embedding_provider: str = "openai",
+        embedding_model: Optional[str] = None
+    ) -> int:
+        """
+        Extract, chunk, embed and store a document as a streaming pipeline
+
+        Extraction, chunking and embedding run in their own threads and the
+        caller's thread stores batches, so later pages are extracted while
+        earlier chunks are embedded and written. Stages hand off through
+        queues of INGESTION_QUEUE_SIZE items; a slow stage blocks the ones
+        before it, which bounds memory regardless of document size. If any
+        stage fails, the others stop and chunks already stored are removed.
+
+        The extracted text is compressed onto document.extracted_text for
+        re-indexing. If the knowledge base has been re-indexed, its
+        registered chunk size and embedding settings take precedence so new
+        documents match the rest of its index.
+
+        Args:
+            document: Document with file_path, file_type and knowledgebase_id set
+            embedding_provider: Embedding provider (openai or gemini)
+            embedding_model: Embedding model (optional, uses provider default)
+
+        Returns:
+            Number of chunks stored
+        """
+        knowledgebase_id = document.knowledgebase_id or "default"
+        index_config = self.vector_store.index_config(knowledgebase_id, knowledgebase_id)
+        embedding_provider = index_config.get("embedding_provider", embedding_provider)
+        embedding_model = index_config.get("embedding_model", embedding_model)
+        chunk_size = index_config.get("chunk_size")
+        compressor = TextCompressor()
+        cancelled = threading.Event()
+        failures: List[BaseException] = []
+        pages = StageQueue("extract", cancelled)
+        batches = StageQueue("chunk", cancelled)
+        embedded = StageQueue("embed", cancelled)
+
+        def extract() -> None:
+            for page in TextExtractor.iter_pages(document.file_path, document.file_type):
+                compressor.add(page)
+                pages.put(page)
+            pages.put(END)
+
+        def chunk() -> None:
+            # Packing carries across pages, so chunks match a re-index of the stored text
+            chunker = TextChunker(chunk_size)
+            batch: List[str] = []
+            start = 0
+            while True:
+                page = pages.get()
+                texts = chunker.finish() if page is END else chunker.add(page)
+                for text in texts:
+                    batch.append(text)
+                    if len(batch) == settings.INGESTION_EMBED_BATCH_SIZE:
+                        batches.put((start, batch))
+                        start += len(batch)
+                        batch = []
+                if page is END:
+                    break
+            if batch:
+                batches.put((start, batch))
+            batches.put(END)
+
+        def embed() -> None:
+            while True:
+                item = batches.get()
+                if item is END:
+                    break
+                start, texts = item
+                embeddings = self.embedding_service.generate_embeddings(
+                    texts,
+                    provider=embedding_provider,
+                    model=embedding_model
+                )
+                embedded.put((start, texts, embeddings))
+            embedded.put(END)
+
+        threads = [
+            start_stage(name, target, cancelled, failures)
+            for name, target in (("extract", extract), ("chunk", chunk), ("embed", embed))
+        ]
+
+        metadata = chunk_metadata(document.id, document.filename, document.created_at, document.tags)
+        stored = 0
+        try:
+            while True:
+                item = embedded.get()
+                if item is END:
+                    break
+                start, texts, embeddings = item
+                self.vector_store.add_documents(
+                    collection_name=knowledgebase_id,
+                    knowledgebase_id=knowledgebase_id,
+                    texts=texts,
+                    embeddings=embeddings,
+                    metadatas=[
+                        {**metadata, "chunk_index": start + i}
+                        for i in range(len(texts))
+                    ]
+                )
+                stored += len(texts)
+        except BaseException as e:
+            cancelled.set()
+            if not isinstance(e, PipelineCancelled):
+                failures.insert(0, e)
+        finally:
+            for thread in threads:
+                thread.join()
+            for stage_queue in (pages, batches, embedded):
+                stage_queue.discard()
+
+        if failures:
+            if stored and document.id is not None:
+                self._remove_chunks(knowledgebase_id, document.id)
+            raise failures[0]
+
+        if not stored:
+            raise ValueError("No text content extracted")
+
+        document.extracted_text = compressor.finish()
+        return stored
+
+    def _remove_chunks(self, knowledgebase_id: str, document_id: int) -> None:
+        """Delete the chunks a failed ingestion already stored"""
+        try:
+            self.vector_store.delete_documents(
+                collection_name=knowledgebase_id,
+                knowledgebase_id=knowledgebase_id,
+                where={"document_id": document_id}
+            )
+        except Exception as e:
+            print(f"Error removing chunks of failed document {document_id}: {str(e)}")
+
+    def process(self, document: Document, embedding_provider: str = "openai") -> None:
+        """
+        Ingest a document and record the outcome on its processed/metadata_json fields
+
+        Args:
+            document: Document to process (must already have an ID)
+            embedding_provider: Embedding provider (openai or gemini)
+        """
+        try:
+            chunk_count = self.ingest(document, embedding_provider=embedding_provider)
+            document.processed = "completed"
+            document.metadata_json = json.dumps({
+                "chunks": chunk_count,
+                "embedding_provider": embedding_provider
+            })
+        except Exception as e:
+            document.processed = "failed"
+            document.metadata_json = json.dumps({"error": str(e)})
@@ -0,0 +1,142 @@
+"""
+Per-component execution instrumentation
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+from opentelemetry import trace
+from app.core.metrics import CACHE_REQUESTS, COMPONENT_EXECUTION_DURATION
+from app.core.tracing import tracer
+
+
+class ComponentStats:
+    """Timing and usage counters collected while one component runs"""
+
+    def __init__(self, component_id: int, node_id: str, component_type: str):
+        self.component_id = component_id
+        self.node_id = node_id
+        self.component_type = component_type
+        self.wall_time_ms = 0.0
+        self.queue_wait_ms = 0.0
+        self.provider_latency_ms = 0.0
+        self.provider_calls = 0
+        self.retrieved_chunks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Queries sharing this record when the component ran batched
+        self.batch_size = 1
+        # Hedged provider calls report from worker threads
+        self._lock = threading.Lock()
+
+    def add(self, **values: float) -> None:
+        """Add to one or more counters"""
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for execution metadata"""
+        return {
+            "component_id": self.component_id,
+            "node_id": self.node_id,
+            "component_type": self.component_type,
+            "wall_time_ms": round(self.wall_time_ms, 3),
+            "queue_wait_ms": round(self.queue_wait_ms, 3),
+            "provider_latency_ms": round(self.provider_latency_ms, 3),
+            "provider_calls": self.provider_calls,
+            "retrieved_chunks": self.retrieved_chunks,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "batch_size": self.batch_size
+        }
+
+
+_current_stats: ContextVar[Optional[ComponentStats]] = ContextVar("component_stats", default=None)
+
+
+@contextmanager
+def track_component(component: Any) -> Iterator[ComponentStats]:
+    """
+    Collect stats for a component run
+
+    Provider, retrieval and cache helpers called inside the block record into
+    the returned ComponentStats through a context variable. The run is also
+    wrapped in a tracing span carrying the same counters as attributes.
+
+    Args:
+        component: WorkflowComponent or PlanComponent being executed
+
+    Yields:
+        ComponentStats for the run
+    """
+    stats = ComponentStats(component.id, component.node_id, component.component_type)
+    with tracer.start_as_current_span(f"component.{component.component_type}") as span:
+        span.set_attribute("workflow.id", component.workflow_id)
+        span.set_attribute("component.type", component.component_type)
+        span.set_attribute("component.node_id", component.node_id)
+
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.wall_time_ms = elapsed * 1000
+            _current_stats.reset(token)
+            COMPONENT_EXECUTION_DURATION.labels(component_type=stats.component_type).observe(elapsed)
+            for name, value in stats.to_dict().items():
+                if name not in ("component_id", "node_id", "component_type"):
+                    span.set_attribute(f"component.{name}", value)
+
+
+def current_stats() -> Optional[ComponentStats]:
+    """Get the stats of the component currently running in this context"""
+    return _current_stats.get()
+
+
+def record_provider_call(latency_seconds: float) -> None:
+    """Record one successful provider request"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(provider_latency_ms=latency_seconds * 1000, provider_calls=1)
+
+
+def record_queue_wait(wait_seconds: float) -> None:
+    """Record time spent queued behind the rate limiter"""
+    stats = _current_stats.get()
+    if stats is not None and wait_seconds > 0:
+        stats.add(queue_wait_ms=wait_seconds * 1000)
+
+
+def record_tokens(prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None) -> None:
+    """Record provider-reported token usage"""
+    span = trace.get_current_span()
+    if prompt_tokens is not None:
+        span.set_attribute("llm.prompt_tokens", prompt_tokens)
+    if completion_tokens is not None:
+        span.set_attribute("llm.completion_tokens", completion_tokens)
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(prompt_tokens=prompt_tokens or 0, completion_tokens=completion_tokens or 0)
+
+
+def record_retrieval(chunk_count: int) -> None:
+    """Record the number of chunks returned by a vector search"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(retrieved_chunks=chunk_count)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup outcome"""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(cache_hits=1 if hit else 0, cache_misses=0 if hit else 1)
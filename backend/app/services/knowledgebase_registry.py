@@ -0,0 +1,225 @@
+"""
+Knowledge base registry: routes collection names to the collection serving them
+
+A knowledge base that has never been re-indexed has no registry row and is
+served from its base collection ("{collection_name}_{knowledgebase_id}").
+After a re-index, the row points at the shadow collection that replaced it.
+Rows are cached per process for KB_REGISTRY_TTL seconds, so a swap reaches
+other processes within that time; replaced collections are kept for
+KB_SWAP_GRACE_SECONDS to cover it.
+
+With KB_STORAGE_LAYOUT=shared, a knowledge base gets a row on its first write:
+new ones are served from a partition of the shared collection until they
+are promoted to a dedicated collection, existing ones keep their base
+collection.
+
+Each knowledge base also has a content version, which keys the retrieval
+cache. Writers bump it in the transaction that changes the knowledge base;
+it is not cached but read by primary key on every lookup, so the next
+retrieval in any process sees the change.
+
+Rows are reloaded outside the lock by one thread at a time; other threads
+keep using the previous rows meanwhile and only wait for the first load.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql.dml import Insert
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.knowledgebase import KnowledgeBase, KnowledgeBaseVersion
+
+
+@dataclass(frozen=True)
+class IndexState:
+    """Current index of a registered knowledge base"""
+    knowledgebase_id: str
+    active_collection: str
+    version: int
+    config: Dict[str, Any] = field(default_factory=dict)
+
+
+def base_collection_name(collection_name: str, knowledgebase_id: str) -> str:
+    """Collection name a (collection_name, knowledgebase_id) pair maps to before any re-index"""
+    return f"{collection_name}_{knowledgebase_id}"
+
+
+def shared_collection_name(distance: Optional[str]) -> str:
+    """Shared collection holding the partitions of small knowledge bases using a distance"""
+    return f"{settings.KB_SHARED_COLLECTION}_{distance or 'l2'}"
+
+
+def is_shared_collection(full_name: str) -> bool:
+    return full_name.startswith(f"{settings.KB_SHARED_COLLECTION}_")
+
+
+_states: Dict[str, IndexState] = {}
+_loaded_at: Optional[float] = None
+_loaded_once = False
+# Bumped by invalidate_registry(), so a reload that began before it does not count as fresh
+_generation = 0
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+# Last content version read per knowledge base, used while the database is unreachable
+_versions: Dict[str, int] = {}
+
+
+def _is_fresh() -> bool:
+    return _loaded_at is not None and time.monotonic() - _loaded_at <= settings.KB_REGISTRY_TTL
+
+
+def _refresh(generation: int) -> None:
+    global _states, _loaded_at, _loaded_once
+    try:
+        with SessionLocal() as db:
+            rows = db.query(
+                KnowledgeBase.base_collection, KnowledgeBase.knowledgebase_id,
+                KnowledgeBase.active_collection, KnowledgeBase.version, KnowledgeBase.config
+            ).all()
+    except Exception as e:
+        # Keep routing by the last known rows rather than falling back to base collections
+        print(f"Error loading knowledge base registry: {str(e)}")
+        with _lock:
+            _loaded_at = time.monotonic()
+            _loaded_once = True
+        return
+    states = {
+        row.base_collection: IndexState(row.knowledgebase_id, row.active_collection, row.version, row.config or {})
+        for row in rows
+    }
+    with _lock:
+        _states = states
+        _loaded_at = time.monotonic() if generation == _generation else None
+        _loaded_once = True
+
+
+def _ensure_loaded() -> None:
+    with _lock:
+        if _is_fresh():
+            return
+        wait = not _loaded_once
+    # Another thread is reloading: serve the current rows unless there are none yet
+    if not _refresh_lock.acquire(blocking=wait):
+        return
+    try:
+        with _lock:
+            if _is_fresh():
+                return
+            generation = _generation
+        _refresh(generation)
+    finally:
+        _refresh_lock.release()
+
+
+def get_index_state(collection_name: str, knowledgebase_id: str) -> Optional[IndexState]:
+    """
+    Look up the registered index of a knowledge base
+
+    Args:
+        collection_name: Name of the collection
+        knowledgebase_id: Knowledgebase component ID
+
+    Returns:
+        Index state, or None if the knowledge base has never been re-indexed
+    """
+    _ensure_loaded()
+    with _lock:
+        return _states.get(base_collection_name(collection_name, knowledgebase_id))
+
+
+def get_content_version(knowledgebase_id: str) -> int:
+    """Content version of a knowledge base (0 if it has never changed since versioning began)"""
+    try:
+        with SessionLocal() as db:
+            version = db.query(KnowledgeBaseVersion.version).filter(
+                KnowledgeBaseVersion.knowledgebase_id == knowledgebase_id
+            ).scalar()
+    except Exception as e:
+        print(f"Error reading content version of knowledge base {knowledgebase_id}: {str(e)}")
+        with _lock:
+            return _versions.get(knowledgebase_id, 0)
+    version = version or 0
+    with _lock:
+        _versions[knowledgebase_id] = version
+    return version
+
+
+def content_version_bump(knowledgebase_id: str) -> Insert:
+    """
+    Statement that increments a knowledge base's content version
+
+    Execute it in the transaction that changes the knowledge base.
+    """
+    statement = pg_insert(KnowledgeBaseVersion).values(knowledgebase_id=knowledgebase_id, version=1)
+    return statement.on_conflict_do_update(
+        index_elements=[KnowledgeBaseVersion.knowledgebase_id],
+        set_={"version": KnowledgeBaseVersion.version + 1}
+    )
+
+
+def resolve_collection_name(collection_name: str, knowledgebase_id: str) -> str:
+    """Physical collection currently serving (collection_name, knowledgebase_id)"""
+    state = get_index_state(collection_name, knowledgebase_id)
+    return state.active_collection if state else base_collection_name(collection_name, knowledgebase_id)
+
+
+def register_collection(collection_name: str, knowledgebase_id: str, active_collection: str) -> IndexState:
+    """
+    Record the collection serving a knowledge base that has no registry row yet
+
+    If another process registered it first, its row wins.
+
+    Returns:
+        Index state of the knowledge base
+    """
+    base = base_collection_name(collection_name, knowledgebase_id)
+    with SessionLocal() as db:
+        db.execute(
+            pg_insert(KnowledgeBase).values(
+                knowledgebase_id=knowledgebase_id,
+                base_collection=base,
+                active_collection=active_collection,
+                version=1,
+                config={}
+            ).on_conflict_do_nothing(index_elements=[KnowledgeBase.base_collection])
+        )
+        db.commit()
+        # Read the row back rather than wait for a reload that may already be under way
+        row = db.query(
+            KnowledgeBase.knowledgebase_id, KnowledgeBase.active_collection,
+            KnowledgeBase.version, KnowledgeBase.config
+        ).filter(KnowledgeBase.base_collection == base).one()
+    invalidate_registry()
+    return IndexState(row.knowledgebase_id, row.active_collection, row.version, row.config or {})
+
+
+def swap_active_collection(collection_name: str, knowledgebase_id: str, version: int, active_collection: str) -> bool:
+    """
+    Point a knowledge base at another collection, unless its version moved on
+
+    Returns:
+        True if swapped; False if a re-index or promotion got there first
+    """
+    with SessionLocal() as db:
+        swapped = db.execute(
+            update(KnowledgeBase)
+            .where(
+                KnowledgeBase.base_collection == base_collection_name(collection_name, knowledgebase_id),
+                KnowledgeBase.version == version
+            )
+            .values(active_collection=active_collection, version=version + 1)
+        ).rowcount
+        db.commit()
+    invalidate_registry()
+    return bool(swapped)
+
+
+def invalidate_registry() -> None:
+    """Reload the registry on next use, e.g. after this process swapped an index"""
+    global _loaded_at, _generation
+    with _lock:
+        _loaded_at = None
+        _generation += 1
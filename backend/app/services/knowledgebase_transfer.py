@@ -0,0 +1,254 @@
+"""
+Knowledge base export and import as pre-embedded Parquet files
+
+An export is a zip archive holding two Parquet files:
+
+    chunks.parquet     id, document_id, text, metadata (JSON) and embedding
+                       (fixed-size list of float32) per stored chunk
+    documents.parquet  the knowledge base's Document rows, including their
+                       compressed extracted text so restores can be re-indexed
+
+The chunks file's schema metadata records the format version, source
+knowledge base, embedding dimensions and HNSW distance. Importing loads
+the embeddings straight into the vector store, so no provider calls are
+made and restore time is bounded by disk throughput.
+"""
+import json
+import os
+import tempfile
+import zipfile
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, undefer
+from app.core.config import settings
+from app.models.document import Document
+from app.services.knowledgebase_registry import content_version_bump, invalidate_registry
+from app.services.vector_store import VectorStoreService
+
+FORMAT_VERSION = "1"
+CHUNKS_FILE = "chunks.parquet"
+DOCUMENTS_FILE = "documents.parquet"
+
+DOCUMENT_COLUMNS = (
+    "id", "filename", "file_path", "file_size", "file_type",
+    "processed", "created_at", "updated_at", "metadata_json", "tags", "extracted_text"
+)
+DOCUMENTS_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("filename", pa.string()),
+    ("file_path", pa.string()),
+    ("file_size", pa.int64()),
+    ("file_type", pa.string()),
+    ("processed", pa.string()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("updated_at", pa.timestamp("us", tz="UTC")),
+    ("metadata_json", pa.string()),
+    ("tags", pa.list_(pa.string())),
+    ("extracted_text", pa.binary())
+])
+
+
+def _chunks_schema(dimensions: int, metadata: Dict[str, str]) -> pa.Schema:
+    return pa.schema([
+        ("id", pa.string()),
+        ("document_id", pa.int64()),
+        ("text", pa.string()),
+        ("metadata", pa.string()),
+        ("embedding", pa.list_(pa.float32(), dimensions))
+    ], metadata=metadata)
+
+
+class KnowledgeBaseTransferService:
+    """Service for moving knowledge bases between environments without re-embedding"""
+
+    def __init__(self, vector_store: Optional[VectorStoreService] = None):
+        self.vector_store = vector_store or VectorStoreService()
+
+    def export(self, db: Session, knowledgebase_id: str, collection_name: str, path: str) -> int:
+        """
+        Write a knowledge base export archive
+
+        Args:
+            db: Database session
+            knowledgebase_id: Knowledgebase component ID
+            collection_name: Name of the collection
+            path: Archive file to write
+
+        Returns:
+            Number of chunks exported
+        """
+        collection = self.vector_store.get_collection(collection_name, knowledgebase_id)
+        distance = (collection.metadata or {}).get("hnsw:space", "l2")
+        exported = 0
+
+        with tempfile.TemporaryDirectory() as workdir:
+            chunks_path = os.path.join(workdir, CHUNKS_FILE)
+            writer = None
+            try:
+                for page in self.vector_store.iter_documents(
+                    collection_name, knowledgebase_id, batch_size=settings.IMPORT_WRITE_BATCH_SIZE
+                ):
+                    embeddings = page["embeddings"]
+                    if writer is None:
+                        writer = pq.ParquetWriter(chunks_path, _chunks_schema(embeddings.shape[1], {
+                            "format_version": FORMAT_VERSION,
+                            "knowledgebase_id": knowledgebase_id,
+                            "collection_name": collection_name,
+                            "dimensions": str(embeddings.shape[1]),
+                            "distance": distance
+                        }))
+                    writer.write_batch(pa.record_batch([
+                        pa.array(page["ids"], pa.string()),
+                        pa.array([(metadata or {}).get("document_id") for metadata in page["metadatas"]], pa.int64()),
+                        pa.array(page["documents"], pa.string()),
+                        pa.array([json.dumps(metadata or {}) for metadata in page["metadatas"]], pa.string()),
+                        # A contiguous float32 matrix becomes the list values without copying
+                        pa.FixedSizeListArray.from_arrays(
+                            pa.array(np.ascontiguousarray(embeddings).ravel()), embeddings.shape[1]
+                        )
+                    ], schema=writer.schema))
+                    exported += len(page["ids"])
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if writer is None:
+                # Empty collection: an empty chunks file without embedding dimensions
+                pq.write_table(_chunks_schema(0, {
+                    "format_version": FORMAT_VERSION,
+                    "knowledgebase_id": knowledgebase_id,
+                    "collection_name": collection_name,
+                    "dimensions": "0",
+                    "distance": distance
+                }).empty_table(), chunks_path)
+
+            documents = db.query(Document).options(undefer(Document.extracted_text)).filter(
+                Document.knowledgebase_id == knowledgebase_id
+            ).order_by(Document.id).all()
+            documents_path = os.path.join(workdir, DOCUMENTS_FILE)
+            pq.write_table(pa.Table.from_pylist(
+                [{column: getattr(document, column) for column in DOCUMENT_COLUMNS} for document in documents],
+                schema=DOCUMENTS_SCHEMA
+            ), documents_path)
+
+            # Parquet pages are already compressed
+            with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+                archive.write(chunks_path, CHUNKS_FILE)
+                archive.write(documents_path, DOCUMENTS_FILE)
+
+        return exported
+
+    def import_archive(
+        self,
+        db: Session,
+        knowledgebase_id: str,
+        collection_name: str,
+        archive_file: Any
+    ) -> Dict[str, int]:
+        """
+        Load an export archive into an empty knowledge base
+
+        Document rows get new IDs and the target knowledgebase_id; chunk
+        metadata is rewritten to match. Chunk IDs are kept; in a shared
+        collection they are scoped to the target's partition. If loading
+        fails, the rows are rolled back and the collection is removed.
+
+        Args:
+            db: Database session
+            knowledgebase_id: Target knowledgebase component ID
+            collection_name: Target collection name
+            archive_file: Seekable export archive
+
+        Returns:
+            Dictionary with documents and chunks counts
+
+        Raises:
+            ValueError: If the archive is not a valid export
+        """
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                with zipfile.ZipFile(archive_file) as archive:
+                    missing = {CHUNKS_FILE, DOCUMENTS_FILE} - set(archive.namelist())
+                    if missing:
+                        raise ValueError(f"Not a knowledge base export, missing {', '.join(sorted(missing))}")
+                    archive.extract(CHUNKS_FILE, workdir)
+                    archive.extract(DOCUMENTS_FILE, workdir)
+                chunks = pq.ParquetFile(os.path.join(workdir, CHUNKS_FILE), memory_map=True)
+                documents = pq.read_table(os.path.join(workdir, DOCUMENTS_FILE), memory_map=True)
+            except (zipfile.BadZipFile, pa.ArrowInvalid) as e:
+                raise ValueError(f"Invalid knowledge base export: {str(e)}")
+
+            manifest = {
+                key.decode(): value.decode()
+                for key, value in (chunks.schema_arrow.metadata or {}).items()
+            }
+            if manifest.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported export format version: {manifest.get('format_version')}")
+            dimensions = int(manifest["dimensions"])
+
+            vector_store = self.vector_store
+            if manifest.get("distance") and vector_store.distance != manifest["distance"]:
+                vector_store = VectorStoreService(distance=manifest["distance"])
+
+            document_ids = self._insert_documents(db, knowledgebase_id, documents)
+            loaded = 0
+            try:
+                for batch in chunks.iter_batches(batch_size=settings.IMPORT_WRITE_BATCH_SIZE):
+                    metadatas = []
+                    for raw, document_id in zip(
+                        batch.column("metadata").to_pylist(), batch.column("document_id").to_pylist()
+                    ):
+                        metadata = json.loads(raw)
+                        if document_id is not None:
+                            metadata["document_id"] = document_ids.get(document_id, document_id)
+                        metadatas.append(metadata)
+
+                    # Fixed-size list values are one contiguous float32 buffer
+                    embeddings = batch.column("embedding").flatten().to_numpy(
+                        zero_copy_only=True
+                    ).reshape(-1, dimensions)
+                    vector_store.add_documents(
+                        collection_name=collection_name,
+                        knowledgebase_id=knowledgebase_id,
+                        texts=batch.column("text").to_pylist(),
+                        embeddings=embeddings,
+                        metadatas=metadatas,
+                        ids=batch.column("id").to_pylist()
+                    )
+                    loaded += batch.num_rows
+                db.execute(content_version_bump(knowledgebase_id))
+                db.commit()
+            except Exception:
+                db.rollback()
+                vector_store.delete_collection(collection_name, knowledgebase_id)
+                raise
+            invalidate_registry()
+
+        return {"documents": len(document_ids), "chunks": loaded}
+
+    @staticmethod
+    def _insert_documents(db: Session, knowledgebase_id: str, documents: pa.Table) -> Dict[int, int]:
+        """
+        Insert exported Document rows in one multi-row INSERT (not committed)
+
+        Returns:
+            Mapping of exported document ID to new document ID
+        """
+        rows: List[Dict[str, Any]] = documents.to_pylist()
+        if not rows:
+            return {}
+
+        new_ids = db.execute(
+            insert(Document).returning(Document.id, sort_by_parameter_order=True),
+            [
+                {
+                    **{column: row.get(column) for column in DOCUMENT_COLUMNS if column != "id"},
+                    "knowledgebase_id": knowledgebase_id
+                }
+                for row in rows
+            ]
+        ).scalars().all()
+        return {row["id"]: new_id for row, new_id in zip(rows, new_ids)}
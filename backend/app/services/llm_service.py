@@ -1,11 +1,23 @@
 """
 LLM service for interacting with language models
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import time
+import httpx
 import openai
 from google.generativeai import configure, GenerativeModel
-import serpapi
 from app.core.config import settings
+from app.services.provider_resilience import (
+    call_with_retries, run_with_timeout, hedged_call, hedge_delay_for
+)
+from app.services.rate_limiter import get_rate_limiter, estimate_tokens
+from app.services.instrumentation import record_provider_call, record_tokens
+from app.core.tracing import tracer
+
+DEFAULT_MODELS = {
+    "openai": "gpt-3.5-turbo",
+    "gemini": "gemini-pro",
+}
 
 
 class LLMService:
@@ -13,7 +25,17 @@ class LLMService:
     
     def __init__(self):
         openai.api_key = settings.OPENAI_API_KEY
-        if settings.GEMINI_API_KEY:
+        # Retries are handled by call_with_retries so they respect the circuit breaker
+        openai.max_retries = 0
+        if settings.OPENAI_BASE_URL:
+            openai.base_url = settings.OPENAI_BASE_URL
+        if settings.GEMINI_API_KEY and settings.GEMINI_API_ENDPOINT:
+            configure(
+                api_key=settings.GEMINI_API_KEY,
+                transport="rest",
+                client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT}
+            )
+        elif settings.GEMINI_API_KEY:
             configure(api_key=settings.GEMINI_API_KEY)
         if settings.SERPAPI_API_KEY:
             self.serpapi_key = settings.SERPAPI_API_KEY
@@ -27,7 +49,10 @@ class LLMService:
         system_prompt: Optional[str] = None,
         model: str = "gpt-3.5-turbo",
         temperature: float = 0.7,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        queue_key: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        conversation_summary: Optional[str] = None
     ) -> str:
         """
         Generate response using OpenAI GPT
@@ -39,6 +64,9 @@ class LLMService:
             model: OpenAI model name
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            queue_key: Fairness key for the rate limiter queue (e.g. workflow ID)
+            history: Optional earlier turns as {role, content}, oldest first
+            conversation_summary: Optional summary of turns older than history
             
         Returns:
             Generated response
@@ -59,13 +87,47 @@ class LLMService:
                     "content": "You are a helpful assistant."
                 })
             
+            if conversation_summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation:\n{conversation_summary}"
+                })
+            
+            for turn in history or []:
+                role = turn["role"] if turn["role"] in ("user", "assistant") else "system"
+                messages.append({"role": role, "content": turn["content"]})
+            
             messages.append({"role": "user", "content": query})
             
-            response = openai.chat.completions.create(
+            limiter = get_rate_limiter("openai", model)
+            estimated_tokens = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+            
+            def send():
+                try:
+                    raw_response = openai.chat.completions.with_raw_response.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=settings.LLM_REQUEST_TIMEOUT
+                    )
+                except Exception as e:
+                    limiter.observe_error(e)
+                    raise
+                
+                limiter.update_from_headers(raw_response.headers)
+                completion = raw_response.parse()
+                usage = getattr(completion, "usage", None)
+                limiter.settle(estimated_tokens, usage.total_tokens if usage else None)
+                if usage:
+                    record_tokens(usage.prompt_tokens, usage.completion_tokens)
+                return completion
+            
+            response = call_with_retries(
+                send,
+                provider="openai",
                 model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
+                acquire=lambda: limiter.acquire(estimated_tokens, queue_key)
             )
             
             return response.choices[0].message.content
@@ -79,7 +141,10 @@ class LLMService:
         context: Optional[str] = None,
         system_prompt: Optional[str] = None,
         model: str = "gemini-pro",
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        queue_key: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        conversation_summary: Optional[str] = None
     ) -> str:
         """
         Generate response using Google Gemini
@@ -90,6 +155,9 @@ class LLMService:
             system_prompt: Optional system prompt
             model: Gemini model name
             temperature: Sampling temperature
+            queue_key: Fairness key for the rate limiter queue (e.g. workflow ID)
+            history: Optional earlier turns as {role, content}, oldest first
+            conversation_summary: Optional summary of turns older than history
             
         Returns:
             Generated response
@@ -106,16 +174,41 @@ class LLMService:
             elif context:
                 prompt_parts.append(f"Context:\n{context}\n\n")
             
+            if conversation_summary:
+                prompt_parts.append(f"Summary of the earlier conversation:\n{conversation_summary}\n")
+            
+            if history:
+                transcript = "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in history)
+                prompt_parts.append(f"Conversation so far:\n{transcript}\n")
+            
             prompt_parts.append(f"Question: {query}\n\nAnswer:")
             
             full_prompt = "\n".join(prompt_parts)
             
             gemini_model = GenerativeModel(model)
-            response = gemini_model.generate_content(
-                full_prompt,
-                generation_config={
-                    "temperature": temperature,
-                }
+            limiter = get_rate_limiter("gemini", model)
+            estimated_tokens = estimate_tokens(full_prompt) * 2
+            
+            def send():
+                try:
+                    return run_with_timeout(
+                        lambda: gemini_model.generate_content(
+                            full_prompt,
+                            generation_config={
+                                "temperature": temperature,
+                            }
+                        ),
+                        timeout=settings.LLM_REQUEST_TIMEOUT
+                    )
+                except Exception as e:
+                    limiter.observe_error(e)
+                    raise
+            
+            response = call_with_retries(
+                send,
+                provider="gemini",
+                model=model,
+                acquire=lambda: limiter.acquire(estimated_tokens, queue_key)
             )
             
             return response.text
@@ -138,13 +231,23 @@ class LLMService:
             raise ValueError("SerpAPI key not configured")
         
         try:
-            search = serpapi.GoogleSearch({
-                "q": query,
-                "api_key": self.serpapi_key,
-                "num": num_results
-            })
-            
-            results = search.get_dict()
+            with tracer.start_as_current_span("web_search.serpapi") as span:
+                span.set_attribute("web_search.num_results", num_results)
+                start = time.perf_counter()
+                response = httpx.get(
+                    f"{settings.SERPAPI_BASE_URL.rstrip('/')}/search.json",
+                    params={
+                        "engine": "google",
+                        "q": query,
+                        "api_key": self.serpapi_key,
+                        "num": num_results
+                    },
+                    timeout=settings.LLM_REQUEST_TIMEOUT
+                )
+                response.raise_for_status()
+                
+                results = response.json()
+                record_provider_call(time.perf_counter() - start)
             
             # Extract relevant information
             organic_results = results.get("organic_results", [])
@@ -184,7 +287,9 @@ class LLMService:
             system_prompt: Optional system prompt
             use_web_search: Whether to use web search
             model: Model name (optional)
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (temperature, max_tokens,
+                fallback_provider, fallback_model, hedge_delay, queue_key,
+                history, conversation_summary)
             
         Returns:
             Generated response
@@ -206,25 +311,119 @@ class LLMService:
                 print(f"Web search failed: {str(e)}")
         
         # Generate response
+        primary = lambda: self._generate_with_provider(
+            provider=provider,
+            query=query,
+            context=context,
+            system_prompt=system_prompt,
+            model=model,
+            temperature=kwargs.get("temperature", 0.7),
+            max_tokens=kwargs.get("max_tokens", 1000),
+            queue_key=kwargs.get("queue_key"),
+            history=kwargs.get("history"),
+            conversation_summary=kwargs.get("conversation_summary")
+        )
+        
+        fallback_provider = kwargs.get("fallback_provider")
+        if not fallback_provider:
+            return primary()
+        
+        # Hedge against the fallback provider once the primary passes its latency deadline
+        backup = lambda: self._generate_with_provider(
+            provider=fallback_provider,
+            query=query,
+            context=context,
+            system_prompt=system_prompt,
+            model=kwargs.get("fallback_model"),
+            temperature=kwargs.get("temperature", 0.7),
+            max_tokens=kwargs.get("max_tokens", 1000),
+            queue_key=kwargs.get("queue_key"),
+            history=kwargs.get("history"),
+            conversation_summary=kwargs.get("conversation_summary")
+        )
+        hedge_delay = kwargs.get("hedge_delay")
+        if hedge_delay is None:
+            primary_model = model or DEFAULT_MODELS.get(provider.lower(), "")
+            hedge_delay = hedge_delay_for(provider, primary_model)
+        
+        return hedged_call(primary, backup, hedge_delay)
+    
+    def _generate_with_provider(
+        self,
+        provider: str,
+        query: str,
+        context: Optional[str],
+        system_prompt: Optional[str],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        queue_key: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        conversation_summary: Optional[str] = None
+    ) -> str:
+        """
+        Dispatch a generation request to a single provider
+        
+        Args:
+            provider: LLM provider (openai or gemini)
+            query: User query
+            context: Optional context
+            system_prompt: Optional system prompt
+            model: Model name (optional, uses the provider default if not provided)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            queue_key: Fairness key for the rate limiter queue
+            history: Optional earlier turns as {role, content}, oldest first
+            conversation_summary: Optional summary of turns older than history
+            
+        Returns:
+            Generated response
+        """
+        with tracer.start_as_current_span("llm.generate") as span:
+            span.set_attribute("llm.provider", provider.lower())
+            span.set_attribute("llm.model", model or DEFAULT_MODELS.get(provider.lower(), ""))
+            span.set_attribute("llm.history_turns", len(history or []))
+            return self._dispatch(
+                provider, query, context, system_prompt, model, temperature, max_tokens, queue_key,
+                history, conversation_summary
+            )
+    
+    def _dispatch(
+        self,
+        provider: str,
+        query: str,
+        context: Optional[str],
+        system_prompt: Optional[str],
+        model: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        queue_key: Optional[str],
+        history: Optional[List[Dict[str, str]]] = None,
+        conversation_summary: Optional[str] = None
+    ) -> str:
+        """Call the provider-specific generation method"""
         if provider.lower() == "openai":
-            model = model or kwargs.get("model", "gpt-3.5-turbo")
             return self.generate_openai_response(
                 query=query,
                 context=context,
                 system_prompt=system_prompt,
-                model=model,
-                temperature=kwargs.get("temperature", 0.7),
-                max_tokens=kwargs.get("max_tokens", 1000)
+                model=model or DEFAULT_MODELS["openai"],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                queue_key=queue_key,
+                history=history,
+                conversation_summary=conversation_summary
             )
         elif provider.lower() == "gemini":
-            model = model or kwargs.get("model", "gemini-pro")
             return self.generate_gemini_response(
                 query=query,
                 context=context,
                 system_prompt=system_prompt,
-                model=model,
-                temperature=kwargs.get("temperature", 0.7)
+                model=model or DEFAULT_MODELS["gemini"],
+                temperature=temperature,
+                queue_key=queue_key,
+                history=history,
+                conversation_summary=conversation_summary
             )
         else:
             raise ValueError(f"Unsupported LLM provider: {provider}")
-
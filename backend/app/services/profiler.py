@@ -0,0 +1,141 @@
+"""
+In-process sampling profiler and allocation snapshots
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+# Only one profile or allocation capture may run per process at a time
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    """Format a frame as 'function (path:line)' for collapsed stacks"""
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over all threads of the current process"""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks: Counter = Counter()
+
+    def _sample(self, own_ident: int) -> None:
+        thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(thread_names.get(ident, f"thread-{ident}"))
+
+            # Collapsed stacks are ordered root first
+            self._stacks[";".join(reversed(stack))] += 1
+
+        self.samples += 1
+
+    def run(self, duration: float) -> None:
+        """
+        Sample every thread's stack until the duration elapses
+
+        Args:
+            duration: Seconds to profile
+        """
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            self._sample(own_ident)
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """
+        Render samples in the collapsed-stack format used by flamegraph.pl and speedscope
+
+        Returns:
+            One 'frame;frame;frame count' line per distinct stack
+        """
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self._stacks.most_common()
+        ) + "\n"
+
+
+def profile_process(duration: float, interval: float) -> str:
+    """
+    Profile the process for a fixed time
+
+    Args:
+        duration: Seconds to profile
+        interval: Seconds between samples
+
+    Returns:
+        Collapsed-stack profile
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        profiler = SamplingProfiler(interval=interval)
+        profiler.run(duration)
+        return profiler.collapsed()
+    finally:
+        _profile_lock.release()
+
+
+def capture_allocations(duration: float, limit: int = 25, frames: int = 1) -> List[Dict[str, Any]]:
+    """
+    Report the top allocation sites that grew during a time window
+
+    Args:
+        duration: Seconds between the two snapshots
+        limit: Number of allocation sites to return
+        frames: Traceback depth recorded per allocation (only applies if
+            tracemalloc is not already running)
+
+    Returns:
+        List of allocation sites with size and count deltas
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if started_here:
+            tracemalloc.start(frames)
+
+        before = tracemalloc.take_snapshot()
+        time.sleep(duration)
+        after = tracemalloc.take_snapshot()
+
+        key_type = "traceback" if tracemalloc.get_traceback_limit() > 1 else "lineno"
+        stats = after.compare_to(before, key_type)
+
+        return [
+            {
+                "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff
+            }
+            for stat in stats[:limit]
+        ]
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _profile_lock.release()
+
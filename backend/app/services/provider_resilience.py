@@ -0,0 +1,391 @@
+"""
+Resilience helpers for outbound provider calls: retries, circuit breakers and hedging
+"""
+import contextvars
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+from app.core.config import settings
+from app.core.metrics import PROVIDER_REQUEST_DURATION, PROVIDER_REQUEST_ERRORS
+from app.services.instrumentation import record_provider_call
+
+T = TypeVar("T")
+
+# Minimum number of latency samples before the percentile is trusted as a hedge deadline
+MIN_LATENCY_SAMPLES = 20
+
+# HTTP status codes that indicate a transient provider-side failure
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider circuit is open and the call is short-circuited"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current circuit state"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may proceed
+
+        Returns:
+            True if the circuit is closed, or if this call is the half-open probe
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+
+            # Let exactly one probe through once the reset timeout has elapsed
+            if self._probe_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """End a half-open probe without a verdict, leaving the state unchanged"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failed call and open the circuit once the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a successful call"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Get a latency percentile from the rolling window
+
+        Args:
+            fraction: Percentile as a fraction (e.g. 0.95)
+
+        Returns:
+            Latency in seconds, or None if there are too few samples
+        """
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return ordered[index]
+
+
+_registry_lock = threading.Lock()
+_circuit_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_latency_trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+_executor = ThreadPoolExecutor(
+    max_workers=settings.LLM_HEDGE_MAX_WORKERS,
+    thread_name_prefix="provider-call"
+)
+# run_with_timeout blocks on its future; calls made from a provider-call thread
+# (e.g. a hedged request) must not wait on a second slot of the same pool
+_timeout_executor = ThreadPoolExecutor(
+    max_workers=settings.LLM_HEDGE_MAX_WORKERS,
+    thread_name_prefix="provider-timeout"
+)
+
+
+def _submit(func: Callable[[], T], executor: ThreadPoolExecutor = _executor):
+    """Submit to a provider pool, carrying over the caller's context variables"""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, func)
+
+
+def get_circuit_breaker(provider: str, model: str) -> CircuitBreaker:
+    """Get the shared circuit breaker for a provider/model pair"""
+    key = (provider.lower(), model)
+    with _registry_lock:
+        breaker = _circuit_breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_CIRCUIT_RESET_TIMEOUT
+            )
+            _circuit_breakers[key] = breaker
+        return breaker
+
+
+def get_latency_tracker(provider: str, model: str) -> LatencyTracker:
+    """Get the shared latency tracker for a provider/model pair"""
+    key = (provider.lower(), model)
+    with _registry_lock:
+        tracker = _latency_trackers.get(key)
+        if tracker is None:
+            tracker = LatencyTracker()
+            _latency_trackers[key] = tracker
+        return tracker
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    """Extract an HTTP status code from an OpenAI or Google API exception"""
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    Decide whether a provider error is transient and worth retrying
+
+    Args:
+        exc: Exception raised by the provider SDK
+
+    Returns:
+        True for timeouts, connection errors, rate limits and 5xx responses
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+
+    # OpenAI SDK connection and timeout errors carry no status code
+    if type(exc).__name__ in {"APIConnectionError", "APITimeoutError", "DeadlineExceeded", "ServiceUnavailable"}:
+        return True
+
+    status_code = _status_code(exc)
+    return status_code in RETRYABLE_STATUS_CODES
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse rate-limit durations such as '20ms', '1.5s', '6m0s' or plain seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r"([\d.]+)(ms|s|m|h)", value)
+    if not parts:
+        return None
+
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """
+    Read the server-advertised retry delay from a rate-limited response
+
+    Args:
+        exc: Exception raised by the provider SDK
+
+    Returns:
+        Delay in seconds, or None if the response carries no hint
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        parsed = _parse_duration(retry_after_ms)
+        if parsed is not None:
+            return parsed / 1000.0
+
+    for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(header)
+        if value:
+            parsed = _parse_duration(value)
+            if parsed is not None:
+                return parsed
+
+    return None
+
+
+def call_with_retries(
+    func: Callable[[], T],
+    provider: str,
+    model: str,
+    acquire: Optional[Callable[[], Any]] = None
+) -> T:
+    """
+    Call a provider with jittered exponential backoff behind its circuit breaker
+
+    Args:
+        func: Zero-argument callable performing one provider request
+        provider: Provider name used to key the circuit breaker
+        model: Model name used to key the circuit breaker
+        acquire: Optional rate limiter wait run before each attempt, outside
+            the timed section so queueing does not count as provider latency
+
+    Returns:
+        Result of the first successful call
+    """
+    breaker = get_circuit_breaker(provider, model)
+    tracker = get_latency_tracker(provider, model)
+    attempt = 0
+
+    while True:
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"Circuit open for {provider}/{model}")
+
+        if acquire is not None:
+            try:
+                acquire()
+            except Exception:
+                breaker.release_probe()
+                raise
+
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception as e:
+            PROVIDER_REQUEST_ERRORS.labels(
+                provider=provider,
+                model=model,
+                reason=str(_status_code(e) or type(e).__name__)
+            ).inc()
+            retryable = is_retryable(e)
+            if retryable:
+                breaker.record_failure()
+            else:
+                # Client errors say nothing about provider health
+                breaker.release_probe()
+
+            if not retryable or attempt >= settings.LLM_MAX_RETRIES:
+                raise
+
+            backoff = settings.LLM_RETRY_BASE_DELAY * (2 ** attempt)
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = random.uniform(0, backoff)
+            time.sleep(min(delay, settings.LLM_RETRY_MAX_DELAY))
+            attempt += 1
+            continue
+
+        latency = time.perf_counter() - start
+        breaker.record_success()
+        tracker.record(latency)
+        record_provider_call(latency)
+        PROVIDER_REQUEST_DURATION.labels(provider=provider, model=model).observe(latency)
+        return result
+
+
+def run_with_timeout(func: Callable[[], T], timeout: float) -> T:
+    """
+    Run a blocking call and stop waiting for it after a timeout
+
+    Used for SDKs that do not accept a per-request timeout. The underlying
+    call keeps running in the worker thread; only the caller is released.
+
+    Args:
+        func: Zero-argument callable
+        timeout: Seconds to wait for the result
+
+    Returns:
+        Result of the call
+    """
+    future = _submit(func, _timeout_executor)
+    return future.result(timeout=timeout)
+
+
+def hedge_delay_for(provider: str, model: str) -> float:
+    """
+    Get the deadline after which a backup request is fired
+
+    Args:
+        provider: Primary provider name
+        model: Primary model name
+
+    Returns:
+        Observed latency percentile in seconds, or the configured default
+    """
+    observed = get_latency_tracker(provider, model).percentile(settings.LLM_HEDGE_PERCENTILE)
+    if observed is None:
+        return settings.LLM_HEDGE_DEFAULT_DELAY
+    return max(observed, settings.LLM_HEDGE_MIN_DELAY)
+
+
+def hedged_call(primary: Callable[[], T], backup: Callable[[], T], hedge_delay: float) -> T:
+    """
+    Run a primary call and race a backup call against it after a deadline
+
+    The backup is also used immediately if the primary fails before the
+    deadline. The first successful result wins; the slower call is left to
+    finish in the background.
+
+    Args:
+        primary: Zero-argument callable for the preferred provider
+        backup: Zero-argument callable for the fallback provider
+        hedge_delay: Seconds to wait on the primary before firing the backup
+
+    Returns:
+        Result of whichever call succeeds first
+    """
+    primary_future = _submit(primary)
+    done, _ = wait([primary_future], timeout=hedge_delay)
+
+    if done and primary_future.exception() is None:
+        return primary_future.result()
+
+    backup_future = _submit(backup)
+    pending = {backup_future} if done else {primary_future, backup_future}
+    errors: Dict[Any, BaseException] = {}
+    if done:
+        errors[primary_future] = primary_future.exception()
+
+    while pending:
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            if future.exception() is None:
+                return future.result()
+            errors[future] = future.exception()
+
+    # Both calls failed; surface the primary provider's error
+    raise errors.get(primary_future) or errors[backup_future]
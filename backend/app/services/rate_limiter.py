@@ -0,0 +1,267 @@
+"""
+Client-side rate limiting for provider calls
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Mapping, Optional, Tuple
+from app.core.config import settings
+from app.services.instrumentation import record_queue_wait
+from app.services.provider_resilience import _status_code
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request waits longer than the configured queueing limit"""
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Cheaply estimate the token count of a text
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Approximate token count (about four characters per token)
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Token bucket that refills continuously up to a per-minute capacity"""
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / 60.0)
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Get the time until an amount can be consumed
+
+        Amounts larger than the capacity only wait for a full bucket and
+        then run the balance into debt, so oversized requests still proceed.
+
+        Args:
+            amount: Tokens required
+
+        Returns:
+            Seconds to wait, 0 if the amount is available now
+        """
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        if needed <= 0:
+            return 0.0
+        return needed * 60.0 / self.capacity
+
+    def consume(self, amount: float) -> None:
+        """Take tokens from the bucket (may go negative)"""
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens to the bucket"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """
+        Align the bucket with limits reported by the provider
+
+        Args:
+            limit: Per-minute limit from the response headers
+            remaining: Remaining budget from the response headers
+        """
+        self._refill()
+        if limit and limit > 0:
+            self.capacity = float(limit)
+        if remaining is not None:
+            # Never raise the local balance; in-flight requests are not yet counted upstream
+            self.tokens = min(self.tokens, float(remaining))
+
+    def drain(self) -> None:
+        """Empty the bucket after the provider rejected a request"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter with fair per-workflow queueing"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        # Waiting tickets grouped by queue key; the first key is served next
+        self._queues: "OrderedDict[str, Deque[object]]" = OrderedDict()
+
+    def _is_next(self, queue_key: str, ticket: object) -> bool:
+        first_key = next(iter(self._queues))
+        return first_key == queue_key and self._queues[queue_key][0] is ticket
+
+    def _leave(self, queue_key: str, ticket: object, served: bool) -> None:
+        queue = self._queues[queue_key]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[queue_key]
+        elif served:
+            # Round-robin: the next request from this workflow goes behind other workflows
+            self._queues.move_to_end(queue_key)
+
+    def acquire(
+        self,
+        estimated_tokens: int,
+        queue_key: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> float:
+        """
+        Block until the request fits in the rate budget
+
+        Args:
+            estimated_tokens: Estimated prompt plus completion tokens
+            queue_key: Fairness key (usually the workflow ID)
+            timeout: Maximum seconds to queue (defaults to RATE_LIMIT_MAX_WAIT)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return 0.0
+
+        queue_key = queue_key or "default"
+        timeout = settings.RATE_LIMIT_MAX_WAIT if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        ticket = object()
+        served = False
+
+        with self._cond:
+            self._queues.setdefault(queue_key, deque()).append(ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._is_next(queue_key, ticket):
+                        wait = max(
+                            self.requests.wait_time(1),
+                            self.tokens.wait_time(estimated_tokens)
+                        )
+                        if wait <= 0:
+                            self.requests.consume(1)
+                            self.tokens.consume(estimated_tokens)
+                            served = True
+                            waited = time.monotonic() - start
+                            record_queue_wait(waited)
+                            return waited
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitExceeded(
+                            f"Rate limit queue wait exceeded {timeout:.0f}s"
+                        )
+                    self._cond.wait(timeout=min(wait, remaining) if wait else remaining)
+            finally:
+                self._leave(queue_key, ticket, served)
+                self._cond.notify_all()
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Correct the token budget once actual usage is known
+
+        Args:
+            estimated_tokens: Tokens reserved by acquire()
+            actual_tokens: Tokens reported by the provider
+        """
+        if actual_tokens is None:
+            return
+        with self._cond:
+            difference = estimated_tokens - actual_tokens
+            if difference > 0:
+                self.tokens.refund(difference)
+            elif difference < 0:
+                self.tokens.consume(-difference)
+            self._cond.notify_all()
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """
+        Adapt the buckets to x-ratelimit-* response headers
+
+        Args:
+            headers: Response headers from the provider
+        """
+        if not headers:
+            return
+
+        def number(name: str) -> Optional[float]:
+            value = headers.get(name)
+            if value is None:
+                return None
+            try:
+                return float(value)
+            except ValueError:
+                return None
+
+        with self._cond:
+            self.requests.sync(
+                number("x-ratelimit-limit-requests"),
+                number("x-ratelimit-remaining-requests")
+            )
+            self.tokens.sync(
+                number("x-ratelimit-limit-tokens"),
+                number("x-ratelimit-remaining-tokens")
+            )
+            self._cond.notify_all()
+
+    def observe_error(self, exc: Exception) -> None:
+        """
+        Back off the local budget when the provider returns 429
+
+        Args:
+            exc: Exception raised by the provider SDK
+        """
+        if _status_code(exc) != 429:
+            return
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+        with self._cond:
+            # Remaining-token headers drain the token bucket when that budget was the cause
+            self.update_from_headers(headers)
+            self.requests.drain()
+
+
+_limiters_lock = threading.Lock()
+_limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+
+
+def _default_limits(provider: str) -> Tuple[int, int]:
+    if provider == "gemini":
+        return settings.GEMINI_REQUESTS_PER_MINUTE, settings.GEMINI_TOKENS_PER_MINUTE
+    return settings.OPENAI_REQUESTS_PER_MINUTE, settings.OPENAI_TOKENS_PER_MINUTE
+
+
+def get_rate_limiter(provider: str, model: str) -> ProviderRateLimiter:
+    """
+    Get the process-wide rate limiter for a provider/model pair
+
+    Args:
+        provider: Provider name (openai or gemini)
+        model: Model name
+
+    Returns:
+        Shared ProviderRateLimiter
+    """
+    key = (provider.lower(), model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = _default_limits(key[0])
+            limiter = ProviderRateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[key] = limiter
+        return limiter
@@ -0,0 +1,360 @@
+"""
+Knowledge base re-indexing into a shadow collection
+
+A re-index re-chunks every document's stored extracted text (documents
+uploaded before text was stored are extracted once more and backfilled),
+embeds it with the new settings and writes it to a new collection while
+queries keep using the current one. Once every document is indexed, the
+registry row is pointed at the new collection by one conditional UPDATE,
+and the old collection is deleted KB_SWAP_GRACE_SECONDS later. A knowledge
+base stored as a partition of a shared collection always moves to a
+dedicated collection; only its partition is deleted.
+
+Uploads and deletes made while a re-index runs are caught up by
+comparing the knowledge base's documents with those indexed: just before
+the swap (repeated while each pass finds changes), and once more when the
+old collection is retired, since processes with a stale registry keep
+writing to it until then. Documents caught up then are indexed afresh,
+replacing any chunks they already wrote to the new collection.
+"""
+import json
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+import chromadb
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import undefer
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.models.knowledgebase import KnowledgeBase
+from app.services.embedding_service import EmbeddingService
+from app.services.ingestion import DocumentIngestionService, PIECE_SEPARATOR, TextCompressor, decompress_text
+from app.services.knowledgebase_registry import (
+    base_collection_name, content_version_bump, invalidate_registry, is_shared_collection
+)
+from app.services.retrieval_filters import chunk_metadata
+from app.services.text_extractor import TextExtractor
+from app.services.vector_store import VectorStoreService
+
+# Catch-up passes before the swap; uploads completing after the last one are caught up at retirement
+CATCH_UP_PASSES = 3
+
+
+@dataclass
+class ReindexJob:
+    """Progress of one knowledge base re-index"""
+    id: str
+    knowledgebase_id: str
+    collection_name: str
+    status: str = "pending"  # pending, running, completed, failed
+    total_documents: int = 0
+    processed_documents: int = 0
+    chunks_stored: int = 0
+    version: Optional[int] = None  # Registry version serving the new index once completed
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+
+_jobs: "OrderedDict[str, ReindexJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def create_reindex_job(knowledgebase_id: str, collection_name: str) -> Optional[ReindexJob]:
+    """
+    Register a re-index job
+
+    Returns:
+        The job, or None if this process is already re-indexing the collection
+    """
+    with _jobs_lock:
+        for existing in _jobs.values():
+            if (existing.knowledgebase_id, existing.collection_name) == (knowledgebase_id, collection_name) \
+                    and existing.finished_at is None:
+                return None
+        job = ReindexJob(id=uuid.uuid4().hex, knowledgebase_id=knowledgebase_id, collection_name=collection_name)
+        _jobs[job.id] = job
+        finished = [job_id for job_id, existing in _jobs.items() if existing.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - settings.IMPORT_JOB_HISTORY)]:
+            del _jobs[job_id]
+    return job
+
+
+def get_reindex_job(job_id: str) -> Optional[ReindexJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+class ReindexService:
+    """Service for rebuilding a knowledge base's index without downtime"""
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        vector_store: Optional[VectorStoreService] = None
+    ):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_store = vector_store or VectorStoreService()
+
+    def run(self, job: ReindexJob, config: Dict[str, Any]) -> None:
+        """
+        Re-index a knowledge base and swap it over to the new collection
+
+        Args:
+            job: Job to report progress on
+            config: New chunk_size, embedding_provider and/or embedding_model;
+                unset keys keep the knowledge base's current settings
+        """
+        job.status = "running"
+        shadow_name = None
+        try:
+            row_id, version, active_collection, current_config = self._register(job)
+            new_config = {**current_config, **{key: value for key, value in config.items() if value is not None}}
+
+            # Keep the distance of the collection being replaced
+            active = self.vector_store.get_or_create_physical(active_collection, job.knowledgebase_id)
+            distance = (active.metadata or {}).get("hnsw:space")
+            # Unique per job so concurrent re-indexes never share a collection;
+            # kept short because Chroma limits names to 63 characters
+            shadow_name = f"kb{row_id}_v{version + 1}_{job.id[:8]}"
+            shadow = self.vector_store.get_or_create_physical(shadow_name, job.knowledgebase_id, distance)
+
+            indexed: Set[int] = set()
+            metadata_updates = self._index_documents(job, shadow, new_config, indexed)
+            for _ in range(CATCH_UP_PASSES):
+                updates, changed = self._catch_up(job, shadow, new_config, indexed)
+                metadata_updates.extend(updates)
+                if not changed:
+                    break
+
+            with SessionLocal() as db:
+                swapped = db.execute(
+                    update(KnowledgeBase)
+                    .where(KnowledgeBase.id == row_id, KnowledgeBase.version == version)
+                    .values(active_collection=shadow_name, version=version + 1, config=new_config)
+                ).rowcount
+                if not swapped:
+                    db.rollback()
+                    raise RuntimeError("Knowledge base was re-indexed concurrently")
+                if metadata_updates:
+                    db.execute(update(Document), metadata_updates)
+                db.execute(content_version_bump(job.knowledgebase_id))
+                db.commit()
+            invalidate_registry()
+
+            # Other processes may route to the old collection until their registry cache expires
+            if is_shared_collection(active_collection):
+                retire = self.vector_store.delete_partition
+                retire_args = [active_collection, base_collection_name(job.collection_name, job.knowledgebase_id)]
+            else:
+                retire, retire_args = self.vector_store.delete_physical, [active_collection]
+            timer = threading.Timer(
+                settings.KB_SWAP_GRACE_SECONDS,
+                self._retire,
+                [job, shadow, new_config, indexed, retire, retire_args]
+            )
+            timer.daemon = True
+            timer.start()
+
+            job.version = version + 1
+            job.status = "completed"
+        except Exception as e:
+            print(f"Error re-indexing knowledge base {job.knowledgebase_id}: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+            if shadow_name is not None:
+                self.vector_store.delete_physical(shadow_name)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+
+    def _register(self, job: ReindexJob) -> Tuple[int, int, str, Dict[str, Any]]:
+        """Get or create the registry row; returns (row ID, version, active collection, config)"""
+        base = base_collection_name(job.collection_name, job.knowledgebase_id)
+        with SessionLocal() as db:
+            db.execute(
+                pg_insert(KnowledgeBase).values(
+                    knowledgebase_id=job.knowledgebase_id,
+                    base_collection=base,
+                    active_collection=base,
+                    version=1,
+                    config={}
+                ).on_conflict_do_nothing(index_elements=[KnowledgeBase.base_collection])
+            )
+            db.commit()
+            row = db.query(
+                KnowledgeBase.id, KnowledgeBase.version, KnowledgeBase.active_collection, KnowledgeBase.config
+            ).filter(KnowledgeBase.base_collection == base).one()
+        return row.id, row.version, row.active_collection, row.config or {}
+
+    def _retire(
+        self,
+        job: ReindexJob,
+        collection: chromadb.Collection,
+        config: Dict[str, Any],
+        indexed: Set[int],
+        retire: Callable[..., bool],
+        retire_args: List[Any]
+    ) -> None:
+        """Catch up with changes that reached the old collection during the grace period, then delete it"""
+        try:
+            metadata_updates, changed = self._catch_up(job, collection, config, indexed)
+            if changed:
+                with SessionLocal() as db:
+                    if metadata_updates:
+                        db.execute(update(Document), metadata_updates)
+                    db.execute(content_version_bump(job.knowledgebase_id))
+                    db.commit()
+        except Exception as e:
+            print(f"Error catching up re-indexed knowledge base {job.knowledgebase_id}: {str(e)}")
+        retire(*retire_args)
+
+    def _catch_up(
+        self,
+        job: ReindexJob,
+        collection: chromadb.Collection,
+        config: Dict[str, Any],
+        indexed: Set[int]
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Index documents completed since they were last looked for and drop deleted ones
+
+        Args:
+            indexed: IDs of the documents in the collection, updated in place
+
+        Returns:
+            Document metadata_json updates, and whether anything changed
+        """
+        with SessionLocal() as db:
+            rows = db.query(Document.id, Document.processed).filter(
+                Document.knowledgebase_id == job.knowledgebase_id
+            ).all()
+        existing = {row.id for row in rows}
+        completed = {row.id for row in rows if row.processed == "completed"}
+
+        deleted = sorted(indexed - existing)
+        added = sorted(completed - indexed)
+        stale = deleted + added
+        if stale:
+            # Added documents may have written chunks of their own once the collection was active
+            collection.delete(where={"document_id": {"$in": stale}})
+        indexed.difference_update(deleted)
+
+        metadata_updates = self._index_documents(job, collection, config, indexed, added) if added else []
+        return metadata_updates, bool(stale)
+
+    def _index_documents(
+        self,
+        job: ReindexJob,
+        collection: chromadb.Collection,
+        config: Dict[str, Any],
+        indexed: Set[int],
+        document_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Chunk, embed and store completed documents of the knowledge base
+
+        Args:
+            indexed: IDs of the indexed documents, added to as documents are stored
+            document_ids: Documents to index (default: every completed document)
+
+        Returns:
+            Document metadata_json updates to apply when the index is swapped
+        """
+        chunk_size = config.get("chunk_size")
+        provider = config.get("embedding_provider", "openai")
+        model = config.get("embedding_model")
+        in_flight: Deque[Tuple[List[tuple], Future]] = deque()
+        metadata_updates: List[Dict[str, Any]] = []
+
+        def generate(records: List[tuple]) -> np.ndarray:
+            return self.embedding_service.generate_embeddings(
+                [text for _, _, text in records],
+                provider=provider,
+                model=model,
+                queue_key=job.id
+            )
+
+        def drain(limit: int) -> None:
+            while len(in_flight) > limit:
+                records, future = in_flight.popleft()
+                self.vector_store.add_to_collection(
+                    collection,
+                    texts=[text for _, _, text in records],
+                    embeddings=future.result(),
+                    metadatas=[
+                        {**base_metadata, "chunk_index": chunk_index}
+                        for base_metadata, chunk_index, _ in records
+                    ]
+                )
+                job.chunks_stored += len(records)
+
+        filters = [Document.knowledgebase_id == job.knowledgebase_id, Document.processed == "completed"]
+        if document_ids is not None:
+            filters.append(Document.id.in_(document_ids))
+            job.total_documents += len(document_ids)
+        else:
+            with SessionLocal() as db:
+                job.total_documents = db.query(Document).filter(*filters).count()
+
+        records: List[tuple] = []
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=settings.IMPORT_EMBED_WORKERS, thread_name_prefix="reindex-embed") as pool:
+            while True:
+                with SessionLocal() as db:
+                    documents = db.query(Document).options(undefer(Document.extracted_text)).filter(
+                        *filters, Document.id > last_id
+                    ).order_by(Document.id).limit(settings.REINDEX_DOCUMENT_BATCH_SIZE).all()
+                if not documents:
+                    break
+
+                for document in documents:
+                    last_id = document.id
+                    chunks = DocumentIngestionService.chunk_text(self._document_text(document), chunk_size)
+                    # Rebuilt from the row, so chunks stored before upload dates and tags were indexed gain them
+                    base_metadata = chunk_metadata(document.id, document.filename, document.created_at, document.tags)
+                    for chunk_index, text in enumerate(chunks):
+                        records.append((base_metadata, chunk_index, text))
+                        if len(records) == settings.IMPORT_EMBED_BATCH_SIZE:
+                            in_flight.append((records, pool.submit(generate, records)))
+                            records = []
+                            # Keep each embed worker busy, but no more batches than that in memory
+                            drain(settings.IMPORT_EMBED_WORKERS)
+
+                    metadata = json.loads(document.metadata_json) if document.metadata_json else {}
+                    metadata.update({"chunks": len(chunks), "embedding_provider": provider})
+                    if model:
+                        metadata["embedding_model"] = model
+                    metadata_updates.append({"id": document.id, "metadata_json": json.dumps(metadata)})
+                    indexed.add(document.id)
+                    job.processed_documents += 1
+                    job.total_documents = max(job.total_documents, job.processed_documents)
+
+            if records:
+                in_flight.append((records, pool.submit(generate, records)))
+            drain(0)
+
+        return metadata_updates
+
+    def _document_text(self, document: Document) -> str:
+        """Stored text of a document, extracting and storing it if it predates text storage"""
+        if document.extracted_text is not None:
+            return decompress_text(document.extracted_text)
+
+        compressor = TextCompressor()
+        pieces = []
+        for piece in TextExtractor.iter_pages(document.file_path, document.file_type):
+            compressor.add(piece)
+            pieces.append(piece)
+        with SessionLocal() as db:
+            db.execute(
+                update(Document).where(Document.id == document.id).values(extracted_text=compressor.finish())
+            )
+            db.commit()
+        return PIECE_SEPARATOR.join(pieces)
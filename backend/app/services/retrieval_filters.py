@@ -0,0 +1,192 @@
+"""
+Metadata filters for knowledgebase retrieval
+
+A knowledgebase component's config may carry a "filters" object:
+
+    document_ids      only chunks of these documents
+    filename_pattern  case-insensitive glob on the filename, e.g. "manual_*.pdf"
+    uploaded_after    ISO 8601 date or time; documents uploaded at or after it
+    uploaded_before   ISO 8601 date or time; documents uploaded before it
+    tags              tags given at upload; chunks must carry all of them
+
+Filters become a Chroma where clause over chunk metadata, which Chroma
+evaluates before the vector search, so only matching chunks are
+candidates. Chroma has no pattern operator, so a filename pattern is
+resolved to document IDs in the database first.
+
+Chunks stored before upload dates and tags were recorded in chunk
+metadata match no date or tag filter until their knowledge base is
+re-indexed.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.database import SessionLocal
+from app.models.document import Document
+
+FILTER_KEYS = ("document_ids", "filename_pattern", "uploaded_after", "uploaded_before", "tags")
+TAG_PREFIX = "tag:"
+MAX_TAG_LENGTH = 100
+
+
+class NoMatchingDocuments(Exception):
+    """Raised when the filters exclude every document, so there is nothing to search"""
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Strip tags and drop empty and repeated ones, keeping their order"""
+    normalized: List[str] = []
+    for tag in tags:
+        tag = tag.strip()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+def parse_tags(raw: Optional[str]) -> List[str]:
+    """
+    Parse comma-separated tags from a form field
+
+    Raises:
+        ValueError: If a tag is longer than MAX_TAG_LENGTH
+    """
+    tags = normalize_tags((raw or "").split(","))
+    for tag in tags:
+        if len(tag) > MAX_TAG_LENGTH:
+            raise ValueError(f"Tag exceeds {MAX_TAG_LENGTH} characters: {tag[:20]}...")
+    return tags
+
+
+def chunk_metadata(
+    document_id: Optional[int],
+    filename: str,
+    uploaded_at: Optional[datetime],
+    tags: Optional[Iterable[str]]
+) -> Dict[str, Any]:
+    """
+    Metadata every chunk of a document carries (chunk_index is added per chunk)
+
+    Args:
+        document_id: Document ID
+        filename: Original filename
+        uploaded_at: Upload time, stored as epoch seconds for range filters
+        tags: Upload tags, stored as one "tag:<name>": 1 key each
+    """
+    metadata: Dict[str, Any] = {"document_id": document_id, "filename": filename}
+    if uploaded_at is not None:
+        metadata["uploaded_at"] = _epoch(uploaded_at)
+    for tag in tags or []:
+        # Integers rather than booleans, which Chroma's where clauses compare less reliably
+        metadata[f"{TAG_PREFIX}{tag}"] = 1
+    return metadata
+
+
+def _epoch(value: datetime) -> int:
+    # Naive datetimes are taken as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _parse_time(value: Any) -> int:
+    if isinstance(value, datetime):
+        return _epoch(value)
+    return _epoch(datetime.fromisoformat(str(value)))
+
+
+def validate_filters(filters: Any) -> Optional[str]:
+    """
+    Check a knowledgebase component's filters
+
+    Returns:
+        Error message, or None if the filters are valid
+    """
+    if filters is None:
+        return None
+    if not isinstance(filters, dict):
+        return "filters must be an object"
+
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        return f"Unknown filters: {', '.join(sorted(unknown))}"
+
+    document_ids = filters.get("document_ids")
+    if document_ids is not None and (
+        not isinstance(document_ids, list)
+        or not all(isinstance(document_id, int) and not isinstance(document_id, bool) for document_id in document_ids)
+    ):
+        return "document_ids must be a list of integers"
+
+    pattern = filters.get("filename_pattern")
+    if pattern is not None and not isinstance(pattern, str):
+        return "filename_pattern must be a string"
+
+    for key in ("uploaded_after", "uploaded_before"):
+        if filters.get(key) is not None:
+            try:
+                _parse_time(filters[key])
+            except ValueError:
+                return f"{key} must be an ISO 8601 date or time"
+
+    tags = filters.get("tags")
+    if tags is not None and (not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags)):
+        return "tags must be a list of strings"
+
+    return None
+
+
+def _filename_like(pattern: str) -> str:
+    """Translate a glob pattern to a LIKE pattern escaped with a backslash"""
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def build_where(knowledgebase_id: str, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate a knowledgebase component's filters into a Chroma where clause
+
+    Args:
+        knowledgebase_id: Knowledgebase component ID
+        filters: Filters from the component config (validated by validate_filters)
+
+    Returns:
+        Where clause, or None if nothing is filtered
+
+    Raises:
+        NoMatchingDocuments: If the document IDs or filename pattern leave no documents
+    """
+    if not filters:
+        return None
+
+    clauses: List[Dict[str, Any]] = []
+
+    document_ids = filters.get("document_ids")
+    if filters.get("filename_pattern"):
+        with SessionLocal() as db:
+            matching = db.query(Document.id).filter(
+                Document.knowledgebase_id == knowledgebase_id,
+                Document.filename.ilike(_filename_like(filters["filename_pattern"]), escape="\\")
+            ).all()
+        matching_ids = [row.id for row in matching]
+        if document_ids is not None:
+            allowed = set(document_ids)
+            matching_ids = [document_id for document_id in matching_ids if document_id in allowed]
+        document_ids = matching_ids
+
+    if document_ids is not None:
+        if not document_ids:
+            raise NoMatchingDocuments()
+        clauses.append({"document_id": {"$in": sorted(set(document_ids))}})
+
+    if filters.get("uploaded_after") is not None:
+        clauses.append({"uploaded_at": {"$gte": _parse_time(filters["uploaded_after"])}})
+    if filters.get("uploaded_before") is not None:
+        clauses.append({"uploaded_at": {"$lt": _parse_time(filters["uploaded_before"])}})
+
+    for tag in normalize_tags(filters.get("tags") or []):
+        clauses.append({f"{TAG_PREFIX}{tag}": 1})
+
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
@@ -3,7 +3,7 @@ Text extraction service for documents
 """
 import fitz  # PyMuPDF
 import os
-from typing import Optional
+from typing import Iterator, Optional
 from app.core.config import settings
 
 
@@ -11,31 +11,95 @@ class TextExtractor:
     """Service for extracting text from documents"""
     
     @staticmethod
-    def extract_from_pdf(file_path: str) -> str:
+    def iter_pdf_pages(file_path: str) -> Iterator[str]:
         """
-        Extract text from PDF file
+        Extract text from PDF file one page at a time
         
         Args:
             file_path: Path to the PDF file
             
-        Returns:
-            Extracted text content
+        Yields:
+            Text of each non-empty page, prefixed with a page marker
         """
         try:
             doc = fitz.open(file_path)
-            text_content = []
-            
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+        
+        try:
             for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
+                try:
+                    text = doc[page_num].get_text()
+                except Exception as e:
+                    raise Exception(f"Error extracting text from PDF: {str(e)}")
                 if text.strip():
-                    text_content.append(f"--- Page {page_num + 1} ---\n{text}\n")
-            
+                    yield f"--- Page {page_num + 1} ---\n{text}\n"
+        finally:
             doc.close()
-            return "\n".join(text_content)
+    
+    @staticmethod
+    def iter_text_blocks(file_path: str, file_type: str) -> Iterator[str]:
+        """
+        Read a text file in blocks that end on paragraph boundaries
         
+        Args:
+            file_path: Path to the file
+            file_type: MIME type or file extension (for error messages)
+            
+        Yields:
+            Blocks of roughly INGESTION_TEXT_BLOCK_SIZE characters; splitting
+            each block on blank lines gives the same paragraphs as splitting
+            the whole file
+        """
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                block = []
+                size = 0
+                for line in f:
+                    block.append(line)
+                    size += len(line)
+                    if size >= settings.INGESTION_TEXT_BLOCK_SIZE and line == "\n":
+                        yield "".join(block)
+                        block = []
+                        size = 0
+                if block:
+                    yield "".join(block)
+        except UnicodeDecodeError:
+            raise ValueError(f"Unsupported file type: {file_type}")
         except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
+            raise Exception(f"Error reading file: {str(e)}")
+    
+    @staticmethod
+    def iter_pages(file_path: str, file_type: str) -> Iterator[str]:
+        """
+        Extract text from a file incrementally, page by page for PDFs
+        
+        Args:
+            file_path: Path to the file
+            file_type: MIME type or file extension
+            
+        Yields:
+            Successive pieces of the extracted text
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        if "pdf" in file_type.lower() or file_path.lower().endswith(".pdf"):
+            return TextExtractor.iter_pdf_pages(file_path)
+        return TextExtractor.iter_text_blocks(file_path, file_type)
+    
+    @staticmethod
+    def extract_from_pdf(file_path: str) -> str:
+        """
+        Extract text from PDF file
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            Extracted text content
+        """
+        return "\n".join(TextExtractor.iter_pdf_pages(file_path))
     
     @staticmethod
     def extract_text(file_path: str, file_type: str) -> str:
@@ -2,21 +2,203 @@
 Vector store service using ChromaDB
 """
 import chromadb
+from chromadb.api import ClientAPI
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Sequence, Set, Tuple, Union
+import threading
+import time
 import uuid
+import numpy as np
+from requests.adapters import HTTPAdapter
 from app.core.config import settings
+from app.core.tracing import tracer
+from app.services.index_residency import index_residency
+from app.services.knowledgebase_registry import (
+    base_collection_name, get_index_state, is_shared_collection, register_collection,
+    shared_collection_name, swap_active_collection
+)
+
+# Embedding matrices from EmbeddingService, or plain vectors
+Embeddings = Union[np.ndarray, Sequence[Sequence[float]]]
+
+# Chunk metadata key naming the knowledge base a shared collection entry belongs
+# to (its base collection name); every read of a partition filters on it
+PARTITION_KEY = "kb_partition"
+
+# Seconds a partition's chunk count is trusted before it is recounted; writes
+# through this process are added to it in between
+PARTITION_COUNT_TTL = 60.0
+
+
+def _chroma_embeddings(embeddings: Embeddings) -> List[List[float]]:
+    """
+    Convert embeddings to the nested lists Chroma's client API validates for
+
+    Chroma 0.4 rejects NumPy arrays and float32 scalars, so matrices are
+    converted here, once per call, rather than anywhere upstream.
+    """
+    return np.asarray(embeddings, dtype=np.float32).tolist()
+
+
+_client: Optional[ClientAPI] = None
+_client_lock = threading.Lock()
+
+# Partitions this process is promoting to dedicated collections
+_promotions: Set[str] = set()
+_promotions_lock = threading.Lock()
+
+# Partition chunk counts and when they were last counted in full
+_partition_counts: Dict[str, Tuple[int, float]] = {}
+_partition_counts_lock = threading.Lock()
+
+
+def _partition_id(partition: str, chunk_id: str) -> str:
+    """Chunk ID as stored in a shared collection, so IDs only need to be unique per partition"""
+    return f"{partition}:{chunk_id}"
+
+
+def _local_id(partition: str, stored_id: str) -> str:
+    """Chunk ID without its partition prefix (chunks stored before IDs were prefixed have none)"""
+    prefix = f"{partition}:"
+    return stored_id[len(prefix):] if stored_id.startswith(prefix) else stored_id
+
+
+def _forget_partition_count(partition: str) -> None:
+    with _partition_counts_lock:
+        _partition_counts.pop(partition, None)
+
+
+def get_chroma_client() -> ClientAPI:
+    """
+    Process-wide Chroma client for CHROMA_MODE
+
+    In embedded mode every process opens CHROMA_DB_PATH and loads its own
+    copy of the HNSW indexes, so it only suits a single worker. In http mode
+    all workers and nodes talk to one Chroma server, which holds the indexes
+    once and serialises writes; requests share a keep-alive pool of
+    CHROMA_HTTP_POOL_SIZE connections.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            chroma_settings = ChromaSettings(anonymized_telemetry=False)
+            if settings.CHROMA_MEMORY_LIMIT_BYTES:
+                # Unload the least recently used indexes instead of keeping every one ever touched
+                chroma_settings = ChromaSettings(
+                    anonymized_telemetry=False,
+                    chroma_segment_cache_policy="LRU",
+                    chroma_memory_limit_bytes=settings.CHROMA_MEMORY_LIMIT_BYTES
+                )
+            if settings.CHROMA_MODE == "http":
+                client = chromadb.HttpClient(
+                    host=settings.CHROMA_HOST,
+                    port=str(settings.CHROMA_PORT),
+                    ssl=settings.CHROMA_SSL,
+                    headers={"Authorization": f"Bearer {settings.CHROMA_AUTH_TOKEN}"} if settings.CHROMA_AUTH_TOKEN else None,
+                    settings=chroma_settings
+                )
+                # Chroma's HTTP API keeps one requests session; size its pool for our
+                # worker threads instead of requests' default of 10 connections
+                session = getattr(getattr(client, "_server", None), "_session", None)
+                if session is not None:
+                    adapter = HTTPAdapter(
+                        pool_connections=1, pool_maxsize=settings.CHROMA_HTTP_POOL_SIZE, pool_block=True
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+            elif settings.CHROMA_MODE == "embedded":
+                client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH, settings=chroma_settings)
+            else:
+                raise ValueError(f"Unknown CHROMA_MODE: {settings.CHROMA_MODE}")
+            _client = client
+        return _client
 
 
 class VectorStoreService:
     """Service for managing vector store operations"""
     
-    def __init__(self):
-        """Initialize ChromaDB client"""
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_DB_PATH,
-            settings=ChromaSettings(anonymized_telemetry=False)
-        )
+    def __init__(self, path: Optional[str] = None, distance: Optional[str] = None, use_registry: bool = True):
+        """
+        Initialize ChromaDB client
+        
+        Args:
+            path: Local storage directory for a private embedded store; by default
+                the process-wide client for CHROMA_MODE is used
+            distance: HNSW distance for new collections (cosine, l2 or ip; Chroma default if omitted)
+            use_registry: Route names through the knowledge base registry (off for scratch stores)
+        """
+        self.distance = distance
+        self.use_registry = use_registry
+        # Private stores keep their own indexes and stay out of the residency ledger
+        self.residency = index_residency if path is None else None
+        if path is not None:
+            self.client = chromadb.PersistentClient(path=path, settings=ChromaSettings(anonymized_telemetry=False))
+        else:
+            self.client = get_chroma_client()
+    
+    def collection_name_for(self, collection_name: str, knowledgebase_id: str) -> str:
+        """Physical collection currently serving a knowledgebase's collection"""
+        return self._resolve(collection_name, knowledgebase_id)[0]
+    
+    def _resolve(
+        self,
+        collection_name: str,
+        knowledgebase_id: str,
+        register: bool = False
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Physical collection serving a knowledgebase, and its partition key if that collection is shared
+        
+        Only writes pass `register`; reads of an unregistered knowledgebase resolve without persisting it.
+        """
+        base = base_collection_name(collection_name, knowledgebase_id)
+        if not self.use_registry:
+            return base, None
+        
+        state = get_index_state(collection_name, knowledgebase_id)
+        if state is None and settings.KB_STORAGE_LAYOUT == "shared":
+            # New knowledge bases start as partitions; ones created before keep their collection
+            active = base if self._exists(base) else shared_collection_name(self.distance)
+            if register:
+                state = register_collection(collection_name, knowledgebase_id, active)
+        else:
+            active = state.active_collection if state else base
+        return active, base if is_shared_collection(active) else None
+    
+    def _exists(self, full_name: str) -> bool:
+        try:
+            self.client.get_collection(name=full_name)
+            return True
+        except Exception:
+            return False
+    
+    def _target(
+        self,
+        collection_name: str,
+        knowledgebase_id: str,
+        register: bool = False
+    ) -> Tuple[chromadb.Collection, Optional[str]]:
+        """Collection serving a knowledgebase, and its partition key if that collection is shared"""
+        full_name, partition = self._resolve(collection_name, knowledgebase_id, register)
+        if partition is not None:
+            return self.get_or_create_physical(full_name, full_name), partition
+        return self.get_or_create_physical(full_name, knowledgebase_id), None
+    
+    @staticmethod
+    def _partition_where(partition: Optional[str], where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Restrict a metadata filter to a partition; Chroma applies it before the vector search"""
+        if partition is None:
+            return where
+        if not where:
+            return {PARTITION_KEY: partition}
+        return {"$and": [{PARTITION_KEY: partition}, where]}
+    
+    def index_config(self, collection_name: str, knowledgebase_id: str) -> Dict[str, Any]:
+        """Chunking and embedding settings a re-index registered for a knowledgebase (empty if none)"""
+        if not self.use_registry:
+            return {}
+        state = get_index_state(collection_name, knowledgebase_id)
+        return state.config if state else {}
     
     def create_collection(self, collection_name: str, knowledgebase_id: str) -> chromadb.Collection:
         """
@@ -27,17 +209,50 @@ class VectorStoreService:
             knowledgebase_id: Knowledgebase component ID
             
         Returns:
-            ChromaDB collection
+            ChromaDB collection (the shared collection if the knowledgebase is a partition)
+        """
+        return self._target(collection_name, knowledgebase_id, register=True)[0]
+    
+    def get_collection(self, collection_name: str, knowledgebase_id: str) -> chromadb.Collection:
         """
-        # Use knowledgebase_id as part of collection name for uniqueness
-        full_name = f"{collection_name}_{knowledgebase_id}"
+        Get the collection serving a knowledgebase without registering it
         
+        Args:
+            collection_name: Name of the collection
+            knowledgebase_id: Knowledgebase component ID
+            
+        Returns:
+            ChromaDB collection (the shared collection if the knowledgebase is a partition)
+        """
+        return self._target(collection_name, knowledgebase_id)[0]
+    
+    def get_or_create_physical(
+        self,
+        full_name: str,
+        knowledgebase_id: str,
+        distance: Optional[str] = None
+    ) -> chromadb.Collection:
+        """
+        Create or get a collection by its physical name
+        
+        Args:
+            full_name: Chroma collection name
+            knowledgebase_id: Knowledgebase component ID
+            distance: HNSW distance if the collection is created (defaults to this store's)
+            
+        Returns:
+            ChromaDB collection
+        """
         try:
             collection = self.client.get_collection(name=full_name)
         except:
-            collection = self.client.create_collection(
+            metadata = {"knowledgebase_id": knowledgebase_id}
+            if distance or self.distance:
+                metadata["hnsw:space"] = distance or self.distance
+            # Another worker sharing the server may have created it meanwhile
+            collection = self.client.get_or_create_collection(
                 name=full_name,
-                metadata={"knowledgebase_id": knowledgebase_id}
+                metadata=metadata
             )
         
         return collection
@@ -47,8 +262,9 @@ class VectorStoreService:
         collection_name: str,
         knowledgebase_id: str,
         texts: List[str],
-        embeddings: List[List[float]],
-        metadatas: Optional[List[Dict[str, Any]]] = None
+        embeddings: Embeddings,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
     ) -> List[str]:
         """
         Add documents to the vector store
@@ -57,24 +273,58 @@ class VectorStoreService:
             collection_name: Name of the collection
             knowledgebase_id: Knowledgebase component ID
             texts: List of text chunks
-            embeddings: List of embedding vectors
+            embeddings: Embedding matrix, one row per text
             metadatas: Optional list of metadata dictionaries
+            ids: Optional document IDs (generated if omitted)
             
         Returns:
             List of document IDs
         """
-        collection = self.create_collection(collection_name, knowledgebase_id)
+        collection, partition = self._target(collection_name, knowledgebase_id, register=True)
+        if partition is None:
+            return self.add_to_collection(collection, texts, embeddings, metadatas, ids)
         
+        metadatas = [
+            {**(metadata or {}), "knowledgebase_id": knowledgebase_id, PARTITION_KEY: partition}
+            for metadata in (metadatas or [None] * len(texts))
+        ]
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        # Partitions share one ID space, e.g. when one export is imported into two of them
+        self.add_to_collection(
+            collection, texts, embeddings, metadatas, [_partition_id(partition, chunk_id) for chunk_id in ids]
+        )
+        if settings.KB_PROMOTION_THRESHOLD:
+            self._maybe_promote(collection, partition, collection_name, knowledgebase_id, len(ids))
+        return ids
+    
+    def add_to_collection(
+        self,
+        collection: chromadb.Collection,
+        texts: List[str],
+        embeddings: Embeddings,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add documents to a specific collection (see add_documents)
+        
+        Returns:
+            List of document IDs
+        """
         # Generate IDs for documents
-        ids = [str(uuid.uuid4()) for _ in texts]
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
         
         # Prepare metadatas
         if metadatas is None:
             metadatas = [{}] * len(texts)
         
+        self._record_access(collection, embeddings, added=len(ids))
+        
         # Add to collection
         collection.add(
-            embeddings=embeddings,
+            embeddings=_chroma_embeddings(embeddings),
             documents=texts,
             metadatas=metadatas,
             ids=ids
@@ -86,7 +336,7 @@ class VectorStoreService:
         self,
         collection_name: str,
         knowledgebase_id: str,
-        query_embedding: List[float],
+        query_embedding: Union[np.ndarray, Sequence[float]],
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -103,20 +353,196 @@ class VectorStoreService:
         Returns:
             Dictionary with results (ids, documents, distances, metadatas)
         """
-        collection = self.create_collection(collection_name, knowledgebase_id)
-        
-        results = collection.query(
+        return self.search_batch(
+            collection_name=collection_name,
+            knowledgebase_id=knowledgebase_id,
             query_embeddings=[query_embedding],
             n_results=n_results,
             where=where
+        )[0]
+    
+    def search_batch(
+        self,
+        collection_name: str,
+        knowledgebase_id: str,
+        query_embeddings: Embeddings,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar documents for several queries in one call
+        
+        Args:
+            collection_name: Name of the collection
+            knowledgebase_id: Knowledgebase component ID
+            query_embeddings: Query embedding matrix, one row per query
+            n_results: Number of results to return per query
+            where: Optional filter metadata
+            
+        Returns:
+            List of result dictionaries (ids, documents, distances, metadatas), one per query
+        """
+        with tracer.start_as_current_span("vector_store.query") as span:
+            span.set_attribute("vector_store.knowledgebase_id", knowledgebase_id)
+            span.set_attribute("vector_store.query_count", len(query_embeddings))
+            span.set_attribute("vector_store.n_results", n_results)
+            
+            collection, partition = self._target(collection_name, knowledgebase_id)
+            span.set_attribute("vector_store.partitioned", partition is not None)
+            self._record_access(collection, query_embeddings)
+            results = collection.query(
+                query_embeddings=_chroma_embeddings(query_embeddings),
+                n_results=n_results,
+                where=self._partition_where(partition, where)
+            )
+        
+        def column(key: str, i: int) -> List[Any]:
+            values = results.get(key)
+            return values[i] if values else []
+        
+        return [
+            {
+                "ids": [_local_id(partition, chunk_id) for chunk_id in column("ids", i)]
+                if partition is not None else column("ids", i),
+                "documents": column("documents", i),
+                "distances": column("distances", i),
+                "metadatas": column("metadatas", i)
+            }
+            for i in range(len(query_embeddings))
+        ]
+    
+    def _record_access(self, collection: chromadb.Collection, embeddings: Embeddings, added: int = 0) -> None:
+        """Note a use of the collection's vector index in the residency ledger"""
+        if self.residency is None:
+            return
+        self.residency.record_access(
+            collection.name,
+            (collection.metadata or {}).get("knowledgebase_id", ""),
+            len(embeddings[0]) if len(embeddings) else 0,
+            collection.count,
+            added=added
         )
+    
+    def count(self, collection_name: str, knowledgebase_id: str) -> int:
+        """
+        Count the documents in a collection
         
-        return {
-            "ids": results["ids"][0] if results["ids"] else [],
-            "documents": results["documents"][0] if results["documents"] else [],
-            "distances": results["distances"][0] if results["distances"] else [],
-            "metadatas": results["metadatas"][0] if results["metadatas"] else []
-        }
+        Args:
+            collection_name: Name of the collection
+            knowledgebase_id: Knowledgebase component ID
+            
+        Returns:
+            Number of stored chunks
+        """
+        collection, partition = self._target(collection_name, knowledgebase_id)
+        if partition is None:
+            return collection.count()
+        return self._partition_count(collection, partition)
+    
+    def is_empty(self, collection_name: str, knowledgebase_id: str) -> bool:
+        """Check that a knowledgebase has no stored chunks (exact, unlike a partition's count)"""
+        collection, partition = self._target(collection_name, knowledgebase_id)
+        if partition is None:
+            return collection.count() == 0
+        return not collection.get(where={PARTITION_KEY: partition}, limit=1, include=[])["ids"]
+    
+    @staticmethod
+    def _partition_count(collection: chromadb.Collection, partition: str, added: int = 0) -> int:
+        """
+        Chunks in a partition, counted in full at most every PARTITION_COUNT_TTL seconds
+        
+        Chroma has no filtered count, so a full count fetches every ID in the
+        partition. In between, chunks added through this process are added to
+        the last count; other processes' writes show up at the next recount.
+        
+        Args:
+            collection: Shared collection
+            partition: Partition key
+            added: Chunks just added to the partition
+        """
+        with _partition_counts_lock:
+            cached = _partition_counts.get(partition)
+            if cached is not None and time.monotonic() - cached[1] < PARTITION_COUNT_TTL:
+                count = cached[0] + added
+                _partition_counts[partition] = (count, cached[1])
+                return count
+        # The full count already includes the chunks just added
+        count = len(collection.get(where={PARTITION_KEY: partition}, include=[])["ids"])
+        with _partition_counts_lock:
+            _partition_counts[partition] = (count, time.monotonic())
+        return count
+    
+    def iter_documents(
+        self,
+        collection_name: str,
+        knowledgebase_id: str,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Read every document of a collection in pages
+        
+        Args:
+            collection_name: Name of the collection
+            knowledgebase_id: Knowledgebase component ID
+            batch_size: Documents per page
+            
+        Yields:
+            Dictionaries with ids, documents, metadatas and embeddings (a float32 matrix)
+        """
+        collection, partition = self._target(collection_name, knowledgebase_id)
+        yield from self._iter_collection(collection, partition, batch_size)
+    
+    @staticmethod
+    def _iter_collection(
+        collection: chromadb.Collection,
+        partition: Optional[str],
+        batch_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Page through a collection, or one partition of it with the partition key removed"""
+        offset = 0
+        while True:
+            page = collection.get(
+                where={PARTITION_KEY: partition} if partition is not None else None,
+                include=["documents", "metadatas", "embeddings"],
+                limit=batch_size,
+                offset=offset
+            )
+            if not page["ids"]:
+                return
+            metadatas = page["metadatas"]
+            ids = page["ids"]
+            if partition is not None:
+                ids = [_local_id(partition, chunk_id) for chunk_id in ids]
+                metadatas = [
+                    {key: value for key, value in (metadata or {}).items() if key != PARTITION_KEY}
+                    for metadata in metadatas
+                ]
+            yield {
+                "ids": ids,
+                "documents": page["documents"],
+                "metadatas": metadatas,
+                "embeddings": np.asarray(page["embeddings"], dtype=np.float32)
+            }
+            offset += len(page["ids"])
+    
+    def delete_documents(
+        self,
+        collection_name: str,
+        knowledgebase_id: str,
+        where: Dict[str, Any]
+    ) -> None:
+        """
+        Delete the documents matching a metadata filter
+        
+        Args:
+            collection_name: Name of the collection
+            knowledgebase_id: Knowledgebase component ID
+            where: Metadata filter, e.g. {"document_id": 3}
+        """
+        collection, partition = self._target(collection_name, knowledgebase_id)
+        collection.delete(where=self._partition_where(partition, where))
+        if partition is not None:
+            _forget_partition_count(partition)
     
     def delete_collection(self, collection_name: str, knowledgebase_id: str) -> bool:
         """
@@ -126,14 +552,156 @@ class VectorStoreService:
             collection_name: Name of the collection
             knowledgebase_id: Knowledgebase component ID
             
+        Returns:
+            True if successful
+        """
+        full_name, partition = self._resolve(collection_name, knowledgebase_id)
+        if partition is not None:
+            return self.delete_partition(full_name, partition)
+        return self.delete_physical(full_name)
+    
+    def delete_physical(self, full_name: str) -> bool:
+        """
+        Delete a collection by its physical name
+        
+        Args:
+            full_name: Chroma collection name
+            
         Returns:
             True if successful
         """
         try:
-            full_name = f"{collection_name}_{knowledgebase_id}"
             self.client.delete_collection(name=full_name)
+            if self.residency is not None:
+                self.residency.forget(full_name)
             return True
         except Exception as e:
             print(f"Error deleting collection: {str(e)}")
             return False
-
+    
+    def delete_partition(self, full_name: str, partition: str) -> bool:
+        """
+        Delete one knowledgebase's chunks from a shared collection
+        
+        Args:
+            full_name: Shared collection name
+            partition: Partition key (the knowledgebase's base collection name)
+            
+        Returns:
+            True if successful
+        """
+        try:
+            self.client.get_collection(name=full_name).delete(where={PARTITION_KEY: partition})
+            _forget_partition_count(partition)
+            return True
+        except Exception as e:
+            print(f"Error deleting partition: {str(e)}")
+            return False
+    
+    def _maybe_promote(
+        self,
+        collection: chromadb.Collection,
+        partition: str,
+        collection_name: str,
+        knowledgebase_id: str,
+        added: int
+    ) -> None:
+        """Start promoting a partition in the background once it reaches KB_PROMOTION_THRESHOLD chunks"""
+        count = self._partition_count(collection, partition, added)
+        if count < settings.KB_PROMOTION_THRESHOLD:
+            return
+        with _promotions_lock:
+            if partition in _promotions:
+                return
+            _promotions.add(partition)
+        
+        def promote() -> None:
+            try:
+                self.promote_partition(collection_name, knowledgebase_id)
+            except Exception as e:
+                print(f"Error promoting knowledge base {knowledgebase_id}: {str(e)}")
+            finally:
+                with _promotions_lock:
+                    _promotions.discard(partition)
+        
+        threading.Thread(target=promote, name=f"kb-promote-{knowledgebase_id}", daemon=True).start()
+    
+    def promote_partition(self, collection_name: str, knowledgebase_id: str) -> bool:
+        """
+        Move a knowledgebase from its shared partition to a dedicated collection
+        
+        Chunks and their embeddings are copied into a new collection, which the
+        registry then switches to. Writes and deletes that still reach the
+        partition while other processes' registries catch up are applied to
+        the new collection before the partition is deleted,
+        KB_SWAP_GRACE_SECONDS after the switch.
+        
+        Args:
+            collection_name: Name of the collection
+            knowledgebase_id: Knowledgebase component ID
+            
+        Returns:
+            True if promoted; False if the knowledgebase is not a partition or
+            was re-indexed or promoted concurrently
+        """
+        state = get_index_state(collection_name, knowledgebase_id)
+        if state is None or not is_shared_collection(state.active_collection):
+            return False
+        
+        partition = base_collection_name(collection_name, knowledgebase_id)
+        shared = self.client.get_collection(name=state.active_collection)
+        # Unique per attempt; kept short because Chroma limits names to 63 characters
+        target_name = f"{partition[:40]}_p{state.version + 1}_{uuid.uuid4().hex[:8]}"
+        target = self.get_or_create_physical(
+            target_name, knowledgebase_id, (shared.metadata or {}).get("hnsw:space")
+        )
+        
+        try:
+            copied = self._copy_partition(shared, target, partition, set())
+            promoted = swap_active_collection(collection_name, knowledgebase_id, state.version, target_name)
+        except Exception:
+            self.delete_physical(target_name)
+            raise
+        if not promoted:
+            self.delete_physical(target_name)
+            return False
+        
+        def retire() -> None:
+            try:
+                remaining = self._copy_partition(shared, target, partition, copied)
+                # Chunks deleted from the partition since they were copied
+                deleted = list(copied - remaining)
+                for start in range(0, len(deleted), settings.IMPORT_WRITE_BATCH_SIZE):
+                    target.delete(ids=deleted[start:start + settings.IMPORT_WRITE_BATCH_SIZE])
+            finally:
+                self.delete_partition(shared.name, partition)
+        
+        timer = threading.Timer(settings.KB_SWAP_GRACE_SECONDS, retire)
+        timer.daemon = True
+        timer.start()
+        return True
+    
+    def _copy_partition(
+        self,
+        shared: chromadb.Collection,
+        target: chromadb.Collection,
+        partition: str,
+        skip_ids: Set[str]
+    ) -> Set[str]:
+        """Copy a partition's chunks not in skip_ids to another collection; returns the IDs the partition holds"""
+        seen: Set[str] = set()
+        for page in self._iter_collection(shared, partition, settings.IMPORT_WRITE_BATCH_SIZE):
+            keep = [
+                position for position, chunk_id in enumerate(page["ids"])
+                if chunk_id not in skip_ids and chunk_id not in seen
+            ]
+            if keep:
+                self.add_to_collection(
+                    target,
+                    texts=[page["documents"][position] for position in keep],
+                    embeddings=page["embeddings"][keep],
+                    metadatas=[page["metadatas"][position] for position in keep],
+                    ids=[page["ids"][position] for position in keep]
+                )
+            seen.update(page["ids"])
+        return seen
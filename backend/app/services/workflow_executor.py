@@ -1,12 +1,116 @@
 """
 Workflow execution service
 """
-from typing import Dict, Any, Optional, List
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, Optional, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.workflow import Workflow, WorkflowComponent, ComponentConnection
+from app.core.config import settings
+from app.core.metrics import WORKFLOW_EXECUTION_DURATION
+from app.core.tracing import tracer
+from app.models.workflow import Workflow, WorkflowComponent, ComponentConnection, WORKFLOW_GRAPH_OPTIONS
 from app.services.llm_service import LLMService
 from app.services.embedding_service import EmbeddingService
 from app.services.vector_store import VectorStoreService
+from app.services.knowledgebase_registry import get_content_version
+from app.services.retrieval_filters import NoMatchingDocuments, build_where, validate_filters
+from app.services.conversation_memory import ConversationMemory
+from app.services.instrumentation import track_component, record_cache, record_retrieval
+
+
+@dataclass(frozen=True)
+class PlanComponent:
+    """Detached snapshot of a workflow component used by execution plans"""
+    id: int
+    workflow_id: int
+    component_type: str
+    node_id: str
+    config: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """A component to run and the component whose output feeds it"""
+    component: PlanComponent
+    source_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Validated, ordered execution steps for a workflow, independent of any DB session"""
+    workflow_id: int
+    steps: List[PlanStep]
+    output_component_id: Optional[int]
+
+
+# Compiled plans by (workflow ID, graph version); saving a new graph bumps the
+# version, so stale entries are never hit and simply age out
+_plan_cache: "OrderedDict[tuple[int, int], ExecutionPlan]" = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def _cached_plan(key: tuple[int, int]) -> Optional[ExecutionPlan]:
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+        return plan
+
+
+def _store_plan(key: tuple[int, int], plan: ExecutionPlan) -> None:
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        _plan_cache.move_to_end(key)
+        while len(_plan_cache) > settings.PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+
+
+# Search results by (knowledgebase ID, content version, normalised query, retrieval
+# parameters); uploads, deletes, imports and re-indexes bump the content version
+_retrieval_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_retrieval_cache_lock = threading.Lock()
+
+
+def _retrieval_key(
+    knowledgebase_id: str,
+    content_version: int,
+    query: str,
+    collection_name: str,
+    n_results: int,
+    embedding_provider: str,
+    embedding_model: Optional[str],
+    filters: Optional[Dict[str, Any]] = None
+) -> tuple:
+    # Case and whitespace differences do not change what users are asking for
+    normalized_query = " ".join(query.casefold().split())
+    return (
+        knowledgebase_id, content_version, normalized_query,
+        collection_name, n_results, embedding_provider, embedding_model,
+        json.dumps(filters, sort_keys=True) if filters else None
+    )
+
+
+def _cached_retrieval(key: tuple) -> Optional[Dict[str, Any]]:
+    with _retrieval_cache_lock:
+        result = _retrieval_cache.get(key)
+        if result is not None:
+            _retrieval_cache.move_to_end(key)
+        return result
+
+
+def _store_retrieval(key: tuple, result: Dict[str, Any]) -> None:
+    with _retrieval_cache_lock:
+        _retrieval_cache[key] = result
+        _retrieval_cache.move_to_end(key)
+        while len(_retrieval_cache) > settings.RETRIEVAL_CACHE_SIZE:
+            _retrieval_cache.popitem(last=False)
 
 
 class WorkflowExecutor:
@@ -16,6 +120,7 @@ class WorkflowExecutor:
         self.llm_service = LLMService()
         self.embedding_service = EmbeddingService()
         self.vector_store = VectorStoreService()
+        self.memory = ConversationMemory(self.llm_service)
     
     def validate_workflow(self, workflow: Workflow) -> tuple[bool, Optional[str]]:
         """
@@ -65,6 +170,13 @@ class WorkflowExecutor:
             if not has_incoming:
                 return False, "Output component must have incoming connections"
         
+        # Check knowledgebase retrieval filters
+        for component in components:
+            if component.component_type == "knowledgebase":
+                error = validate_filters((component.config or {}).get("filters"))
+                if error:
+                    return False, f"Invalid filters on knowledgebase component {component.node_id}: {error}"
+        
         return True, None
     
     def build_execution_graph(self, workflow: Workflow) -> Dict[int, List[int]]:
@@ -90,19 +202,143 @@ class WorkflowExecutor:
         
         return graph
     
+    def compile_workflow(
+        self,
+        workflow: Workflow,
+        lookup_cache: bool = True
+    ) -> tuple[Optional[ExecutionPlan], Optional[str]]:
+        """
+        Validate a workflow and resolve its execution order once
+        
+        The plan records, for each component in BFS order from the User Query
+        component, which upstream component's output it receives. Running the
+        plan gives the same result as walking the graph per query, without
+        touching the ORM objects again. Plans are cached per graph version, so
+        a cache hit does not load the components or connections at all.
+        
+        Args:
+            workflow: Workflow to compile
+            lookup_cache: Whether to check the plan cache first (the compiled
+                plan is stored either way)
+            
+        Returns:
+            Tuple of (plan, error_message)
+        """
+        cache_key = (workflow.id, workflow.graph_version or 1)
+        if lookup_cache:
+            plan = _cached_plan(cache_key)
+            record_cache("plan", plan is not None)
+            if plan is not None:
+                return plan, None
+        
+        with tracer.start_as_current_span("validate_workflow") as span:
+            span.set_attribute("workflow.id", workflow.id)
+            is_valid, error = self.validate_workflow(workflow)
+        if not is_valid:
+            return None, error
+        
+        graph = self.build_execution_graph(workflow)
+        components = {
+            c.id: PlanComponent(
+                id=c.id,
+                workflow_id=c.workflow_id,
+                component_type=c.component_type,
+                node_id=c.node_id,
+                config=dict(c.config or {})
+            )
+            for c in workflow.components
+        }
+        
+        user_query_component = next(
+            (c for c in components.values() if c.component_type == "user_query"),
+            None
+        )
+        if not user_query_component:
+            return None, "User Query component not found"
+        
+        output_component = next(
+            (c for c in components.values() if c.component_type == "output"),
+            None
+        )
+        
+        queue = deque([(user_query_component.id, None)])
+        visited = set()
+        steps = []
+        
+        while queue:
+            component_id, source_id = queue.popleft()
+            
+            if component_id in visited:
+                continue
+            
+            visited.add(component_id)
+            steps.append(PlanStep(component=components[component_id], source_id=source_id))
+            
+            for target_id in graph[component_id]:
+                if target_id not in visited:
+                    queue.append((target_id, component_id))
+        
+        plan = ExecutionPlan(
+            workflow_id=workflow.id,
+            steps=steps,
+            output_component_id=output_component.id if output_component else None
+        )
+        _store_plan(cache_key, plan)
+        return plan, None
+    
+    async def load_plan(
+        self,
+        db: AsyncSession,
+        workflow_id: int
+    ) -> tuple[Optional[Workflow], Optional[ExecutionPlan], Optional[str]]:
+        """
+        Load a workflow and its execution plan through an async session
+        
+        Only the workflow row is read when the plan is cached; the graph is
+        loaded (one batched query per relationship) on a miss.
+        
+        Args:
+            db: Async database session
+            workflow_id: Workflow ID
+            
+        Returns:
+            Tuple of (workflow or None if not found, plan, error_message)
+        """
+        with tracer.start_as_current_span("db.load_workflow"):
+            workflow = await db.get(Workflow, workflow_id)
+            if workflow is None:
+                return None, None, None
+            
+            plan = _cached_plan((workflow.id, workflow.graph_version or 1))
+            record_cache("plan", plan is not None)
+            if plan is not None:
+                return workflow, plan, None
+            
+            await db.execute(
+                select(Workflow)
+                .options(*WORKFLOW_GRAPH_OPTIONS)
+                .where(Workflow.id == workflow_id)
+                .execution_options(populate_existing=True)
+            )
+        
+        plan, error = self.compile_workflow(workflow, lookup_cache=False)
+        return workflow, plan, error
+    
     def execute_component(
         self,
         component: WorkflowComponent,
         input_data: Dict[str, Any],
-        db: Session
+        db: Optional[Session] = None,
+        session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Execute a single component
         
         Args:
-            component: Component to execute
+            component: Component (or PlanComponent snapshot) to execute
             input_data: Input data for the component
-            db: Database session
+            db: Optional database session
+            session_id: Chat session ID, used by memory components
             
         Returns:
             Output data from the component
@@ -122,31 +358,47 @@ class WorkflowExecutor:
             query = input_data.get("query", "")
             knowledgebase_id = component.node_id
             
-            # Generate query embedding
-            embedding_provider = config.get("embedding_provider", "openai")
-            query_embeddings = self.embedding_service.generate_embeddings(
-                [query],
-                provider=embedding_provider
-            )
-            
-            # Search vector store
             collection_name = config.get("collection_name", "documents")
             n_results = config.get("n_results", 5)
+            filters = config.get("filters")
+            
+            # Embed with the model the knowledge base was last indexed with
+            index_config = self.vector_store.index_config(collection_name, knowledgebase_id)
+            embedding_provider = index_config.get("embedding_provider", config.get("embedding_provider", "openai"))
+            embedding_model = index_config.get("embedding_model")
             
-            search_results = self.vector_store.search(
-                collection_name=collection_name,
-                knowledgebase_id=knowledgebase_id,
-                query_embedding=query_embeddings[0],
-                n_results=n_results
+            cache_key = _retrieval_key(
+                knowledgebase_id, get_content_version(knowledgebase_id), query,
+                collection_name, n_results, embedding_provider, embedding_model, filters
             )
+            search_results = _cached_retrieval(cache_key)
+            record_cache("retrieval", search_results is not None)
+            if search_results is None:
+                search_results = self._retrieve(
+                    component, collection_name, [query], n_results, embedding_provider, embedding_model, filters
+                )[0]
+                _store_retrieval(cache_key, search_results)
             
-            # Combine retrieved documents as context
-            context = "\n\n".join(search_results["documents"])
+            return self._knowledgebase_output(query, search_results, input_data)
+        
+        elif component_type == "memory":
+            # Memory component adds the session's recent turns and rolling summary
+            memory = {"history": [], "summary": None}
+            if session_id:
+                memory = self.memory.load(
+                    workflow_id=component.workflow_id,
+                    session_id=session_id,
+                    token_budget=config.get("token_budget"),
+                    max_messages=config.get("max_messages"),
+                    summary_provider=config.get("summary_provider", "openai"),
+                    summary_model=config.get("summary_model")
+                )
             
             return {
-                "query": query,
-                "context": context,
-                "type": "knowledgebase"
+                **input_data,
+                "history": memory["history"],
+                "conversation_summary": memory["summary"],
+                "type": "memory"
             }
         
         elif component_type == "llm_engine":
@@ -160,6 +412,9 @@ class WorkflowExecutor:
             use_web_search = config.get("use_web_search", False)
             temperature = config.get("temperature", 0.7)
             max_tokens = config.get("max_tokens", 1000)
+            fallback_provider = config.get("fallback_provider")
+            fallback_model = config.get("fallback_model")
+            hedge_delay = config.get("hedge_delay")
             
             response = self.llm_service.generate_response(
                 query=query,
@@ -169,7 +424,13 @@ class WorkflowExecutor:
                 use_web_search=use_web_search,
                 model=model,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                fallback_provider=fallback_provider,
+                fallback_model=fallback_model,
+                hedge_delay=hedge_delay,
+                queue_key=str(component.workflow_id),
+                history=input_data.get("history"),
+                conversation_summary=input_data.get("conversation_summary")
             )
             
             return {
@@ -187,6 +448,59 @@ class WorkflowExecutor:
         else:
             raise ValueError(f"Unknown component type: {component_type}")
     
+    def _retrieve(
+        self,
+        component: WorkflowComponent,
+        collection_name: str,
+        queries: List[str],
+        n_results: int,
+        embedding_provider: str,
+        embedding_model: Optional[str],
+        filters: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Embed queries and search a knowledgebase, with its filters pushed into the vector search"""
+        try:
+            where = build_where(component.node_id, filters)
+        except NoMatchingDocuments:
+            # Nothing can match, so skip the embedding call and the search
+            return [{"ids": [], "documents": [], "distances": [], "metadatas": []} for _ in queries]
+        
+        query_embeddings = self.embedding_service.generate_embeddings(
+            queries,
+            provider=embedding_provider,
+            model=embedding_model,
+            queue_key=str(component.workflow_id)
+        )
+        search_results = self.vector_store.search_batch(
+            collection_name=collection_name,
+            knowledgebase_id=component.node_id,
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where
+        )
+        record_retrieval(sum(len(result["documents"]) for result in search_results))
+        return search_results
+    
+    def _knowledgebase_output(
+        self,
+        query: str,
+        search_results: Dict[str, Any],
+        input_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Combine retrieved documents into the knowledgebase component output"""
+        context = "\n\n".join(search_results["documents"])
+        
+        output = {
+            "query": query,
+            "context": context,
+            "type": "knowledgebase"
+        }
+        # Pass conversation memory through when a memory component runs upstream
+        for key in ("history", "conversation_summary"):
+            if input_data and key in input_data:
+                output[key] = input_data[key]
+        return output
+    
     def execute_workflow(
         self,
         workflow: Workflow,
@@ -204,86 +518,294 @@ class WorkflowExecutor:
         Returns:
             Execution result
         """
-        # Validate workflow
-        is_valid, error = self.validate_workflow(workflow)
-        if not is_valid:
+        plan, error = self.compile_workflow(workflow)
+        if plan is None:
             return {
                 "success": False,
                 "error": error,
                 "response": None
             }
         
-        # Build execution graph
-        graph = self.build_execution_graph(workflow)
-        components = {c.id: c for c in workflow.components}
-        
-        # Find user_query component
-        user_query_component = next(
-            (c for c in workflow.components if c.component_type == "user_query"),
-            None
-        )
-        
-        if not user_query_component:
-            return {
-                "success": False,
-                "error": "User Query component not found",
-                "response": None
-            }
-        
-        # Execute workflow using BFS
-        from collections import deque
+        return self.execute_plan(plan, query, db)
+    
+    def execute_plan(
+        self,
+        plan: ExecutionPlan,
+        query: str,
+        db: Optional[Session] = None,
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute a compiled workflow plan with a query
         
-        queue = deque([(user_query_component.id, {"query": query})])
-        visited = set()
+        Args:
+            plan: Compiled execution plan
+            query: User query
+            db: Optional database session
+            session_id: Optional chat session ID (enables memory components)
+            
+        Returns:
+            Execution result
+        """
+        start = time.perf_counter()
         results = {}
+        timings = []
         
-        while queue:
-            component_id, input_data = queue.popleft()
-            
-            if component_id in visited:
-                continue
-            
-            visited.add(component_id)
-            component = components[component_id]
+        for step in plan.steps:
+            component = step.component
+            input_data = {"query": query} if step.source_id is None else results[step.source_id]
             
             # Execute component
             try:
-                output_data = self.execute_component(component, input_data, db)
-                results[component_id] = output_data
-                
-                # Add target components to queue
-                for target_id in graph[component_id]:
-                    if target_id not in visited:
-                        queue.append((target_id, output_data))
-            
+                with track_component(component) as stats:
+                    timings.append(stats)
+                    results[component.id] = self.execute_component(component, input_data, db, session_id)
             except Exception as e:
                 return {
                     "success": False,
                     "error": f"Error executing component {component.component_type}: {str(e)}",
-                    "response": None
+                    "response": None,
+                    "metadata": self._execution_metadata(timings, start, plan.workflow_id, success=False)
                 }
         
-        # Find output component result
-        output_component = next(
-            (c for c in workflow.components if c.component_type == "output"),
-            None
+        metadata = self._execution_metadata(
+            timings, start, plan.workflow_id, success=plan.output_component_id in results
         )
+        return self._final_result(plan, results, metadata)
+    
+    def _execution_metadata(
+        self,
+        timings: List[Any],
+        start: float,
+        workflow_id: Optional[int] = None,
+        success: bool = True
+    ) -> Dict[str, Any]:
+        """Summarize per-component stats in execution order"""
+        elapsed = time.perf_counter() - start
+        if workflow_id is not None:
+            WORKFLOW_EXECUTION_DURATION.labels(
+                workflow_id=str(workflow_id),
+                status="success" if success else "error"
+            ).observe(elapsed)
         
-        if output_component and output_component.id in results:
-            final_response = results[output_component.id].get("response", "")
+        components = [stats.to_dict() for stats in timings]
+        return {
+            "components_executed": len(components),
+            "execution_path": [c["component_id"] for c in components],
+            "total_time_ms": round(elapsed * 1000, 3),
+            "components": components,
+            "prompt_tokens": sum(c["prompt_tokens"] for c in components),
+            "completion_tokens": sum(c["completion_tokens"] for c in components)
+        }
+    
+    def _final_result(
+        self,
+        plan: ExecutionPlan,
+        results: Dict[int, Dict[str, Any]],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the execution result from the output component"""
+        if plan.output_component_id is not None and plan.output_component_id in results:
+            final_response = results[plan.output_component_id].get("response", "")
             return {
                 "success": True,
                 "error": None,
                 "response": final_response,
-                "metadata": {
-                    "components_executed": len(visited),
-                    "execution_path": list(visited)
-                }
+                "metadata": metadata
             }
         else:
             return {
                 "success": False,
                 "error": "Output component did not produce a result",
-                "response": None
+                "response": None,
+                "metadata": metadata
             }
-
+    
+    def execute_batch(
+        self,
+        plan: ExecutionPlan,
+        queries: List[str],
+        concurrency: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a compiled plan for many queries
+        
+        Queries are processed in windows. Within a window, knowledgebase steps
+        before the first LLM step run batched (one embedding call and one vector
+        query per chunk of queries); the remaining steps run per query on a
+        bounded thread pool. Results are yielded as each query finishes, so
+        their order is not the input order.
+        
+        Args:
+            plan: Compiled execution plan
+            queries: User queries
+            concurrency: Maximum concurrent per-query executions
+            
+        Returns:
+            Iterator of per-item results with the query index
+        """
+        concurrency = max(1, min(concurrency or settings.BATCH_DEFAULT_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY))
+        
+        # Steps before the first LLM call are cheap or batchable
+        split = next(
+            (i for i, step in enumerate(plan.steps) if step.component.component_type == "llm_engine"),
+            len(plan.steps)
+        )
+        batched_steps = plan.steps[:split]
+        per_item_steps = plan.steps[split:]
+        window_size = settings.BATCH_WINDOW_SIZE
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-execute") as pool:
+            for window_start in range(0, len(queries), window_size):
+                window = list(enumerate(queries[window_start:window_start + window_size], start=window_start))
+                window_began = time.perf_counter()
+                states = {index: {} for index, _ in window}
+                timings = {index: [] for index, _ in window}
+                errors: Dict[int, str] = {}
+                
+                for step in batched_steps:
+                    self._run_batched_step(step, window, states, timings, errors)
+                
+                # Each item runs in a copy of the caller's context so its spans join the request trace
+                futures = {
+                    pool.submit(
+                        contextvars.copy_context().run, self._run_item_steps, plan, per_item_steps, query,
+                        states[index], timings[index], window_began
+                    ): index
+                    for index, query in window
+                    if index not in errors
+                }
+                
+                for index, query in window:
+                    if index in errors:
+                        yield self._batch_item(index, query, {
+                            "success": False,
+                            "error": errors[index],
+                            "response": None,
+                            "metadata": self._execution_metadata(
+                                timings[index], window_began, plan.workflow_id, success=False
+                            )
+                        })
+                
+                for future in as_completed(futures):
+                    index = futures[future]
+                    yield self._batch_item(index, queries[index], future.result())
+    
+    def _run_batched_step(
+        self,
+        step: PlanStep,
+        window: List[tuple[int, str]],
+        states: Dict[int, Dict[int, Dict[str, Any]]],
+        timings: Dict[int, List[Any]],
+        errors: Dict[int, str]
+    ) -> None:
+        """Run one plan step for every pending query in a batch window"""
+        component = step.component
+        pending = [(index, query) for index, query in window if index not in errors]
+        inputs = {
+            index: {"query": query} if step.source_id is None else states[index][step.source_id]
+            for index, query in pending
+        }
+        
+        if component.component_type != "knowledgebase":
+            for index, _ in pending:
+                try:
+                    with track_component(component) as stats:
+                        timings[index].append(stats)
+                        states[index][component.id] = self.execute_component(component, inputs[index])
+                except Exception as e:
+                    errors[index] = f"Error executing component {component.component_type}: {str(e)}"
+            return
+        
+        config = component.config or {}
+        collection_name = config.get("collection_name", "documents")
+        n_results = config.get("n_results", 5)
+        filters = config.get("filters")
+        index_config = self.vector_store.index_config(collection_name, component.node_id)
+        embedding_provider = index_config.get("embedding_provider", config.get("embedding_provider", "openai"))
+        embedding_model = index_config.get("embedding_model")
+        chunk_size = settings.BATCH_EMBEDDING_SIZE
+        
+        for chunk_start in range(0, len(pending), chunk_size):
+            chunk = pending[chunk_start:chunk_start + chunk_size]
+            chunk_queries = [inputs[index].get("query", "") for index, _ in chunk]
+            
+            try:
+                # One stats record covers the whole chunk and is shared by its queries
+                with track_component(component) as stats:
+                    stats.batch_size = len(chunk)
+                    for index, _ in chunk:
+                        timings[index].append(stats)
+                    
+                    # One version read per chunk keys all of its queries
+                    content_version = get_content_version(component.node_id)
+                    cache_keys = [
+                        _retrieval_key(
+                            component.node_id, content_version, query, collection_name, n_results,
+                            embedding_provider, embedding_model, filters
+                        )
+                        for query in chunk_queries
+                    ]
+                    search_results = [_cached_retrieval(key) for key in cache_keys]
+                    for result in search_results:
+                        record_cache("retrieval", result is not None)
+                    
+                    # Embed and search only the queries that missed
+                    misses = [position for position, result in enumerate(search_results) if result is None]
+                    if misses:
+                        fetched = self._retrieve(
+                            component, collection_name, [chunk_queries[position] for position in misses],
+                            n_results, embedding_provider, embedding_model, filters
+                        )
+                        for position, result in zip(misses, fetched):
+                            search_results[position] = result
+                            _store_retrieval(cache_keys[position], result)
+            except Exception as e:
+                for index, _ in chunk:
+                    errors[index] = f"Error executing component {component.component_type}: {str(e)}"
+                continue
+            
+            for (index, _), query, result in zip(chunk, chunk_queries, search_results):
+                states[index][component.id] = self._knowledgebase_output(query, result)
+    
+    def _run_item_steps(
+        self,
+        plan: ExecutionPlan,
+        steps: List[PlanStep],
+        query: str,
+        results: Dict[int, Dict[str, Any]],
+        timings: List[Any],
+        start: float
+    ) -> Dict[str, Any]:
+        """Run the remaining plan steps for a single query of a batch"""
+        for step in steps:
+            component = step.component
+            input_data = {"query": query} if step.source_id is None else results[step.source_id]
+            
+            try:
+                with track_component(component) as stats:
+                    timings.append(stats)
+                    results[component.id] = self.execute_component(component, input_data)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": f"Error executing component {component.component_type}: {str(e)}",
+                    "response": None,
+                    "metadata": self._execution_metadata(timings, start, plan.workflow_id, success=False)
+                }
+        
+        metadata = self._execution_metadata(
+            timings, start, plan.workflow_id, success=plan.output_component_id in results
+        )
+        return self._final_result(plan, results, metadata)
+    
+    def _batch_item(self, index: int, query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a per-query result for the batch response stream"""
+        return {
+            "index": index,
+            "query": query,
+            "success": result["success"],
+            "response": result.get("response"),
+            "error": result.get("error"),
+            "metadata": result.get("metadata")
+        }
@@ -0,0 +1 @@
+"""Benchmark harness with fake provider stand-ins"""
@@ -0,0 +1,101 @@
+"""
+Synthetic corpus and labelled query generator
+"""
+import json
+import os
+import random
+from typing import Dict, List
+
+# Topic words make documents distinguishable; filler words pad paragraphs
+TOPIC_WORDS = [
+    "invoice", "refund", "shipping", "warranty", "battery", "firmware", "router", "printer",
+    "thermostat", "camera", "subscription", "password", "bluetooth", "charger", "display",
+    "keyboard", "speaker", "installation", "calibration", "backup", "license", "sensor",
+    "antenna", "cartridge", "compressor", "filter", "valve", "pump", "module", "gateway",
+]
+FILLER_WORDS = [
+    "the", "a", "device", "user", "should", "when", "check", "before", "after", "setting",
+    "menu", "select", "press", "hold", "seconds", "light", "status", "support", "contact",
+    "manual", "section", "note", "ensure", "power", "cable", "port", "screen", "option",
+]
+
+
+def _paragraph(rng: random.Random, topics: List[str], words: int) -> str:
+    chosen = [rng.choice(topics) if rng.random() < 0.2 else rng.choice(FILLER_WORDS) for _ in range(words)]
+    return " ".join(chosen).capitalize() + "."
+
+
+def generate_corpus(
+    output_dir: str,
+    documents: int = 50,
+    paragraphs_per_document: int = 20,
+    words_per_paragraph: int = 60,
+    queries_per_document: int = 2,
+    seed: int = 7
+) -> Dict[str, str]:
+    """
+    Write a synthetic text corpus and a labelled query set
+
+    Each document is built around three topic words. Queries are drawn from
+    one paragraph of a document and labelled with that document's filename
+    and paragraph (chunk) index.
+
+    Args:
+        output_dir: Directory to write documents/ and queries.jsonl into
+        documents: Number of documents
+        paragraphs_per_document: Paragraphs per document (one chunk each)
+        words_per_paragraph: Words per paragraph
+        queries_per_document: Labelled queries per document
+        seed: Random seed for reproducible corpora
+
+    Returns:
+        Dictionary with the corpus directory and the query file path
+    """
+    rng = random.Random(seed)
+    corpus_dir = os.path.join(output_dir, "documents")
+    os.makedirs(corpus_dir, exist_ok=True)
+    queries_path = os.path.join(output_dir, "queries.jsonl")
+
+    with open(queries_path, "w", encoding="utf-8") as queries_file:
+        for doc_index in range(documents):
+            topics = rng.sample(TOPIC_WORDS, 3)
+            paragraphs = [
+                _paragraph(rng, topics, words_per_paragraph)
+                for _ in range(paragraphs_per_document)
+            ]
+            filename = f"doc_{doc_index:05d}.txt"
+            with open(os.path.join(corpus_dir, filename), "w", encoding="utf-8") as doc_file:
+                doc_file.write("\n\n".join(paragraphs))
+
+            for _ in range(queries_per_document):
+                chunk_index = rng.randrange(paragraphs_per_document)
+                words = paragraphs[chunk_index].rstrip(".").lower().split()
+                start = rng.randrange(max(1, len(words) - 12))
+                queries_file.write(json.dumps({
+                    "query": " ".join(words[start:start + 12]),
+                    "relevant": [{"filename": filename, "chunk_index": chunk_index}]
+                }) + "\n")
+
+    return {"corpus_dir": corpus_dir, "queries_path": queries_path}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic corpus and labelled queries")
+    parser.add_argument("output_dir")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--queries-per-document", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(json.dumps(generate_corpus(
+        args.output_dir,
+        documents=args.documents,
+        paragraphs_per_document=args.paragraphs,
+        words_per_paragraph=args.words,
+        queries_per_document=args.queries_per_document,
+        seed=args.seed
+    ), indent=2))
@@ -0,0 +1,328 @@
+"""
+Local stand-ins for the OpenAI, Gemini and SerpAPI HTTP APIs
+
+Each fake runs in a background thread with configurable latency, completion
+token rate and error injection. Embeddings are deterministic hashed
+bag-of-words vectors, so retrieval over a synthetic corpus behaves sensibly.
+
+Point the backend at them with:
+    OPENAI_BASE_URL=http://127.0.0.1:<port>/v1/
+    GEMINI_API_ENDPOINT=http://127.0.0.1:<port>   (uses the REST transport)
+    SERPAPI_BASE_URL=http://127.0.0.1:<port>
+"""
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class FakeProviderConfig:
+    """Behaviour of a fake provider"""
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    tokens_per_second: float = 400.0  # Completion token generation rate
+    completion_tokens: int = 60
+    error_rate: float = 0.0  # Fraction of requests answered with error_status
+    error_status: int = 500
+    embedding_dim: int = 1536
+    requests_per_minute: int = 10000
+    tokens_per_minute: int = 2000000
+
+
+def hashed_embedding(text: str, dim: int) -> List[float]:
+    """
+    Deterministic bag-of-words embedding
+
+    Args:
+        text: Text to embed
+        dim: Vector dimension
+
+    Returns:
+        L2-normalised vector
+    """
+    vector = [0.0] * dim
+    for word in WORD_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dim] += 1.0 if (value >> 63) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    """Request handler shared by the fakes; routes are supplied by the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def config(self) -> FakeProviderConfig:
+        return self.server.config
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self, completion_tokens: int = 0) -> bool:
+        """Sleep for the configured latency; return False if an error was injected"""
+        config = self.config
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000.0
+        if completion_tokens and config.tokens_per_second > 0:
+            delay += completion_tokens / config.tokens_per_second
+        time.sleep(delay)
+        self.server.record_request()
+
+        if config.error_rate and random.random() < config.error_rate:
+            headers = {"retry-after-ms": "200"} if config.error_status == 429 else None
+            self._send_json(config.error_status, {"error": {"message": "Injected failure"}}, headers)
+            return False
+        return True
+
+    def do_POST(self):
+        self.server.route(self, "POST")
+
+    def do_GET(self):
+        self.server.route(self, "GET")
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    """Threaded HTTP server hosting one fake provider"""
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[FakeProviderConfig] = None, port: int = 0):
+        super().__init__(("127.0.0.1", port), _FakeHandler)
+        self.config = config or FakeProviderConfig()
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self) -> None:
+        with self._count_lock:
+            self.request_count += 1
+
+    def start(self) -> "FakeProviderServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def route(self, handler: _FakeHandler, method: str) -> None:
+        raise NotImplementedError
+
+
+class FakeOpenAIServer(FakeProviderServer):
+    """Fake of /v1/chat/completions and /v1/embeddings"""
+
+    def _rate_limit_headers(self, tokens: int) -> Dict[str, str]:
+        return {
+            "x-ratelimit-limit-requests": str(self.config.requests_per_minute),
+            "x-ratelimit-remaining-requests": str(self.config.requests_per_minute - 1),
+            "x-ratelimit-limit-tokens": str(self.config.tokens_per_minute),
+            "x-ratelimit-remaining-tokens": str(max(0, self.config.tokens_per_minute - tokens)),
+        }
+
+    def route(self, handler: _FakeHandler, method: str) -> None:
+        path = urlparse(handler.path).path.rstrip("/")
+        body = handler._read_json() if method == "POST" else {}
+
+        if path.endswith("/chat/completions"):
+            prompt_tokens = sum(_estimate_tokens(m.get("content") or "") for m in body.get("messages", []))
+            completion_tokens = min(self.config.completion_tokens, body.get("max_tokens") or self.config.completion_tokens)
+            if not handler._simulate(completion_tokens):
+                return
+            handler._send_json(200, {
+                "id": f"chatcmpl-{self.request_count}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-3.5-turbo"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "word " * completion_tokens},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            }, self._rate_limit_headers(prompt_tokens + completion_tokens))
+            return
+
+        if path.endswith("/embeddings"):
+            inputs = body.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            if not handler._simulate():
+                return
+            data = []
+            for i, text in enumerate(inputs):
+                vector = hashed_embedding(text, self.config.embedding_dim)
+                if body.get("encoding_format") == "base64":
+                    encoded = base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+                    data.append({"object": "embedding", "index": i, "embedding": encoded})
+                else:
+                    data.append({"object": "embedding", "index": i, "embedding": vector})
+            tokens = sum(_estimate_tokens(text) for text in inputs)
+            handler._send_json(200, {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "text-embedding-ada-002"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+            }, self._rate_limit_headers(tokens))
+            return
+
+        handler._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+
+class FakeGeminiServer(FakeProviderServer):
+    """Fake of the Gemini REST generateContent and embedContent methods"""
+
+    def route(self, handler: _FakeHandler, method: str) -> None:
+        path = urlparse(handler.path).path
+        body = handler._read_json() if method == "POST" else {}
+
+        if path.endswith(":generateContent"):
+            if not handler._simulate(self.config.completion_tokens):
+                return
+            handler._send_json(200, {
+                "candidates": [{
+                    "content": {"parts": [{"text": "word " * self.config.completion_tokens}], "role": "model"},
+                    "finishReason": "STOP",
+                    "index": 0
+                }]
+            })
+            return
+
+        if path.endswith(":embedContent"):
+            if not handler._simulate():
+                return
+            text = " ".join(part.get("text", "") for part in body.get("content", {}).get("parts", []))
+            handler._send_json(200, {
+                "embedding": {"values": hashed_embedding(text, self.config.embedding_dim)}
+            })
+            return
+
+        handler._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+
+class FakeSerpAPIServer(FakeProviderServer):
+    """Fake of SerpAPI's /search.json"""
+
+    def route(self, handler: _FakeHandler, method: str) -> None:
+        parsed = urlparse(handler.path)
+        if parsed.path.rstrip("/") != "/search.json":
+            handler._send_json(404, {"error": f"Unknown path {parsed.path}"})
+            return
+
+        params = parse_qs(parsed.query)
+        query = params.get("q", [""])[0]
+        num = int(params.get("num", ["5"])[0])
+        if not handler._simulate():
+            return
+        handler._send_json(200, {
+            "organic_results": [
+                {
+                    "title": f"Result {i + 1} for {query}",
+                    "link": f"https://example.com/{i + 1}",
+                    "snippet": f"Synthetic snippet {i + 1} about {query}."
+                }
+                for i in range(num)
+            ]
+        })
+
+
+def start_fake_providers(config: Optional[FakeProviderConfig] = None) -> Tuple[FakeOpenAIServer, FakeGeminiServer, FakeSerpAPIServer]:
+    """
+    Start all three fakes on ephemeral ports
+
+    Args:
+        config: Shared behaviour for the fakes
+
+    Returns:
+        Tuple of (openai, gemini, serpapi) servers
+    """
+    config = config or FakeProviderConfig()
+    return (
+        FakeOpenAIServer(config).start(),
+        FakeGeminiServer(config).start(),
+        FakeSerpAPIServer(config).start(),
+    )
+
+
+def provider_environment(openai_server: FakeOpenAIServer, gemini_server: FakeGeminiServer, serpapi_server: FakeSerpAPIServer) -> Dict[str, str]:
+    """Environment variables that point the backend at the fakes"""
+    return {
+        "OPENAI_API_KEY": "sk-fake",
+        "OPENAI_BASE_URL": f"{openai_server.url}/v1/",
+        "GEMINI_API_KEY": "fake-gemini-key",
+        "GEMINI_API_ENDPOINT": gemini_server.url,
+        "SERPAPI_API_KEY": "fake-serpapi-key",
+        "SERPAPI_BASE_URL": serpapi_server.url,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run fake provider servers until interrupted")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    servers = start_fake_providers(FakeProviderConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status
+    ))
+    for name, value in provider_environment(*servers).items():
+        print(f"{name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
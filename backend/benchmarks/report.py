@@ -0,0 +1,114 @@
+"""
+Latency statistics, memory sampling and baseline comparison
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Summarize a scenario run
+
+    Args:
+        latencies: Per-request latencies in seconds (successful requests)
+        errors: Number of failed requests
+        elapsed: Wall time of the run in seconds
+
+    Returns:
+        Dictionary with request counts, throughput and latency percentiles in ms
+    """
+    completed = len(latencies)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    Read resident and peak resident memory of a process from /proc
+
+    Args:
+        pid: Process ID (defaults to the current process)
+
+    Returns:
+        Dictionary with rss_mb and peak_rss_mb (empty if unavailable)
+    """
+    path = f"/proc/{pid or 'self'}/status"
+    if not os.path.exists(path):
+        return {}
+
+    values = {}
+    with open(path, encoding="utf-8") as status_file:
+        for line in status_file:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, amount = line.split(":", 1)
+                values[name] = int(amount.split()[0]) / 1024.0
+    return {
+        "rss_mb": round(values.get("VmRSS", 0.0), 1),
+        "peak_rss_mb": round(values.get("VmHWM", 0.0), 1),
+    }
+
+
+# Metrics where larger values are regressions; throughput is handled separately
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "rss_mb", "peak_rss_mb")
+
+
+def compare_to_baseline(
+    report: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float
+) -> List[str]:
+    """
+    Find metrics that regressed beyond a relative tolerance
+
+    Args:
+        report: Current results keyed by scenario name
+        baseline: Stored results keyed by scenario name
+        tolerance: Allowed relative change (e.g. 0.15 for 15%)
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for scenario, current in report.items():
+        previous = baseline.get(scenario)
+        if not previous:
+            continue
+
+        for metric in LOWER_IS_BETTER:
+            before, after = previous.get(metric), current.get(metric)
+            if before and after is not None and after > before * (1 + tolerance):
+                regressions.append(f"{scenario}.{metric}: {before} -> {after}")
+
+        before, after = previous.get("throughput_rps"), current.get("throughput_rps")
+        if before and after is not None and after < before * (1 - tolerance):
+            regressions.append(f"{scenario}.throughput_rps: {before} -> {after}")
+
+        if current.get("errors", 0) > previous.get("errors", 0):
+            regressions.append(f"{scenario}.errors: {previous.get('errors', 0)} -> {current['errors']}")
+
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load a stored baseline report (empty if the file does not exist)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file).get("scenarios", {})
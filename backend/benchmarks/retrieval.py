@@ -0,0 +1,356 @@
+"""
+Retrieval quality-versus-latency benchmark
+
+Ingests a corpus through DocumentIngestionService (the same path as
+upload_document) into a scratch vector store per embedding model and HNSW
+distance, then sweeps top-k, rerank and hybrid retrieval over a labelled
+query set. Reports recall@k, MRR, query latency percentiles, index size on
+disk and ingestion throughput as JSON.
+
+Examples:
+    # Synthetic corpus against the fake providers
+    python -m benchmarks.retrieval
+
+    # Labelled corpus from benchmarks.corpus (or your own) against live providers
+    python -m benchmarks.retrieval --corpus-dir ./bench-corpus --live \\
+        --embedding-models text-embedding-3-small,text-embedding-ada-002 \\
+        --backends cosine,l2 --top-k 3,5,10 --output retrieval.json
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_providers import FakeProviderConfig, provider_environment, start_fake_providers
+from benchmarks.report import percentile
+
+KNOWLEDGEBASE_ID = "retrieval-bench"
+TERM_PATTERN = re.compile(r"[a-z0-9]+")
+# Vector candidates fetched per requested result when reranking or fusing
+CANDIDATE_FACTOR = 4
+RRF_K = 60
+
+ChunkKey = Tuple[str, int]
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def tokenize(text: str) -> List[str]:
+    return TERM_PATTERN.findall(text.lower())
+
+
+def load_labelled_queries(queries_path: str) -> List[Dict[str, Any]]:
+    """
+    Read a labelled query set
+
+    Each JSONL line is {"query": str, "relevant": [{"filename": str, "chunk_index": int}]}.
+    """
+    with open(queries_path, encoding="utf-8") as queries_file:
+        return [json.loads(line) for line in queries_file if line.strip()]
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of all files under a directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class KeywordIndex:
+    """In-memory BM25 index over the stored chunks, used for hybrid retrieval"""
+
+    def __init__(self, keys: List[ChunkKey], texts: List[str], k1: float = 1.2, b: float = 0.75):
+        self.keys = keys
+        self.texts = dict(zip(keys, texts))
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(text)) for text in texts]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency: Counter = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(texts)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def search(self, query: str, n_results: int) -> List[ChunkKey]:
+        terms = [term for term in set(tokenize(query)) if term in self.idf]
+        scores = []
+        for i, counts in enumerate(self.term_counts):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.average_length or 1.0))
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(reverse=True)
+        return [self.keys[i] for _, i in scores[:n_results]]
+
+
+def rerank(query: str, candidates: List[Tuple[ChunkKey, str]]) -> List[ChunkKey]:
+    """
+    Reorder candidates by query term coverage, keeping vector order for ties
+
+    Args:
+        query: Query text
+        candidates: (chunk key, chunk text) pairs in vector-similarity order
+
+    Returns:
+        Reordered chunk keys
+    """
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return [key for key, _ in candidates]
+
+    def coverage(item: Tuple[int, Tuple[ChunkKey, str]]) -> Tuple[float, int]:
+        rank, (_, text) = item
+        return -len(query_terms & set(tokenize(text))) / len(query_terms), rank
+
+    return [key for _, (key, _) in sorted(enumerate(candidates), key=coverage)]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[ChunkKey]]) -> List[ChunkKey]:
+    """Fuse several rankings with reciprocal rank fusion"""
+    scores: Dict[ChunkKey, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(scores, key=lambda key: -scores[key])
+
+
+def score_ranking(ranking: List[ChunkKey], relevant: set, k: int) -> Tuple[float, float]:
+    """Recall@k and reciprocal rank of the first relevant chunk within k"""
+    top = ranking[:k]
+    found = len(relevant & set(top))
+    recall = found / len(relevant) if relevant else 0.0
+    reciprocal_rank = 0.0
+    for rank, key in enumerate(top):
+        if key in relevant:
+            reciprocal_rank = 1.0 / (rank + 1)
+            break
+    return recall, reciprocal_rank
+
+
+def ingest_corpus(ingestion, corpus_dir: str, embedding_provider: str, embedding_model: Optional[str]) -> Dict[str, Any]:
+    """
+    Ingest every corpus file through DocumentIngestionService
+
+    Documents are transient (never persisted); IDs are assigned locally so the
+    stored chunk metadata matches what an upload would produce.
+    """
+    from app.models.document import Document
+
+    filenames = sorted(os.listdir(corpus_dir))
+    chunk_count = 0
+    bytes_ingested = 0
+    start = time.perf_counter()
+    for document_id, filename in enumerate(filenames, start=1):
+        path = os.path.join(corpus_dir, filename)
+        document = Document(
+            id=document_id,
+            filename=filename,
+            file_path=path,
+            file_size=os.path.getsize(path),
+            file_type="text/plain",
+            knowledgebase_id=KNOWLEDGEBASE_ID,
+            processed="pending"
+        )
+        chunk_count += ingestion.ingest(document, embedding_provider=embedding_provider, embedding_model=embedding_model)
+        bytes_ingested += document.file_size
+    elapsed = time.perf_counter() - start
+
+    return {
+        "documents": len(filenames),
+        "chunks": chunk_count,
+        "bytes": bytes_ingested,
+        "elapsed_s": round(elapsed, 3),
+        "documents_per_s": round(len(filenames) / elapsed, 3) if elapsed > 0 else 0.0,
+        "chunks_per_s": round(chunk_count / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+def evaluate(
+    vector_store,
+    keyword_index: KeywordIndex,
+    queries: List[Dict[str, Any]],
+    query_embeddings: np.ndarray,
+    top_k: int,
+    use_rerank: bool,
+    use_hybrid: bool
+) -> Dict[str, Any]:
+    """Run every query for one retrieval config and score it"""
+    n_candidates = top_k * CANDIDATE_FACTOR if (use_rerank or use_hybrid) else top_k
+    latencies: List[float] = []
+    recalls: List[float] = []
+    reciprocal_ranks: List[float] = []
+
+    for labelled, embedding in zip(queries, query_embeddings):
+        start = time.perf_counter()
+        result = vector_store.search(
+            collection_name=KNOWLEDGEBASE_ID,
+            knowledgebase_id=KNOWLEDGEBASE_ID,
+            query_embedding=embedding,
+            n_results=n_candidates
+        )
+        ranking = [(metadata.get("filename"), metadata.get("chunk_index")) for metadata in result["metadatas"]]
+        if use_hybrid:
+            ranking = reciprocal_rank_fusion([ranking, keyword_index.search(labelled["query"], n_candidates)])
+        if use_rerank:
+            ranking = rerank(labelled["query"], [(key, keyword_index.texts[key]) for key in ranking[:n_candidates]])
+        latencies.append(time.perf_counter() - start)
+
+        relevant = {(item["filename"], item["chunk_index"]) for item in labelled.get("relevant", [])}
+        recall, reciprocal_rank = score_ranking(ranking, relevant, top_k)
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+
+    count = len(queries) or 1
+    return {
+        "top_k": top_k,
+        "rerank": use_rerank,
+        "hybrid": use_hybrid,
+        "queries": len(queries),
+        f"recall@{top_k}": round(sum(recalls) / count, 4),
+        "mrr": round(sum(reciprocal_ranks) / count, 4),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def run_backend(
+    args: argparse.Namespace,
+    corpus_dir: str,
+    queries: List[Dict[str, Any]],
+    embedding_model: Optional[str],
+    distance: str,
+    work_dir: str
+) -> Dict[str, Any]:
+    """Ingest the corpus into a scratch store and sweep retrieval configs"""
+    from app.services.embedding_service import EmbeddingService
+    from app.services.ingestion import DocumentIngestionService
+    from app.services.vector_store import VectorStoreService
+
+    store_path = tempfile.mkdtemp(prefix=f"chroma-{distance}-", dir=work_dir)
+    vector_store = VectorStoreService(path=store_path, distance=distance, use_registry=False)
+    embedding_service = EmbeddingService()
+    ingestion = DocumentIngestionService(embedding_service=embedding_service, vector_store=vector_store)
+
+    ingestion_stats = ingest_corpus(ingestion, corpus_dir, args.embedding_provider, embedding_model)
+
+    stored = vector_store.create_collection(KNOWLEDGEBASE_ID, KNOWLEDGEBASE_ID).get(include=["documents", "metadatas"])
+    keys = [(metadata.get("filename"), metadata.get("chunk_index")) for metadata in stored["metadatas"]]
+    keyword_index = KeywordIndex(keys, stored["documents"])
+
+    start = time.perf_counter()
+    query_embeddings = embedding_service.generate_embeddings(
+        [labelled["query"] for labelled in queries],
+        provider=args.embedding_provider,
+        model=embedding_model
+    )
+    embedding_elapsed = time.perf_counter() - start
+
+    configs = []
+    for top_k in args.top_k:
+        for use_rerank in args.rerank:
+            for use_hybrid in args.hybrid:
+                result = evaluate(vector_store, keyword_index, queries, query_embeddings, top_k, use_rerank, use_hybrid)
+                print(f"{embedding_model or 'default'}/{distance}: {json.dumps(result)}", file=sys.stderr)
+                configs.append(result)
+
+    return {
+        "embedding_provider": args.embedding_provider,
+        "embedding_model": embedding_model,
+        "backend": f"chroma-hnsw-{distance}",
+        "index_size_bytes": directory_size(store_path),
+        "ingestion": ingestion_stats,
+        "query_embedding_ms_per_query": round(embedding_elapsed * 1000 / (len(queries) or 1), 3),
+        "configs": configs,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality against latency")
+    parser.add_argument("--corpus-dir", help="Directory with documents/ and queries.jsonl (generated if omitted)")
+    parser.add_argument("--queries", help="Labelled query JSONL (defaults to <corpus-dir>/queries.jsonl)")
+    parser.add_argument("--documents", type=int, default=50, help="Documents in a generated corpus")
+    parser.add_argument("--top-k", default="1,3,5,10", help="Comma-separated n_results values")
+    parser.add_argument("--backends", default="cosine,l2,ip", help="Comma-separated HNSW distances")
+    parser.add_argument("--rerank", default="off,on", help="Comma-separated: off,on")
+    parser.add_argument("--hybrid", default="off,on", help="Comma-separated: off,on")
+    parser.add_argument("--embedding-provider", default="openai")
+    parser.add_argument("--embedding-models", default="", help="Comma-separated models (provider default if empty)")
+    parser.add_argument("--live", action="store_true", help="Use configured providers instead of the fakes")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    args.top_k = [int(value) for value in parse_list(args.top_k)]
+    args.backends = parse_list(args.backends)
+    args.rerank = [value == "on" for value in parse_list(args.rerank)]
+    args.hybrid = [value == "on" for value in parse_list(args.hybrid)]
+    args.embedding_models = parse_list(args.embedding_models) or [None]
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    work_dir = tempfile.mkdtemp(prefix="retrieval-bench-")
+
+    if args.corpus_dir:
+        corpus_dir = os.path.join(args.corpus_dir, "documents")
+        queries_path = args.queries or os.path.join(args.corpus_dir, "queries.jsonl")
+    else:
+        generated = generate_corpus(work_dir, documents=args.documents)
+        corpus_dir = generated["corpus_dir"]
+        queries_path = args.queries or generated["queries_path"]
+    queries = load_labelled_queries(queries_path)
+
+    servers = []
+    if not args.live:
+        servers = start_fake_providers(FakeProviderConfig(latency_ms=0.0, jitter_ms=0.0))
+        # Must be set before app.core.config is imported
+        os.environ.update(provider_environment(*servers))
+
+    try:
+        runs = [
+            run_backend(args, corpus_dir, queries, model, distance, work_dir)
+            for model in args.embedding_models
+            for distance in args.backends
+        ]
+    finally:
+        for server in servers:
+            server.stop()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "corpus_dir": corpus_dir,
+        "queries_path": queries_path,
+        "live_providers": args.live,
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Benchmark runner
+
+Examples:
+    # In-process executor benchmark against fake providers
+    python -m benchmarks.run --scenarios executor
+
+    # HTTP scenarios against a backend started with the fake provider environment
+    python -m benchmarks.fake_providers          # prints the environment to export
+    python -m benchmarks.run --base-url http://localhost:8000 \\
+        --scenarios upload,execute,chat,batch --server-pid <uvicorn pid>
+
+    # Record a baseline, then fail on regressions beyond 15%
+    python -m benchmarks.run --scenarios executor --save-baseline
+    python -m benchmarks.run --scenarios executor --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_providers import FakeProviderConfig, provider_environment, start_fake_providers
+from benchmarks.report import compare_to_baseline, load_baseline, process_memory
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run backend benchmarks")
+    parser.add_argument("--scenarios", default="executor", help="Comma-separated: executor,upload,execute,chat,batch")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Backend URL for HTTP scenarios")
+    parser.add_argument("--server-pid", type=int, help="Backend PID, to report its memory per scenario")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--corpus-dir", help="Existing output of benchmarks.corpus (generated if omitted)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake provider base latency")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="Fake completion token rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake provider error injection rate")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+async def run_http_scenarios(args: argparse.Namespace, names, context: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from benchmarks.scenarios import HTTP_SCENARIOS, setup_workflow
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=300.0, limits=limits) as client:
+        context["workflow_id"] = await setup_workflow(client)
+        for name in names:
+            summary = await HTTP_SCENARIOS[name](client, context, args.requests, args.concurrency)
+            if args.server_pid:
+                summary.update(process_memory(args.server_pid))
+            results[name] = summary
+            print(f"{name}: {json.dumps(summary)}", file=sys.stderr)
+    return results
+
+
+def main() -> int:
+    args = parse_args()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    work_dir = tempfile.mkdtemp(prefix="workflow-bench-")
+
+    if args.corpus_dir:
+        context = {
+            "corpus_dir": os.path.join(args.corpus_dir, "documents"),
+            "queries_path": os.path.join(args.corpus_dir, "queries.jsonl"),
+        }
+    else:
+        context = generate_corpus(work_dir, documents=args.documents)
+
+    from benchmarks.scenarios import load_queries, scenario_executor
+    context["queries"] = load_queries(context["queries_path"])
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    if "executor" in names:
+        servers = start_fake_providers(FakeProviderConfig(
+            latency_ms=args.latency_ms,
+            tokens_per_second=args.tokens_per_second,
+            error_rate=args.error_rate
+        ))
+        # Must be set before app.core.config is imported
+        os.environ.update(provider_environment(*servers))
+        os.environ["CHROMA_DB_PATH"] = os.path.join(work_dir, "chroma")
+        try:
+            summary = scenario_executor(context, args.requests, args.concurrency)
+            summary.update(process_memory())
+            results["executor"] = summary
+            print(f"executor: {json.dumps(summary)}", file=sys.stderr)
+        finally:
+            for server in servers:
+                server.stop()
+
+    http_names = [name for name in names if name != "executor"]
+    if http_names:
+        results.update(asyncio.run(run_http_scenarios(args, http_names, context)))
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        return 0
+
+    regressions = compare_to_baseline(results, load_baseline(args.baseline), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Benchmark scenarios
+
+HTTP scenarios drive a running backend (started with the fake provider
+environment). The executor scenario runs WorkflowExecutor in-process against
+the fakes, so regressions in the executor and services show up without the
+HTTP and database layers.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import httpx
+from benchmarks.report import summarize
+
+KNOWLEDGEBASE_NODE = "kb-bench"
+
+
+def benchmark_workflow(name: str) -> Dict[str, Any]:
+    """User Query -> KnowledgeBase -> LLM Engine -> Output workflow definition"""
+    return {
+        "name": name,
+        "description": "Benchmark workflow",
+        "components": [
+            {"component_type": "user_query", "node_id": "query", "position_x": 0, "position_y": 0},
+            {
+                "component_type": "knowledgebase",
+                "node_id": KNOWLEDGEBASE_NODE,
+                "position_x": 200,
+                "position_y": 0,
+                # Uploads are stored under the knowledgebase ID as collection name
+                "config": {"collection_name": KNOWLEDGEBASE_NODE, "n_results": 5}
+            },
+            {
+                "component_type": "llm_engine",
+                "node_id": "llm",
+                "position_x": 400,
+                "position_y": 0,
+                "config": {"provider": "openai", "max_tokens": 200}
+            },
+            {"component_type": "output", "node_id": "output", "position_x": 600, "position_y": 0},
+        ],
+        "connections": [
+            {"source_component_id": "query", "target_component_id": KNOWLEDGEBASE_NODE},
+            {"source_component_id": KNOWLEDGEBASE_NODE, "target_component_id": "llm"},
+            {"source_component_id": "llm", "target_component_id": "output"},
+        ]
+    }
+
+
+def load_queries(queries_path: str) -> List[str]:
+    """Read query strings from a labelled JSONL query file"""
+    with open(queries_path, encoding="utf-8") as queries_file:
+        return [json.loads(line)["query"] for line in queries_file if line.strip()]
+
+
+async def run_load(
+    request: Callable[[int], Awaitable[None]],
+    total: int,
+    concurrency: int
+) -> Tuple[List[float], int, float]:
+    """
+    Issue `total` requests with at most `concurrency` in flight
+
+    Args:
+        request: Coroutine function taking the request index; raises on failure
+        total: Number of requests
+        concurrency: Concurrent workers
+
+    Returns:
+        Tuple of (latencies of successful requests, error count, elapsed seconds)
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                await request(index)
+            except Exception:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def setup_workflow(client: httpx.AsyncClient) -> int:
+    """Create the benchmark workflow and return its ID"""
+    response = await client.post("/api/workflows", json=benchmark_workflow(f"benchmark-{uuid.uuid4().hex[:8]}"))
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def scenario_upload(client: httpx.AsyncClient, context: Dict[str, Any], total: int, concurrency: int) -> Dict[str, Any]:
+    """Upload corpus documents into the benchmark knowledge base"""
+    corpus_dir = context["corpus_dir"]
+    files = sorted(os.listdir(corpus_dir))
+
+    async def request(index: int) -> None:
+        filename = files[index % len(files)]
+        with open(os.path.join(corpus_dir, filename), "rb") as document:
+            response = await client.post(
+                "/api/documents/upload",
+                files={"file": (filename, document.read(), "text/plain")},
+                data={"knowledgebase_id": KNOWLEDGEBASE_NODE}
+            )
+        response.raise_for_status()
+        if response.json().get("processed") != "completed":
+            raise RuntimeError(f"Upload of {filename} was not processed")
+
+    return summarize(*await run_load(request, min(total, len(files)), concurrency))
+
+
+async def scenario_execute(client: httpx.AsyncClient, context: Dict[str, Any], total: int, concurrency: int) -> Dict[str, Any]:
+    """Single-query workflow executions"""
+    queries = context["queries"]
+    workflow_id = context["workflow_id"]
+
+    async def request(index: int) -> None:
+        response = await client.post(
+            f"/api/workflows/{workflow_id}/execute",
+            json={"query": queries[index % len(queries)], "workflow_id": workflow_id}
+        )
+        response.raise_for_status()
+        if not response.json().get("success"):
+            raise RuntimeError(response.json().get("error"))
+
+    return summarize(*await run_load(request, total, concurrency))
+
+
+async def scenario_chat(client: httpx.AsyncClient, context: Dict[str, Any], total: int, concurrency: int) -> Dict[str, Any]:
+    """Chat messages spread over a handful of sessions"""
+    queries = context["queries"]
+    workflow_id = context["workflow_id"]
+    sessions = [f"bench-{uuid.uuid4().hex[:8]}" for _ in range(max(1, concurrency))]
+
+    async def request(index: int) -> None:
+        response = await client.post("/api/chat", json={
+            "workflow_id": workflow_id,
+            "session_id": sessions[index % len(sessions)],
+            "message": queries[index % len(queries)],
+            "role": "user"
+        })
+        response.raise_for_status()
+
+    return summarize(*await run_load(request, total, concurrency))
+
+
+async def scenario_batch(client: httpx.AsyncClient, context: Dict[str, Any], total: int, concurrency: int) -> Dict[str, Any]:
+    """One batch execution of `total` queries; latency is per streamed item"""
+    queries = context["queries"]
+    workflow_id = context["workflow_id"]
+    batch = [queries[i % len(queries)] for i in range(total)]
+    item_latencies: List[float] = []
+    errors = 0
+
+    start = time.perf_counter()
+    async with client.stream(
+        "POST",
+        f"/api/workflows/{workflow_id}/execute:batch",
+        json={"queries": batch, "concurrency": concurrency}
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            if json.loads(line).get("success"):
+                item_latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    return summarize(item_latencies, errors, time.perf_counter() - start)
+
+
+HTTP_SCENARIOS = {
+    "upload": scenario_upload,
+    "execute": scenario_execute,
+    "chat": scenario_chat,
+    "batch": scenario_batch,
+}
+
+
+def scenario_executor(context: Dict[str, Any], total: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Run WorkflowExecutor in-process against the fake providers
+
+    Requires the fake provider environment (and a scratch CHROMA_DB_PATH) to
+    be set before the app modules are imported.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.text_extractor import TextExtractor
+    from app.services.workflow_executor import (
+        ExecutionPlan, PlanComponent, PlanStep, WorkflowExecutor
+    )
+
+    executor = WorkflowExecutor()
+    corpus_dir = context["corpus_dir"]
+
+    # Index a slice of the corpus directly through the services
+    for filename in sorted(os.listdir(corpus_dir))[:20]:
+        path = os.path.join(corpus_dir, filename)
+        chunks = [c.strip() for c in TextExtractor.extract_text(path, "text/plain").split("\n\n") if c.strip()]
+        embeddings = executor.embedding_service.generate_embeddings(chunks)
+        executor.vector_store.add_documents(
+            collection_name=KNOWLEDGEBASE_NODE,
+            knowledgebase_id=KNOWLEDGEBASE_NODE,
+            texts=chunks,
+            embeddings=embeddings,
+            metadatas=[{"filename": filename, "chunk_index": i} for i in range(len(chunks))]
+        )
+
+    definition = benchmark_workflow("executor")
+    components = {
+        c["node_id"]: PlanComponent(
+            id=i + 1,
+            workflow_id=0,
+            component_type=c["component_type"],
+            node_id=c["node_id"],
+            config=c.get("config") or {}
+        )
+        for i, c in enumerate(definition["components"])
+    }
+    order = ["query", KNOWLEDGEBASE_NODE, "llm", "output"]
+    plan = ExecutionPlan(
+        workflow_id=0,
+        steps=[
+            PlanStep(component=components[node], source_id=components[order[i - 1]].id if i else None)
+            for i, node in enumerate(order)
+        ],
+        output_component_id=components["output"].id
+    )
+
+    queries = context["queries"]
+    latencies: List[float] = []
+    errors = 0
+
+    def run(index: int) -> Tuple[bool, float]:
+        start = time.perf_counter()
+        result = executor.execute_plan(plan, queries[index % len(queries)])
+        return result["success"], time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for success, latency in pool.map(run, range(total)):
+            if success:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    return summarize(latencies, errors, time.perf_counter() - start)
@@ -0,0 +1,64 @@
+"""
+Shared fixtures
+
+The API tests run against the database configured by the POSTGRES_*
+settings, as the application does, and are skipped when it is
+unreachable. app.main creates the tables on import, so it is only
+imported by the fixtures that need it.
+"""
+import pytest
+from sqlalchemy import text
+from app.core.database import engine
+
+
+@pytest.fixture(scope="session")
+def database():
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        pytest.skip(f"Database unavailable: {e}")
+
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_workflow(client):
+    """Create workflows of a chain of components, deleting them afterwards"""
+    created = []
+
+    def make(component_count: int = 4):
+        node_ids = [f"node-{i}" for i in range(component_count)]
+        response = client.post("/api/workflows", json={
+            "name": f"Query budget {len(created)}",
+            "components": [
+                {
+                    "component_type": "llm_engine",
+                    "node_id": node_id,
+                    "position_x": i * 100,
+                    "position_y": 0,
+                    "config": {"model": "gpt-3.5-turbo"}
+                }
+                for i, node_id in enumerate(node_ids)
+            ],
+            "connections": [
+                {"source_component_id": source, "target_component_id": target}
+                for source, target in zip(node_ids, node_ids[1:])
+            ]
+        })
+        assert response.status_code == 201, response.text
+        workflow = response.json()
+        created.append(workflow["id"])
+        return workflow
+
+    yield make
+
+    for workflow_id in created:
+        client.delete(f"/api/workflows/{workflow_id}")
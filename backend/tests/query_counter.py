@@ -0,0 +1,59 @@
+"""
+SQL statement counting, for catching N+1 query regressions
+
+Example:
+    with assert_max_queries(3):
+        client.get("/api/workflows")
+"""
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.database import engine, async_engine
+
+# The async engine's statements pass through its synchronous core engine
+DEFAULT_ENGINES = (engine, async_engine.sync_engine)
+
+
+class QueryCounter:
+    """Context manager that records every SQL statement executed on a set of engines"""
+
+    def __init__(self, engines: Optional[Sequence[Engine]] = None):
+        self.engines = engines or DEFAULT_ENGINES
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        for observed in self.engines:
+            event.listen(observed, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for observed in self.engines:
+            event.remove(observed, "before_cursor_execute", self._record)
+
+
+@contextmanager
+def assert_max_queries(expected: int, engines: Optional[Sequence[Engine]] = None) -> Iterator[QueryCounter]:
+    """
+    Fail if the block executes more than `expected` SQL statements
+
+    Args:
+        expected: Maximum number of statements allowed
+        engines: Engines to observe (defaults to the application's sync and async engines)
+
+    Raises:
+        AssertionError: Listing the executed statements when over budget
+    """
+    with QueryCounter(engines) as counter:
+        yield counter
+
+    if counter.count > expected:
+        statements = "\n".join(f"  {i + 1}. {statement}" for i, statement in enumerate(counter.statements))
+        raise AssertionError(f"Expected at most {expected} SQL statements, got {counter.count}:\n{statements}")
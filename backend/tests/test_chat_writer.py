@@ -0,0 +1,78 @@
+"""
+Write-behind chat writer failure handling
+"""
+import itertools
+import time
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.core.config import settings
+from app.services import chat_writer as chat_writer_module
+from app.services.chat_writer import ChatMessageWriter
+
+MISSING_WORKFLOW = 999999
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    monkeypatch.setattr(chat_writer_module, "RETRY_DELAY", 0)
+    monkeypatch.setattr(settings, "CHAT_WRITE_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "CHAT_WRITE_MAX_ATTEMPTS", 2)
+
+    writer = ChatMessageWriter()
+    ids = itertools.count(1)
+    monkeypatch.setattr(writer, "_allocate_ids", lambda count: [next(ids) for _ in range(count)])
+    writer.written = []
+    writer.flushes = 0
+    yield writer
+    writer.close(timeout=5)
+
+
+def _messages(workflow_ids):
+    return [
+        {"workflow_id": workflow_id, "session_id": "session", "role": "user", "message": f"message {i}"}
+        for i, workflow_id in enumerate(workflow_ids)
+    ]
+
+
+def _wait_until_written(writer, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while writer.pending_messages("session"):
+        assert time.monotonic() < deadline, "writer did not drain its queue"
+        time.sleep(0.01)
+
+
+def test_row_violating_a_foreign_key_is_dropped_and_the_rest_written(writer, monkeypatch):
+    def flush(rows):
+        writer.flushes += 1
+        if any(row["workflow_id"] == MISSING_WORKFLOW for row in rows):
+            raise IntegrityError("INSERT INTO chat_messages", {}, Exception("violates foreign key constraint"))
+        writer.written.extend(rows)
+
+    monkeypatch.setattr(writer, "_flush", flush)
+
+    workflow_ids = [1] * 10
+    workflow_ids[6] = MISSING_WORKFLOW
+    rows = writer.submit(_messages(workflow_ids))
+    _wait_until_written(writer)
+
+    assert [row["id"] for row in writer.written] == [row["id"] for row in rows if row["workflow_id"] == 1]
+
+    # Later messages are not held up by the dropped one
+    later = writer.submit(_messages([1, 1]))
+    _wait_until_written(writer)
+    assert writer.written[-2:] == later
+
+
+def test_transient_errors_retry_without_dropping(writer, monkeypatch):
+    def flush(rows):
+        writer.flushes += 1
+        if writer.flushes <= 4:
+            raise OperationalError("INSERT INTO chat_messages", {}, Exception("connection refused"))
+        writer.written.extend(rows)
+
+    monkeypatch.setattr(writer, "_flush", flush)
+
+    rows = writer.submit(_messages([1] * 5))
+    _wait_until_written(writer)
+
+    assert writer.written == rows
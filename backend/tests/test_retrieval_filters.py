@@ -0,0 +1,137 @@
+"""
+Knowledgebase retrieval filters: validation, where clauses and chunk metadata
+"""
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.services import retrieval_filters
+from app.services.retrieval_filters import (
+    NoMatchingDocuments,
+    _filename_like,
+    build_where,
+    chunk_metadata,
+    validate_filters,
+)
+
+JAN_1 = 1704067200  # 2024-01-01T00:00:00Z
+FEB_1 = 1706745600  # 2024-02-01T00:00:00Z
+
+
+class FakeSession:
+    """SessionLocal stand-in whose document query matches the given IDs"""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return [type("Row", (), {"id": document_id}) for document_id in self.ids]
+
+
+@pytest.fixture
+def documents(monkeypatch):
+    def use(ids):
+        monkeypatch.setattr(retrieval_filters, "SessionLocal", lambda: FakeSession(ids))
+    return use
+
+
+@pytest.mark.parametrize("filters, error", [
+    (None, None),
+    ({"document_ids": [1, 2], "tags": ["a"], "uploaded_after": "2024-01-01"}, None),
+    ([], "filters must be an object"),
+    ({"owner": "x"}, "Unknown filters: owner"),
+    ({"document_ids": [1, True]}, "document_ids must be a list of integers"),
+    ({"document_ids": "1"}, "document_ids must be a list of integers"),
+    ({"filename_pattern": 3}, "filename_pattern must be a string"),
+    ({"uploaded_before": "yesterday"}, "uploaded_before must be an ISO 8601 date or time"),
+    ({"tags": "a,b"}, "tags must be a list of strings"),
+])
+def test_validate_filters(filters, error):
+    assert validate_filters(filters) == error
+
+
+def test_filename_like_escapes_like_wildcards():
+    assert _filename_like("100%_done.pdf") == "100\\%\\_done.pdf"
+    assert _filename_like("back\\slash") == "back\\\\slash"
+    assert _filename_like("manual_*.pd?") == "manual\\_%.pd_"
+
+
+def test_no_filters_build_no_where_clause():
+    assert build_where("kb", None) is None
+    assert build_where("kb", {}) is None
+    assert build_where("kb", {"tags": [" ", ""]}) is None
+
+
+def test_date_bounds_are_after_inclusive_and_before_exclusive():
+    where = build_where("kb", {"uploaded_after": "2024-01-01", "uploaded_before": "2024-02-01T01:00:00+01:00"})
+
+    assert where == {"$and": [
+        {"uploaded_at": {"$gte": JAN_1}},
+        {"uploaded_at": {"$lt": FEB_1}},
+    ]}
+    # Chunks uploaded exactly on a bound carry the same epoch as the bound
+    assert chunk_metadata(1, "a.pdf", datetime(2024, 1, 1), None)["uploaded_at"] == JAN_1
+    assert chunk_metadata(1, "a.pdf", datetime(2024, 2, 1, tzinfo=timezone.utc), None)["uploaded_at"] == FEB_1
+
+
+def test_single_clause_is_returned_unwrapped():
+    assert build_where("kb", {"document_ids": [3, 1, 3]}) == {"document_id": {"$in": [1, 3]}}
+
+
+def test_combined_filters_build_an_and_clause(documents):
+    documents([4, 5, 6])
+    where = build_where("kb", {
+        "document_ids": [5, 6, 7],
+        "filename_pattern": "report_*",
+        "uploaded_after": "2024-01-01",
+        "uploaded_before": "2024-02-01",
+        "tags": ["finance", " finance", "q1"],
+    })
+
+    assert where == {"$and": [
+        {"document_id": {"$in": [5, 6]}},
+        {"uploaded_at": {"$gte": JAN_1}},
+        {"uploaded_at": {"$lt": FEB_1}},
+        {"tag:finance": 1},
+        {"tag:q1": 1},
+    ]}
+
+
+def test_empty_document_ids_match_nothing():
+    with pytest.raises(NoMatchingDocuments):
+        build_where("kb", {"document_ids": []})
+
+
+def test_filename_pattern_matching_no_documents_matches_nothing(documents):
+    documents([])
+    with pytest.raises(NoMatchingDocuments):
+        build_where("kb", {"filename_pattern": "missing_*"})
+
+
+def test_filename_pattern_outside_document_ids_matches_nothing(documents):
+    documents([1, 2])
+    with pytest.raises(NoMatchingDocuments):
+        build_where("kb", {"filename_pattern": "*.pdf", "document_ids": [3]})
+
+
+def test_chunk_metadata_encodes_upload_time_and_tags():
+    uploaded_at = datetime(2024, 1, 1, 2, tzinfo=timezone(timedelta(hours=2)))
+
+    assert chunk_metadata(7, "notes.md", uploaded_at, ["draft", "q1"]) == {
+        "document_id": 7,
+        "filename": "notes.md",
+        "uploaded_at": JAN_1,
+        "tag:draft": 1,
+        "tag:q1": 1,
+    }
+    assert chunk_metadata(7, "notes.md", None, None) == {"document_id": 7, "filename": "notes.md"}
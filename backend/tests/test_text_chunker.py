@@ -0,0 +1,56 @@
+"""
+Incremental chunking of extracted text
+"""
+import pytest
+from app.services.ingestion import PIECE_SEPARATOR, DocumentIngestionService, TextChunker
+
+PIECES = [
+    "Intro paragraph.\n\nShort one.",
+    "Page two starts here and keeps going for a while.",
+    "\n\n",
+    "Last   page.\n\n\n\nWith trailing text.  ",
+]
+
+
+def _chunk_incrementally(pieces, chunk_size):
+    chunker = TextChunker(chunk_size)
+    chunks = []
+    for piece in pieces:
+        chunks.extend(chunker.add(piece))
+    return chunks + chunker.finish()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 5, 16, 40, 1000])
+def test_pieces_chunk_like_the_joined_text(chunk_size):
+    expected = DocumentIngestionService.chunk_text(PIECE_SEPARATOR.join(PIECES), chunk_size)
+    assert _chunk_incrementally(PIECES, chunk_size) == expected
+
+
+def test_without_chunk_size_every_paragraph_is_a_chunk():
+    assert TextChunker().add("one\n\n  \n\ntwo") == ["one", "two"]
+
+
+def test_partial_chunk_is_held_back_until_full_or_finished():
+    chunker = TextChunker(20)
+    assert chunker.add("end of page") == []
+    assert chunker.add("next page") == ["end of page"]
+    assert chunker.finish() == ["next page"]
+    assert chunker.finish() == []
+
+
+def test_paragraphs_are_packed_up_to_the_chunk_size():
+    chunker = TextChunker(12)
+    assert chunker.add("aaaa\n\nbbbb\n\ncccc") == ["aaaa\n\nbbbb"]
+    assert chunker.finish() == ["cccc"]
+
+
+def test_long_paragraph_splits_at_whitespace():
+    chunker = TextChunker(10)
+    assert chunker.add("alpha beta gamma delta") == ["alpha beta", "gamma"]
+    assert chunker.finish() == ["delta"]
+
+
+def test_long_word_splits_at_the_chunk_size():
+    chunker = TextChunker(4)
+    assert chunker.add("abcdefghij") == ["abcd", "efgh"]
+    assert chunker.finish() == ["ij"]
@@ -0,0 +1,87 @@
+"""
+SQL statement budgets of the workflow routes
+
+Each route must load a workflow graph in a fixed number of statements,
+however many workflows, components and connections it returns.
+"""
+from tests.query_counter import QueryCounter, assert_max_queries
+
+
+def test_list_workflows_loads_graphs_in_batches(client, make_workflow):
+    created = {make_workflow(component_count=5)["id"] for _ in range(3)}
+
+    # Workflows, then one SELECT each for all components and all connections
+    with assert_max_queries(3):
+        response = client.get("/api/workflows")
+
+    assert response.status_code == 200
+    listed = [workflow for workflow in response.json() if workflow["id"] in created]
+    assert len(listed) == 3
+    assert all(len(workflow["components"]) == 5 for workflow in listed)
+
+
+def test_list_workflow_summaries_reads_only_workflow_rows(client, make_workflow):
+    make_workflow(component_count=5)
+
+    with assert_max_queries(1):
+        response = client.get("/api/workflows/summaries")
+
+    assert response.status_code == 200
+    assert all("components" not in workflow for workflow in response.json())
+
+
+def test_get_workflow(client, make_workflow):
+    workflow = make_workflow(component_count=8)
+
+    with assert_max_queries(3):
+        response = client.get(f"/api/workflows/{workflow['id']}")
+
+    assert response.status_code == 200
+    assert len(response.json()["components"]) == 8
+    assert len(response.json()["connections"]) == 7
+
+
+def _graph_update(workflow, moved_x):
+    components = [
+        {
+            "component_type": component["component_type"],
+            "node_id": component["node_id"],
+            "position_x": moved_x if i == 0 else component["position_x"],
+            "position_y": component["position_y"],
+            "config": {"model": "gpt-4"} if i == 1 else component["config"]
+        }
+        for i, component in enumerate(workflow["components"])
+    ]
+    node_ids = {component["id"]: component["node_id"] for component in workflow["components"]}
+    connections = [
+        {
+            "source_component_id": node_ids[connection["source_component_id"]],
+            "target_component_id": node_ids[connection["target_component_id"]]
+        }
+        for connection in workflow["connections"]
+    ]
+    return {"components": components, "connections": connections}
+
+
+def test_update_workflow(client, make_workflow):
+    workflow = make_workflow(component_count=8)
+
+    # Three reads, one UPDATE per changed column set, the version bump, the
+    # refresh and one SELECT each for components and connections
+    with assert_max_queries(9):
+        response = client.put(f"/api/workflows/{workflow['id']}", json=_graph_update(workflow, moved_x=999))
+
+    assert response.status_code == 200
+    assert response.json()["graph_version"] == workflow["graph_version"] + 1
+
+
+def test_update_workflow_statements_do_not_grow_with_components(client, make_workflow):
+    counts = []
+    for component_count in (2, 10):
+        workflow = make_workflow(component_count=component_count)
+        with QueryCounter() as counter:
+            response = client.put(f"/api/workflows/{workflow['id']}", json=_graph_update(workflow, moved_x=999))
+        assert response.status_code == 200
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
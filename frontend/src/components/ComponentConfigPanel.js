@@ -6,6 +6,8 @@ function ComponentConfigPanel({ node, onConfigUpdate, onClose }) {
   const [config, setConfig] = useState(node.data.config || {});
   const [documents, setDocuments] = useState([]);
   const [uploading, setUploading] = useState(false);
+  const [uploadTags, setUploadTags] = useState('');
+  const [filterTags, setFilterTags] = useState((node.data.config?.filters?.tags || []).join(', '));
 
   useEffect(() => {
     if (node.type === 'knowledgebase') {
@@ -28,13 +30,25 @@ function ComponentConfigPanel({ node, onConfigUpdate, onClose }) {
     onConfigUpdate(node.id, newConfig);
   };
 
+  const handleFilterChange = (key, value) => {
+    const filters = { ...(config.filters || {}) };
+    if (value === '' || (Array.isArray(value) && value.length === 0)) {
+      delete filters[key];
+    } else {
+      filters[key] = value;
+    }
+    handleConfigChange('filters', Object.keys(filters).length > 0 ? filters : undefined);
+  };
+
+  const splitTags = (value) => value.split(',').map((tag) => tag.trim()).filter(Boolean);
+
   const handleFileUpload = async (event) => {
     const file = event.target.files[0];
     if (!file) return;
 
     setUploading(true);
     try {
-      await documentAPI.upload(file, node.id);
+      await documentAPI.upload(file, node.id, uploadTags);
       await loadDocuments();
       alert('Document uploaded successfully!');
     } catch (error) {
@@ -86,6 +100,50 @@ function ComponentConfigPanel({ node, onConfigUpdate, onClose }) {
               <option value="gemini">Gemini</option>
             </select>
           </div>
+          <div className="config-field">
+            <label>Filter: Filename Pattern</label>
+            <input
+              type="text"
+              value={config.filters?.filename_pattern || ''}
+              onChange={(e) => handleFilterChange('filename_pattern', e.target.value)}
+              placeholder="e.g. manual_*.pdf"
+            />
+          </div>
+          <div className="config-field">
+            <label>Filter: Tags (all required, comma-separated)</label>
+            <input
+              type="text"
+              value={filterTags}
+              onChange={(e) => {
+                setFilterTags(e.target.value);
+                handleFilterChange('tags', splitTags(e.target.value));
+              }}
+            />
+          </div>
+          <div className="config-field">
+            <label>Filter: Uploaded After</label>
+            <input
+              type="date"
+              value={config.filters?.uploaded_after || ''}
+              onChange={(e) => handleFilterChange('uploaded_after', e.target.value)}
+            />
+          </div>
+          <div className="config-field">
+            <label>Filter: Uploaded Before</label>
+            <input
+              type="date"
+              value={config.filters?.uploaded_before || ''}
+              onChange={(e) => handleFilterChange('uploaded_before', e.target.value)}
+            />
+          </div>
+          <div className="config-field">
+            <label>Upload Tags (comma-separated)</label>
+            <input
+              type="text"
+              value={uploadTags}
+              onChange={(e) => setUploadTags(e.target.value)}
+            />
+          </div>
           <div className="config-field">
             <label>Upload Documents</label>
             <input
@@ -137,6 +195,17 @@ function ComponentConfigPanel({ node, onConfigUpdate, onClose }) {
               placeholder={config.provider === 'gemini' ? 'gemini-pro' : 'gpt-3.5-turbo'}
             />
           </div>
+          <div className="config-field">
+            <label>Fallback Provider (Optional)</label>
+            <select
+              value={config.fallback_provider || ''}
+              onChange={(e) => handleConfigChange('fallback_provider', e.target.value || null)}
+            >
+              <option value="">None</option>
+              <option value="openai">OpenAI</option>
+              <option value="gemini">Gemini</option>
+            </select>
+          </div>
           <div className="config-field">
             <label>Temperature</label>
             <input
@@ -181,6 +250,44 @@ function ComponentConfigPanel({ node, onConfigUpdate, onClose }) {
       );
     }
 
+    if (node.type === 'memory') {
+      return (
+        <div className="config-section">
+          <p>Memory component adds earlier turns of the chat session, with older turns condensed into a running summary.</p>
+          <div className="config-field">
+            <label>Token Budget</label>
+            <input
+              type="number"
+              min="100"
+              step="100"
+              value={config.token_budget || 1500}
+              onChange={(e) => handleConfigChange('token_budget', parseInt(e.target.value))}
+            />
+          </div>
+          <div className="config-field">
+            <label>Max Recent Messages</label>
+            <input
+              type="number"
+              min="1"
+              max="200"
+              value={config.max_messages || 50}
+              onChange={(e) => handleConfigChange('max_messages', parseInt(e.target.value))}
+            />
+          </div>
+          <div className="config-field">
+            <label>Summary Provider</label>
+            <select
+              value={config.summary_provider || 'openai'}
+              onChange={(e) => handleConfigChange('summary_provider', e.target.value)}
+            >
+              <option value="openai">OpenAI</option>
+              <option value="gemini">Gemini</option>
+            </select>
+          </div>
+        </div>
+      );
+    }
+
     if (node.type === 'output') {
       return (
         <div className="config-section">
@@ -4,6 +4,7 @@ import './ComponentLibrary.css';
 const components = [
   { type: 'user_query', label: 'User Query', icon: '💬' },
   { type: 'knowledgebase', label: 'Knowledge Base', icon: '📚' },
+  { type: 'memory', label: 'Memory', icon: '🧠' },
   { type: 'llm_engine', label: 'LLM Engine', icon: '🤖' },
   { type: 'output', label: 'Output', icon: '📤' },
 ];
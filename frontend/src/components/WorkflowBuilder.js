@@ -42,6 +42,15 @@ function LLMEngineNode({ data }) {
   );
 }
 
+function MemoryNode({ data }) {
+  return (
+    <div className="custom-node memory-node">
+      <div className="node-header">Memory</div>
+      <div className="node-content">{data.label}</div>
+    </div>
+  );
+}
+
 function OutputNode({ data }) {
   return (
     <div className="custom-node output-node">
@@ -55,6 +64,7 @@ const nodeTypes = {
   user_query: UserQueryNode,
   knowledgebase: KnowledgeBaseNode,
   llm_engine: LLMEngineNode,
+  memory: MemoryNode,
   output: OutputNode,
 };
 
@@ -133,6 +143,7 @@ function WorkflowBuilder({ onWorkflowSelect, activeWorkflow }) {
       user_query: 'User Query',
       knowledgebase: 'Knowledge Base',
       llm_engine: 'LLM Engine',
+      memory: 'Memory',
       output: 'Output',
     };
     return labels[type] || type;
@@ -184,6 +195,11 @@ function WorkflowBuilder({ onWorkflowSelect, activeWorkflow }) {
         max_tokens: 1000,
         use_web_search: false,
       },
+      memory: {
+        token_budget: 1500,
+        max_messages: 50,
+        summary_provider: 'openai',
+      },
       output: {},
     };
     return configs[type] || {};
@@ -22,12 +22,15 @@ export const workflowAPI = {
 
 // Document APIs
 export const documentAPI = {
-  upload: (file, knowledgebaseId) => {
+  upload: (file, knowledgebaseId, tags) => {
     const formData = new FormData();
     formData.append('file', file);
     if (knowledgebaseId) {
       formData.append('knowledgebase_id', knowledgebaseId);
     }
+    if (tags) {
+      formData.append('tags', tags);
+    }
     return api.post('/api/documents/upload', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
@@ -51,7 +54,8 @@ export const chatAPI = {
       message,
       role: 'user',
     }),
-  getHistory: (sessionId) => api.get(`/api/chat/sessions/${sessionId}`),
+  getHistory: (sessionId, cursor) =>
+    api.get(`/api/chat/sessions/${sessionId}`, { params: cursor ? { cursor } : {} }),
   listSessions: (workflowId) => api.get(`/api/chat/workflows/${workflowId}/sessions`),
 };
 